@@ -5,6 +5,19 @@ Decoder for Sony Minidisc LCD Remotes
 
 TODO: Everything
 
+The timing, machine, engine and generator modules do not need
+libsigrokdecode, so the offline Engine and the synthetic signal Generator
+can be used on machines without it. The host module runs the sigrok
+Decoders themselves under plain Python, with a stand-in for
+libsigrokdecode's module, and python -m sony_md decodes whole directories
+of captures with them on every core (see batch.py). python -m
+sony_md.index indexes the messages in a capture, so that any part of it
+can be decoded on its own (see index.py).
+
 '''
 
-from .pd import *
\ No newline at end of file
+try:
+	from .pd import *
+except ImportError as e:
+	if e.name != 'sigrokdecode':
+		raise
\ No newline at end of file
@@ -0,0 +1,9 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Sony Minidisc LCD Remote batch decoder, see batch.py
+
+import sys
+from .batch import main
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,255 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Sony Minidisc LCD Remote batch decoder
+
+import argparse
+import importlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .capture import Capture, captureEdges
+from .host import Host, OUTPUT_PYTHON
+from .pipeline import runPipeline
+from .split import captureSegments, decodeSegments
+
+'''
+
+Decodes a whole archive of captures with both decoder layers, spread over a
+pool of worker processes, one capture file per task.
+
+Run from the directory holding the decoders:
+	python -m sony_md [--workers N] [--channel D0] capture.sr directory ...
+
+Directories are searched for .sr files. Each worker runs sony_md with
+sony_md_decode stacked on it through Host, and sends back only the state
+changes and the capture statistics, not the annotations.
+
+Output is JSON lines, one per capture in the order given, each written as
+soon as it and those before it are done:
+	file, samplerate, samples
+	packets: sony_md OUTPUT_PYTHON packets
+	messages: messages on the bus, counting every collapsed repeat
+	changes: [startsample, endsample, {field: value}] for each state change
+		from sony_md_decode, bytes values as hex (left out with --no-changes)
+	statistics: sony_md_decode's CaptureStatistics totals
+	seconds: time the worker spent on the file
+	samplesPerSecond, messagesPerSecond
+	export: with --export, the file the message columns were saved to
+	error: instead of the above, why the capture couldn't be decoded
+and then one with total set: files, failed, samples, messages, seconds
+(wall time of the whole run), samplesPerSecond, messagesPerSecond and
+workers, the processes decoding at once: --workers, or 2 with --pipeline.
+
+--option and --decode-option take key=value pairs for the sony_md and
+sony_md_decode options, the same as sigrok-cli's -P. By default sony_md
+puts no annotations and sony_md_decode no debug rows, as nothing here
+reads them.
+
+--export DIRECTORY saves sony_md_decode's message columns for each capture
+there, named after the capture, as .npz or with --export-format arrow as
+Arrow IPC (see sony_md_decode/export.py).
+
+With --split, captures are decoded one at a time instead, each cut at quiet
+gaps into segments of about that many seconds, which sony_md decodes on
+the workers (see split.py). sony_md_decode then runs over the stitched
+packets, and the result has the number of segments added.
+
+With --pipeline, captures are also decoded one at a time, sony_md and
+sony_md_decode each in a process of their own (see pipeline.py). That
+needs only two cores and works with any sony_md options, where --split
+needs more cores to be quicker.
+
+'''
+
+physicalDefaults = {'annotations': 'none'}
+decodeDefaults = {'debugrows': 'no'}
+
+def parseOptions(pairs):
+	options = {}
+	for pair in pairs:
+		(key, separator, value) = pair.partition('=')
+		if not separator:
+			raise argparse.ArgumentTypeError('Expected key=value, not %r' % pair)
+		options[key] = int(value) if value.isdigit() else value
+	return options
+
+def captureFiles(paths):
+	for path in paths:
+		if os.path.isdir(path):
+			for (directory, subdirectories, names) in os.walk(path):
+				subdirectories.sort()
+				for name in sorted(names):
+					if name.endswith('.sr'):
+						yield os.path.join(directory, name)
+		else:
+			yield path
+
+def jsonValue(value):
+	if isinstance(value, bytes):
+		return value.hex()
+	raise TypeError('%r is not JSON serializable' % (value,))
+
+def statisticsTotals(statistics, samplerate):
+	totals = statistics.metaValues(samplerate)
+	totals['bitCounts'] = dict((str(bitCount), count) for (bitCount, count) in statistics.bitCounts.items())
+	totals['incomplete'] = statistics.incomplete
+	totals['repeatedMessages'] = statistics.repeatedMessages
+	totals['playerPacketTypes'] = dict(('0x%02X' % key, count) for (key, count) in statistics.playerPacketTypeCounts.items())
+	totals['remoteBlockTypes'] = dict(('0x%02X' % key, count) for (key, count) in statistics.remoteBlockTypeCounts.items())
+	totals['errors'] = statistics.errors
+	totals['warnings'] = statistics.warnings
+	return totals
+
+def layerOptions(settings):
+	physicalOptions = dict(physicalDefaults, **settings['physicalOptions'])
+	decodeOptions = dict(decodeDefaults, **settings['decodeOptions'])
+	#Totals only, no summaries part way through
+	decodeOptions['statistics'] = sys.maxsize
+	return (physicalOptions, decodeOptions)
+
+def semanticHost(capture, settings, decodeOptions):
+	semantic = Host('sony_md_decode', capture.samplerate, decodeOptions,
+		collect=(OUTPUT_PYTHON,) if settings['changes'] else ())
+	if settings['export']:
+		semantic.decoder.messageColumns = importlib.import_module('sony_md_decode.export').MessageColumns()
+	return semantic
+
+def captureResult(capture, packetCount, semantic, seconds, settings):
+	statistics = semantic.decoder.statistics
+	result = {
+		'file': capture.path,
+		'samplerate': capture.samplerate,
+		'samples': capture.sampleCount,
+		'packets': packetCount,
+		'messages': statistics.messages,
+		'statistics': statisticsTotals(statistics, capture.samplerate),
+		'seconds': seconds,
+		'samplesPerSecond': capture.sampleCount / seconds,
+		'messagesPerSecond': statistics.messages / seconds,
+	}
+	if settings['changes']:
+		result['changes'] = list(semantic.outputs[OUTPUT_PYTHON])
+	if settings['export']:
+		name = os.path.splitext(os.path.basename(capture.path))[0] + '.' + settings['exportFormat']
+		result['export'] = os.path.join(settings['export'], name)
+		semantic.decoder.messageColumns.save(result['export'])
+	return result
+
+def decodeCapture(path, settings):
+	start = time.perf_counter()
+	try:
+		capture = Capture.open(path, settings['samplerate'], settings['unitsize'])
+		(physicalOptions, decodeOptions) = layerOptions(settings)
+		physical = Host('sony_md', capture.samplerate, physicalOptions, collect=())
+		semantic = physical.stack(semanticHost(capture, settings, decodeOptions))
+		(level, edges) = captureEdges(capture.levelChunks(settings['channel']))
+		physical.runEdges(edges, level, capture.sampleCount)
+		return captureResult(capture, physical.outputs[OUTPUT_PYTHON].count, semantic, time.perf_counter() - start, settings)
+	except Exception as e:
+		return {'file': path, 'error': '%s: %s' % (type(e).__name__, e)}
+
+def decodeSplitCapture(path, settings, mapper):
+	start = time.perf_counter()
+	try:
+		capture = Capture.open(path, settings['samplerate'], settings['unitsize'])
+		(physicalOptions, decodeOptions) = layerOptions(settings)
+		segments = captureSegments(capture, settings['channel'], physicalOptions, int(settings['split'] * capture.samplerate))
+		packets = decodeSegments(mapper, capture, settings['channel'], physicalOptions, segments)
+		semantic = semanticHost(capture, settings, decodeOptions)
+		decode = semantic.decodePacket
+		for (startsample, endsample, packet) in packets:
+			decode(startsample, endsample, packet)
+		result = captureResult(capture, len(packets), semantic, time.perf_counter() - start, settings)
+		result['segments'] = len(segments)
+		return result
+	except Exception as e:
+		return {'file': path, 'error': '%s: %s' % (type(e).__name__, e)}
+
+def decodePipelinedCapture(path, settings):
+	start = time.perf_counter()
+	try:
+		capture = Capture.open(path, settings['samplerate'], settings['unitsize'])
+		(physicalOptions, decodeOptions) = layerOptions(settings)
+		semantic = semanticHost(capture, settings, decodeOptions)
+		packetCount = runPipeline(capture, settings['channel'], physicalOptions, semantic)
+		return captureResult(capture, packetCount, semantic, time.perf_counter() - start, settings)
+	except Exception as e:
+		return {'file': path, 'error': '%s: %s' % (type(e).__name__, e)}
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(prog='python -m sony_md',
+		description='Decode Sony MD remote captures with sony_md and sony_md_decode, on every core.')
+	parser.add_argument('captures', nargs='+', help='capture files, or directories of .sr files')
+	parser.add_argument('--channel', default='0', help='data line channel number or name (default 0)')
+	parser.add_argument('--samplerate', type=int, help='samplerate of raw captures, overrides the .sr one')
+	parser.add_argument('--unitsize', type=int, default=1, help='bytes per sample of raw captures')
+	parser.add_argument('--option', action='append', default=[], help='sony_md option, key=value')
+	parser.add_argument('--decode-option', action='append', default=[], help='sony_md_decode option, key=value')
+	parser.add_argument('--no-changes', action='store_true', help='leave the state changes out')
+	parser.add_argument('--export', metavar='DIRECTORY', help='save the message columns of each capture here')
+	parser.add_argument('--export-format', choices=('npz', 'arrow'), default='npz', help='message column file format')
+	mode = parser.add_mutually_exclusive_group()
+	mode.add_argument('--split', type=float, default=0, metavar='SECONDS',
+		help='split each capture into segments of about this long and decode those in parallel')
+	mode.add_argument('--pipeline', action='store_true',
+		help='decode each capture with sony_md and sony_md_decode in processes of their own')
+	parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes, 1 to decode in this process')
+	parser.add_argument('--output', help='write the JSON lines here instead of to stdout')
+	options = parser.parse_args(argv)
+
+	settings = {
+		'channel': options.channel,
+		'samplerate': options.samplerate,
+		'unitsize': options.unitsize,
+		'physicalOptions': parseOptions(options.option),
+		'decodeOptions': parseOptions(options.decode_option),
+		'changes': not options.no_changes,
+		'split': options.split,
+		'export': options.export,
+		'exportFormat': options.export_format,
+	}
+	files = list(captureFiles(options.captures))
+	#--pipeline decodes in this process and one sony_md process at a time
+	workers = 2 if options.pipeline else options.workers
+	totals = {'total': True, 'files': len(files), 'failed': 0, 'samples': 0, 'messages': 0, 'workers': workers}
+
+	output = open(options.output, 'w') if options.output else sys.stdout
+	executor = None
+	start = time.perf_counter()
+	try:
+		if options.workers == 1 or options.pipeline:
+			mapper = map
+		else:
+			executor = ProcessPoolExecutor(max_workers=options.workers)
+			mapper = executor.map
+		if options.split:
+			#One capture at a time, its segments spread over the workers
+			results = (decodeSplitCapture(path, settings, mapper) for path in files)
+		elif options.pipeline:
+			results = (decodePipelinedCapture(path, settings) for path in files)
+		else:
+			results = mapper(decodeCapture, files, itertools.repeat(settings))
+		for result in results:
+			if 'error' in result:
+				totals['failed'] += 1
+			else:
+				totals['samples'] += result['samples']
+				totals['messages'] += result['messages']
+			output.write(json.dumps(result, default=jsonValue) + '\n')
+			output.flush()
+
+		seconds = time.perf_counter() - start
+		totals['seconds'] = seconds
+		totals['samplesPerSecond'] = totals['samples'] / seconds if seconds else 0.0
+		totals['messagesPerSecond'] = totals['messages'] / seconds if seconds else 0.0
+		output.write(json.dumps(totals) + '\n')
+	finally:
+		if executor is not None:
+			executor.shutdown()
+		if output is not sys.stdout:
+			output.close()
+	return 1 if totals['failed'] else 0
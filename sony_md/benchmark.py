@@ -0,0 +1,202 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Sony Minidisc LCD Remote decoder benchmarks
+
+import argparse
+import gc
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from .engine import Engine, np
+from .generator import Generator, captureSamples, headerMessage, lcdTextMessages
+from .host import Host, OUTPUT_PYTHON
+
+'''
+
+Throughput benchmarks for both decoder layers, over synthetic captures from
+the Generator.
+
+Run from the directory holding the decoders:
+	python -m sony_md.benchmark [--samplerates 1000000 ...] [--messages N]
+
+Each benchmark prints one JSON object per line:
+	benchmark: what was run
+		engine-edges: Engine.decodeEdges() over an edge list
+		engine-samples: Engine.decodeSamples() over a 0/1 sample buffer
+			(the NumPy path if NumPy is installed)
+		sony_md: sony_md's Decoder with default options, run by Host
+		sony_md-headless: the same with 'annotations' set to 'none', only
+			the OUTPUT_PYTHON packets
+		sony_md-compact: the same with 'packetformat' set to 'compact'
+		sony_md_decode: sony_md_decode's Decoder.decode() on each of the
+			Engine's packets, run by Host
+	workload: the message mix, see workloads below
+	samplerate, edges (None for sony_md_decode), messages: size of the run
+	seconds: best of --repeat timed runs
+	edgesPerSecond (None for sony_md_decode), messagesPerSecond
+	peakMemoryBytes: highest traced memory during one more run under
+		tracemalloc (timed runs are not traced)
+	allocatedBlocksPerMessage: memory blocks allocated during that run and
+		not freed by its end, per message, from sys.getallocatedblocks(),
+		with the garbage collector off and the result still held. This is
+		what decoding a message allocates for its packet and annotations,
+		temporaries freed again straight away don't show up.
+	retainedBlocksPerMessage: the same after a gc.collect(), what the result
+		and any caches keep once cyclic garbage has gone.
+
+'''
+
+def pollingMessages(generator):
+	while True:
+		yield headerMessage()
+
+def textMessages(generator):
+	while True:
+		for bits in lcdTextMessages(b'Scrolling track title %02d' % generator.random.randrange(100)):
+			yield bits
+		yield headerMessage()
+
+workloads = {
+	'realistic': Generator.realisticMessages,
+	'polling': pollingMessages,
+	'text': textMessages,
+}
+
+def makeEdges(samplerate, workload, messageCount, seed):
+	generator = Generator(samplerate, jitterpct=5, seed=seed)
+	messages = list(itertools.islice(workloads[workload](generator), messageCount))
+	return list(generator.messagesEdges(messages, resetEvery=100))
+
+def bestTime(function, repeat):
+	best = None
+	for run in range(repeat):
+		start = time.perf_counter()
+		result = function()
+		seconds = time.perf_counter() - start
+		if best is None or seconds < best:
+			best = seconds
+	return best, result
+
+def memoryUse(function):
+	#Don't count garbage left from earlier runs being freed
+	gc.collect()
+	gc.disable()
+	blocks = sys.getallocatedblocks()
+	tracemalloc.start()
+	try:
+		result = function()
+		peak = tracemalloc.get_traced_memory()[1]
+	finally:
+		tracemalloc.stop()
+		allocatedBlocks = sys.getallocatedblocks() - blocks
+		gc.enable()
+	#Both taken with the result still held
+	gc.collect()
+	return peak, allocatedBlocks, sys.getallocatedblocks() - blocks, result
+
+def measure(name, function, repeat, edgeCount, messageCount=None):
+	seconds, result = bestTime(function, repeat)
+	if messageCount is None:
+		messageCount = len(result)
+	del result
+	peak, allocatedBlocks, retainedBlocks, result = memoryUse(function)
+	record = {
+		'benchmark': name,
+		'edges': edgeCount,
+		'messages': messageCount,
+		'seconds': seconds,
+		'edgesPerSecond': edgeCount / seconds if edgeCount is not None else None,
+		'messagesPerSecond': messageCount / seconds,
+		'peakMemoryBytes': peak,
+		'allocatedBlocksPerMessage': allocatedBlocks / messageCount if messageCount else None,
+		'retainedBlocksPerMessage': retainedBlocks / messageCount if messageCount else None,
+	}
+	del result
+	return record
+
+def engineEdges(samplerate, edges):
+	return lambda: Engine(samplerate).decodeEdges(edges)
+
+def engineSamples(samplerate, samples):
+	return lambda: Engine(samplerate).decodeSamples(samples)
+
+def sampleBuffer(edges):
+	samples = captureSamples(edges, edges[-1][0] + 1)
+	if np is not None:
+		return np.frombuffer(samples, dtype=np.uint8)
+	return samples
+
+def physicalDecoder(samplerate, edges, options=None):
+	return lambda: Host('sony_md', samplerate, options).runEdges(edges).outputs[OUTPUT_PYTHON]
+
+def semanticDecoder(samplerate, packets):
+	def run():
+		host = Host('sony_md_decode', samplerate)
+		decode = host.decodePacket
+		for (startsample, endsample, packet) in packets:
+			decode(startsample, endsample, packet)
+		return host
+	return run
+
+physicalBenchmarks = (
+	('sony_md', None),
+	('sony_md-headless', {'annotations': 'none'}),
+	('sony_md-compact', {'packetformat': 'compact'}),
+)
+
+def runBenchmarks(samplerates, workloadNames, messageCount, repeat, seed=1):
+	for samplerate in samplerates:
+		for workload in workloadNames:
+			edges = makeEdges(samplerate, workload, messageCount, seed)
+			common = {'workload': workload, 'samplerate': samplerate}
+
+			record = measure('engine-edges', engineEdges(samplerate, edges), repeat, len(edges))
+			record.update(common)
+			yield record
+
+			samples = sampleBuffer(edges)
+			record = measure('engine-samples', engineSamples(samplerate, samples), repeat, len(edges))
+			record.update(common)
+			record['samples'] = len(samples)
+			record['numpy'] = np is not None
+			yield record
+			del samples
+
+			for (name, options) in physicalBenchmarks:
+				record = measure(name, physicalDecoder(samplerate, edges, options), repeat, len(edges))
+				record.update(common)
+				yield record
+
+			packets = Engine(samplerate).decodeEdges(edges)
+			record = measure('sony_md_decode', semanticDecoder(samplerate, packets), repeat, None, len(packets))
+			record.update(common)
+			yield record
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(prog='python -m sony_md.benchmark',
+		description='Throughput benchmarks for the Sony MD remote decoders.')
+	parser.add_argument('--samplerates', type=int, nargs='+', default=[250000, 1000000, 4000000])
+	parser.add_argument('--workloads', nargs='+', choices=sorted(workloads), default=sorted(workloads))
+	parser.add_argument('--messages', type=int, default=2000, help='messages per workload')
+	parser.add_argument('--repeat', type=int, default=3, help='timed runs per benchmark, the best is kept')
+	parser.add_argument('--seed', type=int, default=1)
+	parser.add_argument('--output', help='write the JSON lines here instead of to stdout')
+	options = parser.parse_args(argv)
+
+	environment = {'python': platform.python_version(), 'implementation': platform.python_implementation()}
+	output = open(options.output, 'w') if options.output else sys.stdout
+	try:
+		for record in runBenchmarks(options.samplerates, options.workloads, options.messages, options.repeat, options.seed):
+			record.update(environment)
+			output.write(json.dumps(record, sort_keys=True) + '\n')
+			output.flush()
+	finally:
+		if output is not sys.stdout:
+			output.close()
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,206 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Sony Minidisc LCD Remote capture files
+
+import configparser
+import os
+import re
+import zipfile
+
+'''
+
+Reads the data line out of capture files without libsigrok, for decoding
+captures outside PulseView and sigrok-cli.
+
+Capture.open() takes:
+	a sigrok session file (.sr), a zip of a 'metadata' file and the logic
+		data in 'logic-1-1', 'logic-1-2', ... (or a single 'logic-1')
+	anything else as raw logic data, unitsize bytes per sample as written
+		by sigrok-cli -O binary, which needs the samplerate given
+
+channel is a channel number, or for .sr files a channel name such as 'D0'.
+
+levelChunks() gives the channel as 0/1 bytes, one chunk of the file at a
+time, from start to end if only part of the capture is wanted.
+captureEdges() turns those into the first level of the line and (samplenum,
+level) edges, the same as libsigrokdecode would report them, and
+quietGaps() finds the long low stretches a capture can be split at.
+Edges are found with bytes.find(), a chunk at a time, so captures far
+bigger than memory are fine and it is quick without NumPy too.
+
+Example:
+	capture = Capture.open('rig-07.sr')
+	(level, edges) = captureEdges(capture.levelChunks('D0'))
+	Host('sony_md', capture.samplerate).runEdges(edges, level, capture.sampleCount)
+
+'''
+
+RAW_CHUNK_SAMPLES = 1 << 22
+
+samplerateUnits = {'hz': 1, 'khz': 1000, 'mhz': 1000000, 'ghz': 1000000000}
+
+#Per bit of a byte, bytes.translate() table to the value of that bit
+bitTables = [bytes((value >> whichBit) & 1 for value in range(256)) for whichBit in range(8)]
+
+def parseSamplerate(text):
+	match = re.match(r'^\s*([0-9.]+)\s*([a-zA-Z]*)\s*$', str(text))
+	unit = match.group(2).lower() or 'hz' if match is not None else None
+	if unit not in samplerateUnits:
+		raise ValueError('Unrecognized samplerate %r' % text)
+	return int(round(float(match.group(1)) * samplerateUnits[unit]))
+
+def channelLevels(data, unitsize, channel):
+	(whichByte, whichBit) = divmod(channel, 8)
+	if unitsize > 1:
+		data = data[whichByte::unitsize]
+	return data.translate(bitTables[whichBit])
+
+def chunkEdges(levels, offset, level):
+	find = levels.find
+	position = find(b'\x00' if level else b'\x01')
+	while position >= 0:
+		level ^= 1
+		yield (offset + position, level)
+		position = find(b'\x00' if level else b'\x01', position + 1)
+	return level
+
+def levelEdges(levelChunks, level, offset=0):
+	for levels in levelChunks:
+		level = yield from chunkEdges(levels, offset, level)
+		offset += len(levels)
+
+def captureEdges(levelChunks, offset=0):
+	chunks = iter(levelChunks)
+	first = next(chunks, b'')
+	level = first[0] if first else 0
+
+	def allChunks():
+		yield first
+		for levels in chunks:
+			yield levels
+	return (level, levelEdges(allChunks(), level, offset))
+
+def quietGaps(levelChunks, minimumSamples):
+	'''
+	The falling edge at the start of every low stretch at least
+	minimumSamples long.
+	'''
+	pattern = b'\x00' * minimumSamples
+	offset = 0
+	#Start of a low stretch running on from the chunks before, -1 once it has been given
+	lowStart = None
+	for levels in levelChunks:
+		position = 0
+		if lowStart is not None:
+			position = levels.find(b'\x01')
+			if position < 0:
+				offset += len(levels)
+				continue
+			if lowStart > 0 and offset + position - lowStart >= minimumSamples:
+				yield lowStart
+			lowStart = None
+
+		while True:
+			found = levels.find(pattern, position)
+			if found < 0:
+				break
+			high = levels.rfind(b'\x01', position, found)
+			start = offset + (high + 1 if high >= 0 else position)
+			if start > 0:
+				yield start
+			position = levels.find(b'\x01', found + minimumSamples)
+			if position < 0:
+				lowStart = -1
+				break
+
+		if lowStart is None and levels[-1:] == b'\x00':
+			lowStart = offset + levels.rfind(b'\x01') + 1
+		offset += len(levels)
+	if lowStart is not None and lowStart > 0 and offset - lowStart >= minimumSamples:
+		yield lowStart
+
+class Capture:
+	def __init__(self, path, samplerate, unitsize, channelNames, sampleCount):
+		self.path = path
+		self.samplerate = samplerate
+		self.unitsize = unitsize
+		self.channelNames = channelNames
+		self.sampleCount = sampleCount
+
+	@staticmethod
+	def open(path, samplerate=None, unitsize=1):
+		if zipfile.is_zipfile(path):
+			return SessionCapture(path, samplerate)
+		if not samplerate:
+			raise ValueError('%s is raw logic data, the samplerate has to be given' % path)
+		return RawCapture(path, samplerate, unitsize)
+
+	def channelIndex(self, channel):
+		if isinstance(channel, int) or str(channel).isdigit():
+			index = int(channel)
+		elif channel in self.channelNames:
+			index = self.channelNames.index(channel)
+		else:
+			raise ValueError('%s has no channel %r' % (self.path, channel))
+		if index >= self.unitsize * 8:
+			raise ValueError('%s has no channel %r' % (self.path, channel))
+		return index
+
+	def levelChunks(self, channel=0, start=0, end=None):
+		index = self.channelIndex(channel)
+		if end is None:
+			end = self.sampleCount
+		for data in self.dataChunks(start, end):
+			yield channelLevels(data, self.unitsize, index)
+
+class RawCapture(Capture):
+	def __init__(self, path, samplerate, unitsize=1):
+		size = os.path.getsize(path)
+		Capture.__init__(self, path, samplerate, unitsize, [], size // unitsize)
+
+	def dataChunks(self, start, end):
+		with open(self.path, 'rb') as captureFile:
+			captureFile.seek(start * self.unitsize)
+			remaining = (end - start) * self.unitsize
+			while remaining > 0:
+				data = captureFile.read(min(RAW_CHUNK_SAMPLES * self.unitsize, remaining))
+				if not data:
+					return
+				remaining -= len(data)
+				yield data
+
+class SessionCapture(Capture):
+	def __init__(self, path, samplerate=None):
+		with zipfile.ZipFile(path) as session:
+			metadata = configparser.ConfigParser(interpolation=None)
+			metadata.read_string(session.read('metadata').decode('utf-8'))
+			device = metadata['device 1']
+			captureFile = device.get('capturefile', 'logic-1')
+			self.members = sorted((name for name in session.namelist()
+				if name == captureFile or name.startswith(captureFile + '-')),
+				key=lambda name: int(name[len(captureFile)+1:] or 0))
+			unitsize = int(device.get('unitsize', 1))
+			self.memberSamples = [session.getinfo(name).file_size // unitsize for name in self.members]
+			sampleCount = sum(self.memberSamples)
+
+		probeCount = int(device.get('total probes', 8))
+		channelNames = [device.get('probe%d' % (whichProbe + 1), '') for whichProbe in range(probeCount)]
+		if samplerate is None:
+			if 'samplerate' not in device:
+				raise ValueError('%s has no samplerate, it has to be given' % path)
+			samplerate = parseSamplerate(device['samplerate'])
+		Capture.__init__(self, path, samplerate, unitsize, channelNames, sampleCount)
+
+	def dataChunks(self, start, end):
+		memberStart = 0
+		with zipfile.ZipFile(self.path) as session:
+			for (name, memberSamples) in zip(self.members, self.memberSamples):
+				memberEnd = memberStart + memberSamples
+				if memberEnd > start:
+					if memberStart >= end:
+						return
+					data = session.read(name)
+					if start > memberStart or end < memberEnd:
+						data = data[(max(start, memberStart) - memberStart) * self.unitsize:(min(end, memberEnd) - memberStart) * self.unitsize]
+					yield data
+				memberStart = memberEnd
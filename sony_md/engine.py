@@ -0,0 +1,123 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Sony Minidisc LCD Remote offline decoder
+
+from .machine import StateMachine
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+'''
+
+Offline decoding of captures without libsigrokdecode.
+
+Runs the same state machine as the sigrok Decoder, with the same timing,
+and produces the same OUTPUT_PYTHON packets. Each packet is returned as
+
+	(startsample, endsample, [<syncData>, <bitData>, <cleanEnd>, <payload>])
+
+where startsample/endsample are what the sigrok Decoder would have passed
+to put(), and the packet is laid out as described in pd.py. With
+compactPackets set, bitData is a CompactBitData, the same as the sigrok
+Decoder's 'packetformat' option set to 'compact'.
+
+Edges are (samplenum, level) pairs, the same thing the sigrok Decoder gets
+back from wait([{0: 'e'}]). Like libsigrokdecode, the line is assumed to
+be low before the first edge.
+
+With timeout set, messages that stop partway through are flushed with
+cleanEnd False, the same as the sigrok Decoder's 'timeout' option.
+
+With collapseRepeats set, runs of identical messages come back as one
+packet with the repeat count added, the same as the sigrok Decoder's
+'repeats' option set to 'collapse':
+
+	(startsample, endsample, [<syncData>, <bitData>, <cleanEnd>, <payload>, <repeatCount>])
+
+A run still open at the end of a decode*() call is returned then, so runs
+don't carry on from one call to the next.
+
+If NumPy is installed, decodeSamples() finds every edge in the sample
+buffer and sorts every pulse into its pulse class in a handful of array
+operations, leaving only the state machine itself to step through in
+Python. Without NumPy it falls back to a plain Python loop over the
+samples, with the same result.
+
+Example:
+	engine = Engine(samplerate)
+	for startsample, endsample, packet in engine.decodeSamples(samples):
+		...
+
+'''
+
+def findEdges(samples):
+	lastLevel = None
+	for samplenum, level in enumerate(samples):
+		level = 1 if level else 0
+		if lastLevel is not None and level != lastLevel:
+			yield (samplenum, level)
+		lastLevel = level
+
+def findEdgeArrays(samples):
+	levels = (np.asarray(samples) != 0).view(np.int8)
+	edgeSamples = np.flatnonzero(np.diff(levels)) + 1
+	return edgeSamples, levels[edgeSamples]
+
+class Engine(StateMachine):
+	def __init__(self, samplerate, marginpct=20, compactPackets=False, timeout=False, collapseRepeats=False):
+		StateMachine.__init__(self)
+		self.configure(samplerate, marginpct, compactPackets, collapseRepeats)
+		self.timeout = timeout
+		self.packets = []
+
+	def putPacket(self, packet):
+		self.packets.append((self.packetstartsample, self.packetendsample, packet))
+
+	def putRepeats(self, startsample, endsample, packet):
+		self.packets.append((startsample, endsample, packet))
+
+	def takePackets(self):
+		self.flushRepeats()
+		packets = self.packets
+		self.packets = []
+		return packets
+
+	def decodeEdges(self, edges):
+		handleEdge = self.handleEdge
+		if self.timeout:
+			checkTimeout = self.checkTimeout
+			for samplenum, level in edges:
+				checkTimeout(samplenum)
+				handleEdge(level, samplenum)
+		else:
+			for samplenum, level in edges:
+				handleEdge(level, samplenum)
+		return self.takePackets()
+
+	def classifyPulses(self, edgeSamples):
+		classifier = self.classifier
+		pulselengths = np.diff(edgeSamples, prepend=self.newedgesample)
+		slots = np.searchsorted(classifier.boundaries, pulselengths, side='right')
+		return np.asarray(classifier.classes, dtype=np.uint8)[slots]
+
+	def decodeEdgeArrays(self, edgeSamples, edgeLevels):
+		edgeSamples = np.asarray(edgeSamples, dtype=np.int64)
+		pulseClasses = self.classifyPulses(edgeSamples)
+		handlePulse = self.handlePulse
+		pulses = zip(edgeSamples.tolist(), np.asarray(edgeLevels).tolist(), pulseClasses.tolist())
+		if self.timeout:
+			checkTimeout = self.checkTimeout
+			for samplenum, level, pulseClass in pulses:
+				checkTimeout(samplenum)
+				handlePulse(level, samplenum, pulseClass)
+		else:
+			for samplenum, level, pulseClass in pulses:
+				handlePulse(level, samplenum, pulseClass)
+		return self.takePackets()
+
+	def decodeSamples(self, samples):
+		if np is None:
+			return self.decodeEdges(findEdges(samples))
+		return self.decodeEdgeArrays(*findEdgeArrays(samples))
@@ -0,0 +1,224 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Sony Minidisc LCD Remote synthetic signal generator
+
+import random
+from .timing import Timing
+
+'''
+
+Synthetic captures of the remote bus, for benchmarking and testing the
+decoders without real hardware.
+
+Messages are lists of bits in the order sent (every field LSB first), the
+same as bitData[3][whichBit][3] in the OUTPUT_PYTHON packets:
+	headerMessage(): 16 bits, just the Remote and Player headers
+	playerMessage(): 104 bits, the headers and a Player data block
+	remoteMessage(): 115 bits, the headers and a Remote data block, with a
+		Player timing bit in front of each Remote byte
+Data blocks are padded with 0x00 to ten bytes and get a valid checksum.
+
+Generator turns messages into edges, (samplenum, level) pairs like the ones
+Engine.decodeEdges() takes, using the ideal pulse lengths from Timing:
+	the line idles high
+	a 40ms reset or a 1.1ms presync low pulse, then a 950us presync delay
+	high and a 220us sync low
+	each bit is 32.5us high followed by 17us low for a 1 or 220us low for
+	a 0
+
+jitterpct varies every pulse by up to that many percent either way.
+glitchpct is the chance of a message getting a one-sample glitch at a
+random edge, truncatepct the chance of it stopping after a random number of
+bits. All randomness comes from one random.Random, so a seed gives the same
+capture every time.
+
+captureEdges() keeps going until a given number of samples, and
+sampleChunks() turns edges into 0/1 sample bytes a chunk at a time, so
+captures far bigger than memory can be streamed.
+
+Example:
+	generator = Generator(samplerate, jitterpct=5, seed=1)
+	edges = generator.captureEdges(samplerate * 60)
+	packets = Engine(samplerate).decodeEdges(edges)
+
+'''
+
+DATA_BLOCK_LENGTH = 10
+LCD_TEXT_SEGMENT_LENGTH = 7
+
+def byteBits(values):
+	return [(value >> whichBit) & 1 for value in values for whichBit in range(8)]
+
+def checksum(values):
+	result = 0
+	for value in values:
+		result ^= value
+	return result
+
+def paddedBlock(block):
+	block = list(block)
+	if len(block) > DATA_BLOCK_LENGTH:
+		raise ValueError('A data block holds at most %d bytes' % DATA_BLOCK_LENGTH)
+	return block + [0x00] * (DATA_BLOCK_LENGTH - len(block))
+
+def headerMessage(remoteHeader=0x80, playerHeader=0x81):
+	return byteBits((remoteHeader, playerHeader))
+
+def playerMessage(block, remoteHeader=0x80, playerHeader=0x80):
+	block = paddedBlock(block)
+	return byteBits([remoteHeader, playerHeader] + block + [checksum(block)])
+
+def remoteMessage(block, remoteHeader=0x90, playerHeader=0x91, timingBit=0):
+	block = paddedBlock(block)
+	bits = byteBits((remoteHeader, playerHeader))
+	for value in block + [checksum(block)]:
+		bits.append(timingBit)
+		bits += byteBits((value,))
+	return bits
+
+def lcdTextMessages(text, remoteHeader=0x80, playerHeader=0x80):
+	'''
+	The 0xC8 messages for a whole string of Shift-JIS bytes, ending with the
+	0xFF end marker.
+	'''
+	text = bytes(text) + b'\xff'
+	text += b'\xff' * (-len(text) % LCD_TEXT_SEGMENT_LENGTH)
+	segments = [text[start:(start+LCD_TEXT_SEGMENT_LENGTH)] for start in range(0, len(text), LCD_TEXT_SEGMENT_LENGTH)]
+	messages = []
+	for (index, segment) in enumerate(segments):
+		final = 0x01 if index == len(segments) - 1 else 0x02
+		messages.append(playerMessage([0xC8, final, 0x00] + list(segment), remoteHeader, playerHeader))
+	return messages
+
+class Generator:
+	def __init__(self, samplerate, jitterpct=0, glitchpct=0, truncatepct=0, seed=None):
+		self.timing = Timing(samplerate)
+		self.jitter = jitterpct * 0.01
+		self.glitchChance = glitchpct * 0.01
+		self.truncateChance = truncatepct * 0.01
+		self.random = random.Random(seed)
+		#Start with the line going high, like a capture started on an idle bus
+		self.samplenum = 1
+		self.started = False
+
+	def pulse(self, cycles):
+		if self.jitter:
+			cycles = cycles * (1 + self.random.uniform(-self.jitter, self.jitter))
+		return max(1, int(cycles))
+
+	def messageEdges(self, bits, reset=False):
+		'''
+		Edges for one message, starting from the idle-high line and leaving it
+		idle high again for the gap after the message.
+		'''
+		timing = self.timing
+		pulses = [timing.resetCycles if reset else timing.presyncCycles, timing.presyncDelayCycles, timing.syncCycles]
+		if self.truncateChance and self.random.random() < self.truncateChance:
+			bits = bits[:self.random.randrange(1, len(bits))]
+		for bit in bits:
+			pulses.append(timing.bitDelayHighIdealCycles)
+			pulses.append(timing.shortMessageDataShortCycles if bit else timing.shortMessageDataLongCycles)
+
+		edges = []
+		if not self.started:
+			edges.append((self.samplenum, 1))
+			self.started = True
+		samplenum = self.samplenum + self.pulse(timing.presyncCycles)
+		level = 0
+		edges.append((samplenum, level))
+		for cycles in pulses:
+			samplenum += self.pulse(cycles)
+			level ^= 1
+			edges.append((samplenum, level))
+
+		if self.glitchChance and self.random.random() < self.glitchChance:
+			#Split one pulse with a glitch one sample long
+			which = self.random.randrange(1, len(edges) - 1)
+			(glitchStart, glitchLevel) = edges[which]
+			if edges[which+1][0] - glitchStart > 2:
+				edges[which+1:which+1] = [(glitchStart + 1, glitchLevel ^ 1), (glitchStart + 2, glitchLevel)]
+
+		self.samplenum = samplenum
+		return edges
+
+	def messagesEdges(self, messages, resetEvery=0):
+		for (index, bits) in enumerate(messages):
+			for edge in self.messageEdges(bits, resetEvery and (index % resetEvery) == 0):
+				yield edge
+
+	realisticMix = (
+		(60, 'poll'),
+		(10, 'volume'),
+		(10, 'track'),
+		(10, 'text'),
+		(10, 'remote'),
+	)
+
+	def realisticMessages(self):
+		'''
+		Endless mix of messages like those on a real bus: mostly header-only
+		polls, with volume and track updates, LCD text and Remote capability
+		blocks in between.
+		'''
+		kinds = [kind for (weight, kind) in self.realisticMix for count in range(weight)]
+		rng = self.random
+		while True:
+			kind = rng.choice(kinds)
+			if kind == 'poll':
+				yield headerMessage()
+			elif kind == 'volume':
+				yield playerMessage([0x40, rng.randrange(32)])
+			elif kind == 'track':
+				yield playerMessage([0xA0, 0x00, 0x00, 0x00, rng.randrange(1, 100)])
+			elif kind == 'text':
+				for bits in lcdTextMessages(b'Track %02d' % rng.randrange(1, 100)):
+					yield bits
+			else:
+				yield rng.choice((
+					remoteMessage([0xC0, 0x01, 0x00, 0x00, 0x00, 0x00, 0x00, 0x20, 0x60, 0x11]),
+					remoteMessage([0xC0, 0x02, 0x0C]),
+					remoteMessage([0x83, 0x01, 0x02, 0x03, 0x04]),
+				))
+
+	def captureEdges(self, sampleCount, messages=None, resetEvery=0):
+		'''
+		Edges for messages (the realistic mix if not given) until the capture
+		is sampleCount samples long.
+		'''
+		if messages is None:
+			messages = self.realisticMessages()
+		for edge in self.messagesEdges(messages, resetEvery):
+			if edge[0] >= sampleCount:
+				return
+			yield edge
+
+def sampleChunks(edges, sampleCount, chunkLength=1 << 20):
+	'''
+	The capture as bytes of 0/1 samples, chunkLength at a time. The line is
+	low until the first edge.
+	'''
+	chunk = bytearray()
+	samplenum = 0
+	level = 0
+	for (edgeSample, edgeLevel) in edges:
+		edgeSample = min(edgeSample, sampleCount)
+		while edgeSample > samplenum:
+			run = min(edgeSample - samplenum, chunkLength - len(chunk))
+			chunk += (b'\x01' if level else b'\x00') * run
+			samplenum += run
+			if len(chunk) == chunkLength:
+				yield bytes(chunk)
+				chunk = bytearray()
+		level = edgeLevel
+	while sampleCount > samplenum:
+		run = min(sampleCount - samplenum, chunkLength - len(chunk))
+		chunk += (b'\x01' if level else b'\x00') * run
+		samplenum += run
+		if len(chunk) == chunkLength:
+			yield bytes(chunk)
+			chunk = bytearray()
+	if chunk:
+		yield bytes(chunk)
+
+def captureSamples(edges, sampleCount):
+	return b''.join(sampleChunks(edges, sampleCount))
@@ -0,0 +1,232 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Sony Minidisc LCD Remote in-process decoder host
+
+import importlib
+import importlib.util
+import sys
+import types
+from array import array
+
+from .engine import findEdges, findEdgeArrays, np
+
+'''
+
+Runs the unmodified sigrok Decoders under plain Python, without
+libsigrokdecode, so that they can be profiled (cProfile, py-spy),
+benchmarked and batch-run like any other Python code.
+
+install() puts a stand-in sigrokdecode module in sys.modules with just the
+parts of the libsigrokdecode API these decoders use:
+	Decoder, with register(), put(), wait(), metadata(), samplenum,
+		matched and options
+	OUTPUT_ANN, OUTPUT_PYTHON, OUTPUT_BINARY, OUTPUT_META
+	SRD_CONF_SAMPLERATE
+wait() only knows edge conditions ('e', 'r', 'f') on channel 0 and 'skip',
+which is everything sony_md waits on. If the real module is already loaded
+(running inside libsigrokdecode), it is left alone and Host can't be used.
+
+Host runs one Decoder the way libsigrokdecode would:
+	options start from the Decoder's defaults, updated from the options
+		given
+	metadata() gets the samplerate, then start() is called
+	runEdges() or runSamples() call decode() on a decoder that wait()s,
+		until the capture runs out
+	decodePacket() is the decode() of a stacked decoder like sony_md_decode
+	stack() sends this Decoder's OUTPUT_PYTHON on to another Host's Decoder
+
+Edges are (samplenum, level) pairs as in Engine.decodeEdges(), and the line
+is low before the first one unless told otherwise. Samples are 0/1 values,
+in a NumPy array if NumPy is installed, and the line starts at the level of
+the first one.
+
+What the Decoder puts is kept in an OutputBuffer per output type, with the
+start and end samples in arrays and only the data in a list. Output types
+left out of collect are only counted. OUTPUT_META data is kept as (name,
+value), with the name from the meta the output was registered with.
+
+Example:
+	physical = Host('sony_md', samplerate, {'annotations': 'none'})
+	semantic = physical.stack(Host('sony_md_decode', samplerate))
+	physical.runEdges(edges)
+	for (startsample, endsample, data) in semantic.outputs[OUTPUT_ANN]:
+		...
+
+'''
+
+OUTPUT_ANN = 0
+OUTPUT_PYTHON = 1
+OUTPUT_BINARY = 2
+OUTPUT_META = 3
+OUTPUT_TYPES = (OUTPUT_ANN, OUTPUT_PYTHON, OUTPUT_BINARY, OUTPUT_META)
+
+SRD_CONF_SAMPLERATE = 10000
+
+#Level an edge condition waits for, None for either
+edgeConditionLevels = {'e': None, 'r': 1, 'f': 0}
+
+class Decoder:
+	def register(self, outputType, proto_id=None, meta=None):
+		if outputType != OUTPUT_META or meta is None:
+			return outputType
+		#Each OUTPUT_META output gets its own id, and its puts are kept as (name, value)
+		store = self.srdSinks[OUTPUT_META]
+		name = meta[1]
+		self.srdSinks.append(lambda startsample, endsample, data: store(startsample, endsample, (name, data)))
+		return len(self.srdSinks) - 1
+
+	def put(self, startsample, endsample, output, data):
+		self.srdSinks[output](startsample, endsample, data)
+
+	def wait(self, conditions=None):
+		return self.srdFeed.wait(self, conditions)
+
+	def metadata(self, key, value):
+		pass
+
+standIn = types.ModuleType('sigrokdecode', 'Stand-in for the libsigrokdecode module, see sony_md/host.py')
+standIn.Decoder = Decoder
+standIn.OUTPUT_ANN = OUTPUT_ANN
+standIn.OUTPUT_PYTHON = OUTPUT_PYTHON
+standIn.OUTPUT_BINARY = OUTPUT_BINARY
+standIn.OUTPUT_META = OUTPUT_META
+standIn.SRD_CONF_SAMPLERATE = SRD_CONF_SAMPLERATE
+
+def install():
+	if 'sigrokdecode' not in sys.modules:
+		if importlib.util.find_spec('sigrokdecode') is None:
+			sys.modules['sigrokdecode'] = standIn
+		else:
+			importlib.import_module('sigrokdecode')
+	return sys.modules['sigrokdecode']
+
+def loadDecoder(name):
+	if install() is not standIn:
+		raise RuntimeError('The real sigrokdecode module is loaded, decoders can only be run by libsigrokdecode')
+	return importlib.import_module(name + '.pd').Decoder
+
+def decoderOptions(decoderClass, options=None):
+	result = dict((option['id'], option['default']) for option in getattr(decoderClass, 'options', ()))
+	for (key, value) in (options or {}).items():
+		if key not in result:
+			raise ValueError('Decoder %s has no option %r' % (decoderClass.id, key))
+		result[key] = value
+	return result
+
+class OutputBuffer:
+	def __init__(self, keep=True):
+		self.keep = keep
+		self.clear()
+		self.append = self.store if keep else self.countOnly
+
+	def store(self, startsample, endsample, data):
+		self.startsamples.append(startsample)
+		self.endsamples.append(endsample)
+		self.data.append(data)
+		self.count += 1
+
+	def countOnly(self, startsample, endsample, data):
+		self.count += 1
+
+	def clear(self):
+		self.startsamples = array('q')
+		self.endsamples = array('q')
+		self.data = []
+		self.count = 0
+
+	def __len__(self):
+		return len(self.data)
+
+	def __iter__(self):
+		return zip(self.startsamples, self.endsamples, self.data)
+
+class EdgeFeed:
+	def __init__(self, edges, level=0, sampleCount=None):
+		self.edges = iter(edges)
+		self.level = level
+		self.sampleCount = sampleCount
+		#Edges read ahead, at most two, for an 'r' or 'f' after an edge the other way
+		self.pending = []
+
+	def peek(self, index):
+		pending = self.pending
+		while len(pending) <= index:
+			lastLevel = pending[-1][1] if pending else self.level
+			for edge in self.edges:
+				if edge[1] != lastLevel:
+					pending.append(edge)
+					break
+			else:
+				return None
+		return pending[index]
+
+	def conditionSample(self, decoder, condition):
+		if len(condition) != 1:
+			raise ValueError('Unsupported wait() condition %r' % (condition,))
+		((key, value),) = condition.items()
+		if key == 'skip':
+			return decoder.samplenum + value
+		if key != 0 or value not in edgeConditionLevels:
+			raise ValueError('Unsupported wait() condition %r' % (condition,))
+		edge = self.peek(0)
+		if edge is not None and edgeConditionLevels[value] not in (None, edge[1]):
+			edge = self.peek(1)
+		return None if edge is None else edge[0]
+
+	def wait(self, decoder, conditions):
+		samples = [self.conditionSample(decoder, condition) for condition in (conditions or ({'skip': 1},))]
+		found = [samplenum for samplenum in samples if samplenum is not None]
+		if not found:
+			raise EOFError
+		samplenum = min(found)
+		if self.sampleCount is not None and samplenum >= self.sampleCount:
+			raise EOFError
+		pending = self.pending
+		while pending and pending[0][0] <= samplenum:
+			self.level = pending.pop(0)[1]
+		decoder.samplenum = samplenum
+		decoder.matched = tuple(conditionSample == samplenum for conditionSample in samples)
+		return (self.level,)
+
+class Host:
+	def __init__(self, decoder, samplerate, options=None, collect=OUTPUT_TYPES):
+		decoderClass = loadDecoder(decoder) if isinstance(decoder, str) else decoder
+		self.outputs = dict((outputType, OutputBuffer(outputType in collect)) for outputType in OUTPUT_TYPES)
+
+		self.decoder = decoderClass()
+		self.decoder.srdSinks = [self.outputs[outputType].append for outputType in OUTPUT_TYPES]
+		self.decoder.srdFeed = None
+		self.decoder.samplenum = 0
+		self.decoder.matched = ()
+		self.decoder.options = decoderOptions(decoderClass, options)
+		self.decoder.metadata(SRD_CONF_SAMPLERATE, samplerate)
+		self.decoder.start()
+		self.decodePacket = self.decoder.decode
+
+	def stack(self, other):
+		store = self.outputs[OUTPUT_PYTHON].append
+		decode = other.decodePacket
+		def putPython(startsample, endsample, data):
+			store(startsample, endsample, data)
+			decode(startsample, endsample, data)
+		self.decoder.srdSinks[OUTPUT_PYTHON] = putPython
+		return other
+
+	def runEdges(self, edges, level=0, sampleCount=None):
+		self.decoder.srdFeed = EdgeFeed(edges, level, sampleCount)
+		try:
+			self.decoder.decode()
+		except EOFError:
+			pass
+		return self
+
+	def runSamples(self, samples):
+		if not len(samples):
+			return self
+		level = 1 if samples[0] else 0
+		if np is None:
+			edges = findEdges(samples)
+		else:
+			(edgeSamples, edgeLevels) = findEdgeArrays(samples)
+			edges = zip(edgeSamples.tolist(), edgeLevels.tolist())
+		return self.runEdges(edges, level, len(samples))
@@ -0,0 +1,207 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Sony Minidisc LCD Remote message index
+
+import argparse
+import bisect
+import struct
+import sys
+import zlib
+from array import array
+
+from .capture import Capture, captureEdges
+from .host import Host, OUTPUT_PYTHON
+
+'''
+
+An index of where every message in a capture is, kept next to the capture,
+so that any part of it can be decoded without decoding everything before.
+
+MessageIndex.build() decodes the capture once with sony_md, and records
+the start sample, end sample, bit count and CRC-32 of the payload bytes of
+every packet putPacketBitCount() puts out ('repeats' is always 'show'
+here). save() and load() keep it in a sidecar file, the capture's name
+with INDEX_SUFFIX added, 21 bytes a message.
+
+A packet's start sample is the falling edge of the reset or presync pulse
+sony_md found it with, and sony_md was in IDLE there. So decoding from the
+sample before, with the line still high, gives the same packets from there
+on as decoding from the start of the capture, the same as when a capture is
+split (see split.py). decodeWindow() decodes from the last message start
+at or before the window's start to the first one at or after its end, up
+to and including the rising edge at the end of that message's reset or
+presync pulse, as a message cut short before it is only given up on at
+that edge. It checks the first packet it decodes against the index.
+
+A stacked decoder like sony_md_decode starts without whatever it would
+have carried over from earlier in the capture, and with 'repeats'
+'collapse' a run of repeats over the start of the window starts again.
+
+Build the index for captures from the command line with:
+	python -m sony_md.index [--channel D0] capture.sr ...
+
+Example:
+	index = MessageIndex.load(indexPath('rig-07.sr'))
+	physical = decodeWindow(capture, index, 60 * capture.samplerate, 61 * capture.samplerate, 'D0')
+
+'''
+
+INDEX_SUFFIX = '.idx'
+INDEX_MAGIC = b'SMDINDX1'
+
+#magic, samplerate, sample count, marginpct, timeout, message count
+indexHeader = struct.Struct('<8sqqiiq')
+
+def indexPath(capturePath):
+	return capturePath + INDEX_SUFFIX
+
+def payloadHash(payload):
+	return zlib.crc32(payload.data)
+
+class MessageIndex:
+	def __init__(self, samplerate, sampleCount, marginpct, timeout):
+		self.samplerate = samplerate
+		self.sampleCount = sampleCount
+		self.marginpct = marginpct
+		self.timeout = timeout
+		self.starts = array('q')
+		self.ends = array('q')
+		self.bitCounts = array('B')
+		self.hashes = array('I')
+
+	def __len__(self):
+		return len(self.starts)
+
+	def options(self):
+		'''
+		The sony_md options that decide where the messages are.
+		'''
+		return {'marginpct': self.marginpct, 'timeout': 'yes' if self.timeout else 'no'}
+
+	@staticmethod
+	def build(capture, channel=0, options=None):
+		options = dict(options or {})
+		index = MessageIndex(capture.samplerate, capture.sampleCount, options.get('marginpct', 20),
+			options.get('timeout', 'no') == 'yes')
+		physicalOptions = dict(index.options(), annotations='none', packetformat='compact')
+		physical = Host('sony_md', capture.samplerate, physicalOptions, collect=())
+
+		appendStart = index.starts.append
+		appendEnd = index.ends.append
+		appendBitCount = index.bitCounts.append
+		appendHash = index.hashes.append
+		def putPython(startsample, endsample, data):
+			appendStart(startsample)
+			appendEnd(endsample)
+			appendBitCount(data[3].bitCount)
+			appendHash(payloadHash(data[3]))
+		physical.decoder.srdSinks[OUTPUT_PYTHON] = putPython
+
+		(level, edges) = captureEdges(capture.levelChunks(channel))
+		physical.runEdges(edges, level, capture.sampleCount)
+		return index
+
+	def save(self, path):
+		columns = [self.starts, self.ends, self.bitCounts, self.hashes]
+		if sys.byteorder == 'big':
+			columns = [column[:] for column in columns]
+			for column in columns:
+				column.byteswap()
+		with open(path, 'wb') as indexFile:
+			indexFile.write(indexHeader.pack(INDEX_MAGIC, self.samplerate, self.sampleCount,
+				self.marginpct, self.timeout, len(self)))
+			for column in columns:
+				column.tofile(indexFile)
+
+	@staticmethod
+	def load(path):
+		with open(path, 'rb') as indexFile:
+			header = indexFile.read(indexHeader.size)
+			if len(header) != indexHeader.size or header[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+				raise ValueError('%s is not a sony_md message index' % path)
+			(magic, samplerate, sampleCount, marginpct, timeout, messageCount) = indexHeader.unpack(header)
+			index = MessageIndex(samplerate, sampleCount, marginpct, bool(timeout))
+			try:
+				for column in (index.starts, index.ends, index.bitCounts, index.hashes):
+					column.fromfile(indexFile, messageCount)
+			except EOFError:
+				raise ValueError('%s is cut short' % path)
+		if sys.byteorder == 'big':
+			for column in (index.starts, index.ends, index.bitCounts, index.hashes):
+				column.byteswap()
+		return index
+
+	def boundaryBefore(self, samplenum):
+		'''
+		The start of the last message starting at or before samplenum, or 0.
+		'''
+		position = bisect.bisect_right(self.starts, samplenum)
+		return self.starts[position - 1] if position else 0
+
+	def boundaryAfter(self, samplenum):
+		'''
+		The start of the first message starting at or after samplenum, or the
+		end of the capture.
+		'''
+		position = bisect.bisect_left(self.starts, samplenum)
+		return self.starts[position] if position < len(self.starts) else self.sampleCount
+
+def decodeWindow(capture, index, start, end, channel=0, options=None, stack=None):
+	'''
+	Decodes the messages from start to end with sony_md, and with stack as
+	well if it is given a Host, returning the sony_md Host. options must
+	place the messages the same way as when the index was built.
+	'''
+	if (capture.samplerate, capture.sampleCount) != (index.samplerate, index.sampleCount):
+		raise ValueError('The index is for a different capture than %s' % capture.path)
+	options = dict(options or {})
+	for (key, value) in index.options().items():
+		if options.setdefault(key, value) != value:
+			raise ValueError("The index was built with sony_md's %r option set to %r" % (key, value))
+
+	resume = index.boundaryBefore(start)
+	stop = index.boundaryAfter(end)
+	physical = Host('sony_md', capture.samplerate, options)
+	if stack is not None:
+		physical.stack(stack)
+	check = physical.decoder.srdSinks[OUTPUT_PYTHON]
+	def putPython(startsample, endsample, data):
+		#The first packet has to be the message the index says starts there
+		whichMessage = bisect.bisect_left(index.starts, startsample)
+		if whichMessage == len(index) or index.starts[whichMessage] != startsample \
+				or index.hashes[whichMessage] != payloadHash(data[3]):
+			raise ValueError('%s has changed since it was indexed' % capture.path)
+		physical.decoder.srdSinks[OUTPUT_PYTHON] = check
+		check(startsample, endsample, data)
+	physical.decoder.srdSinks[OUTPUT_PYTHON] = putPython
+
+	#From here on stop is the sample after the last one decoded
+	if stop < capture.sampleCount:
+		(level, edges) = captureEdges(capture.levelChunks(channel, stop), stop)
+		stop = next(edges, (capture.sampleCount - 1, 1))[0] + 1
+
+	first = max(resume - 1, 0)
+	(level, edges) = captureEdges(capture.levelChunks(channel, first, stop), first)
+	physical.runEdges(edges, level, stop)
+	return physical
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(prog='python -m sony_md.index',
+		description='Build the message index of Sony MD remote captures.')
+	parser.add_argument('captures', nargs='+', help='capture files')
+	parser.add_argument('--channel', default='0', help='data line channel number or name (default 0)')
+	parser.add_argument('--samplerate', type=int, help='samplerate of raw captures, overrides the .sr one')
+	parser.add_argument('--unitsize', type=int, default=1, help='bytes per sample of raw captures')
+	parser.add_argument('--marginpct', type=int, default=20, help="sony_md's error margin %%")
+	parser.add_argument('--timeout', choices=('yes', 'no'), default='no', help="sony_md's timeout option")
+	options = parser.parse_args(argv)
+
+	for path in options.captures:
+		capture = Capture.open(path, options.samplerate, options.unitsize)
+		index = MessageIndex.build(capture, options.channel, {'marginpct': options.marginpct, 'timeout': options.timeout})
+		index.save(indexPath(path))
+		print('%s: %d messages' % (indexPath(path), len(index)))
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,132 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Sony Minidisc LCD Remote state machine instrumentation
+
+from time import perf_counter_ns
+from .machine import STATE_NAMES
+
+'''
+
+Counters for where the edges and the time go in the state machine, for
+working out why a capture decodes slowly or loses packets.
+
+Instrumentation.attach() wraps the machine's handlers on the machine itself,
+so a machine without it runs exactly the same code as before:
+	dispatch is replaced by a copy whose handlers count the edges per state
+		and the state transitions they make, and with timeHandlers set, the
+		perf_counter_ns() time spent in each state's handlers
+	the error hooks count how often each fires in each state
+	putPacketBitCount counts packets by bit count (16, 104, 115, or less
+		for messages cut short by a timeout)
+	handleTimeout counts its transition back to IDLE
+detach() takes all of that off again.
+
+Hooks are wrapped as they are at the time of attach(), so the Decoder
+attaches after selectAnnotations().
+
+Counters:
+	edges[state]
+	transitions[fromState][toState]
+	errors[(hookName, state)]
+	packets[bitCount]
+	nanoseconds[state], or None without timeHandlers
+
+summaryLines() gives them as text, asDict() with the state names as keys
+for JSON.
+
+'''
+
+ERROR_HOOKS = ('putError', 'putErrorUnexpectedDataBit', 'putStateError', 'putExpectedBitError',
+	'putPlayerCededBusWithoutRemoteAsking', 'putTimeout')
+WRAPPED = ('dispatch', 'putPacketBitCount', 'handleTimeout') + ERROR_HOOKS
+
+def detach(machine):
+	for name in WRAPPED:
+		machine.__dict__.pop(name, None)
+
+class Instrumentation:
+	def __init__(self, timeHandlers=False):
+		stateCount = len(STATE_NAMES)
+		self.edges = [0] * stateCount
+		self.transitions = [[0] * stateCount for state in range(stateCount)]
+		self.errors = {}
+		self.packets = {}
+		self.nanoseconds = [0] * stateCount if timeHandlers else None
+
+	def countedHandler(self, state, handler):
+		edges = self.edges
+		transitions = self.transitions[state]
+		def counted(machine):
+			edges[state] += 1
+			handler(machine)
+			transitions[machine.state] += 1
+		return counted
+
+	def timedHandler(self, state, handler):
+		counted = self.countedHandler(state, handler)
+		nanoseconds = self.nanoseconds
+		def timed(machine):
+			start = perf_counter_ns()
+			counted(machine)
+			nanoseconds[state] += perf_counter_ns() - start
+		return timed
+
+	def countedError(self, machine, name, hook):
+		errors = self.errors
+		def counted(*args):
+			key = (name, machine.state)
+			errors[key] = errors.get(key, 0) + 1
+			hook(*args)
+		return counted
+
+	def attach(self, machine):
+		wrap = self.countedHandler if self.nanoseconds is None else self.timedHandler
+		machine.dispatch = [[wrap(state, handler) for handler in handlers]
+			for (state, handlers) in enumerate(type(machine).dispatch)]
+
+		for name in ERROR_HOOKS:
+			setattr(machine, name, self.countedError(machine, name, getattr(machine, name)))
+
+		packets = self.packets
+		putPacketBitCount = machine.putPacketBitCount
+		def countedPacket(cleanEnd=True):
+			packets[machine.dataBitCount] = packets.get(machine.dataBitCount, 0) + 1
+			putPacketBitCount(cleanEnd)
+		machine.putPacketBitCount = countedPacket
+
+		transitions = self.transitions
+		handleTimeout = machine.handleTimeout
+		def countedTimeout(samplenum):
+			fromState = machine.state
+			handleTimeout(samplenum)
+			transitions[fromState][machine.state] += 1
+		machine.handleTimeout = countedTimeout
+
+	def summaryLines(self):
+		lines = ['Edges: ' + ', '.join('%s %d' % (STATE_NAMES[state], count)
+			for (state, count) in enumerate(self.edges))]
+		lines.append('Transitions: ' + ', '.join('%s->%s %d' % (STATE_NAMES[fromState], STATE_NAMES[toState], count)
+			for (fromState, counts) in enumerate(self.transitions)
+			for (toState, count) in enumerate(counts) if count and toState != fromState))
+		lines.append('Errors: ' + (', '.join('%s in %s %d' % (name[3:], STATE_NAMES[state], count)
+			for ((name, state), count) in sorted(self.errors.items())) or 'none'))
+		lines.append('Packets: ' + (', '.join('%d bits %d' % (bitCount, count)
+			for (bitCount, count) in sorted(self.packets.items())) or 'none'))
+		if self.nanoseconds is not None:
+			lines.append('Handler time: ' + ', '.join('%s %.3fms' % (STATE_NAMES[state], nanoseconds / 1000000)
+				for (state, nanoseconds) in enumerate(self.nanoseconds)))
+		return lines
+
+	def asDict(self):
+		result = {
+			'edges': dict(zip(STATE_NAMES, self.edges)),
+			'transitions': dict(('%s->%s' % (STATE_NAMES[fromState], STATE_NAMES[toState]), count)
+				for (fromState, counts) in enumerate(self.transitions)
+				for (toState, count) in enumerate(counts) if count),
+			'errors': dict(('%s/%s' % (name, STATE_NAMES[state]), count)
+				for ((name, state), count) in self.errors.items()),
+			'packets': dict((str(bitCount), count) for (bitCount, count) in self.packets.items()),
+		}
+		if self.nanoseconds is not None:
+			result['nanoseconds'] = dict(zip(STATE_NAMES, self.nanoseconds))
+		return result
@@ -0,0 +1,459 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Sony Minidisc LCD Remote physical layer state machine
+
+from bisect import bisect_right
+from .timing import *
+from .packet import *
+
+'''
+
+The RESET/PRESYNC/SYNC/DATA-BIT state machine, without any dependency on
+libsigrokdecode.
+
+Feed it one edge at a time with handleEdge(), or with handlePulse() if the
+pulse class of the edge has already been worked out by a PulseClassifier
+for the same Timing. Everything it wants to tell
+the outside world goes through the put*() hooks below, which do nothing
+here. The sigrok Decoder overrides them to emit annotations, the offline
+Engine overrides putPacket() to collect packets.
+
+Each edge costs one lookup in the classifier's table and one in a (state,
+pulse class) dispatch table, done inline in handleEdge(). The things that
+happen at particular bit numbers (who has data, whether the bus is ceded,
+and so how long the message will be) are all in bitActions.
+
+The signalling and bit hooks are only called with annotateSignalling set,
+so a machine that doesn't annotate them doesn't pay for the calls.
+
+Completed packets are handed to putPacket() in the OUTPUT_PYTHON format
+documented in pd.py.
+
+If the line stays quiet for longer than the message timeout in the middle
+of a message, handleTimeout() hands whatever bits have arrived so far to
+putPacket() with cleanEnd False, and goes back to IDLE. The sigrok Decoder
+calls it from a skip condition, the offline Engine calls checkTimeout()
+before each edge.
+
+With collapseRepeats, a run of clean messages with the same payload as the
+one before them goes to putRepeats() as a single packet once the run ends,
+instead of one putPacket() each. putRepeatedMessage() is called as each of
+them ends, so the Decoder can drop what it had annotated for it.
+
+'''
+
+STATE_IDLE = 0
+STATE_PRESYNC = 1
+STATE_SYNC = 2
+STATE_DATA_BIT_HIGH = 3
+STATE_DATA_BIT_LOW = 4
+
+STATE_NAMES = ('IDLE', 'PRESYNC', 'SYNC', 'DATA-BIT-HIGH', 'DATA-BIT-LOW')
+
+def compileStateRules(stateRules):
+	dispatch = []
+	for state in range(len(STATE_NAMES)):
+		rules, default = stateRules[state]
+		handlers = []
+		for pulseClass in range(PULSE_CLASS_COUNT):
+			handler = default
+			for (ruleClasses, ruleHandler) in rules:
+				if pulseClass & ruleClasses:
+					handler = ruleHandler
+					break
+			handlers.append(handler)
+		dispatch.append(handlers)
+	return dispatch
+
+class StateMachine:
+	def putError(self):
+		pass
+
+	def putErrorUnexpectedDataBit(self):
+		pass
+
+	def putStateError(self):
+		pass
+
+	def putResetPulse(self):
+		pass
+
+	def putPresyncPulse(self):
+		pass
+
+	def putPresyncDelayPulse(self):
+		pass
+
+	def putSyncPulse(self):
+		pass
+
+	def putRemoteHasData(self):
+		pass
+
+	def putRemoteHasNoData(self):
+		pass
+
+	def putPlayerHasData(self):
+		pass
+
+	def putPlayerHasNoData(self):
+		pass
+
+	def putPlayerCedesBusToRemote(self):
+		pass
+
+	def putPlayerDoesNotCedeBusToRemote(self):
+		pass
+
+	def putPlayerCededBusWithoutRemoteAsking(self):
+		pass
+
+	def putZeroBit(self):
+		pass
+
+	def putOneBit(self):
+		pass
+
+	def putEndOfPacket(self):
+		pass
+
+	def putPacket(self, packet):
+		pass
+
+	def putExpectedBitError(self):
+		pass
+
+	def putTimeout(self, samplenum):
+		pass
+
+	def putRepeatedMessage(self):
+		pass
+
+	def putRepeats(self, startsample, endsample, packet):
+		pass
+
+	#Signalling and bit hooks are only called with this set
+	annotateSignalling = False
+	#List form of <bitData> unless configure() asks for compactPackets
+	compactPackets = False
+
+	def configure(self, samplerate, marginpct=20, compactPackets=False, collapseRepeats=False):
+		self.timing = Timing(samplerate, marginpct)
+		self.classifier = PulseClassifier(self.timing)
+		self.pulseTable = self.classifier.table
+		self.pulseTableLength = self.classifier.tableLength
+
+		self.compactPackets = compactPackets
+		self.messageBitData = self.newBitList()
+		self.collapseRepeats = collapseRepeats
+
+	def newBitList(self):
+		return BitBuffer() if self.compactPackets else []
+
+	def putPacketBitCount(self, cleanEnd=True):
+		if self.compactPackets:
+			bitData = CompactBitData(self.packetstartsample, self.packetendsample, self.dataBitCount, self.messageBitData)
+		else:
+			bitData = [self.packetstartsample, self.packetendsample, self.dataBitCount, self.messageBitData]
+		packet = [self.messageSyncData, bitData, cleanEnd, Payload(self.dataBitCount, self.payloadValue)]
+		if self.collapseRepeats:
+			self.collapsePacket(packet)
+		else:
+			self.putPacket(packet)
+		self.messageSyncData = []
+		self.messageBitData = self.newBitList()
+
+	def collapsePacket(self, packet):
+		#A clean message with the same payload as the last one, and no errors on
+		#the way to it, only extends the current run. Anything else ends the run
+		#and goes out as it is.
+		if packet[2] and not self.messageErrors and packet[3] == self.lastPayload:
+			if self.repeatCount == 0:
+				self.repeatStartSample = self.packetstartsample
+			self.repeatCount += 1
+			self.repeatEndSample = self.packetendsample
+			self.repeatPacket = packet
+			self.putRepeatedMessage()
+		else:
+			self.flushRepeats()
+			self.lastPayload = packet[3] if packet[2] else None
+			self.putPacket(packet)
+		self.messageErrors = False
+
+	def flushRepeats(self):
+		if self.repeatCount > 0:
+			self.putRepeats(self.repeatStartSample, self.repeatEndSample, self.repeatPacket + [self.repeatCount])
+			self.repeatCount = 0
+			self.repeatPacket = None
+
+	def returnToIdle(self):
+		self.state = STATE_IDLE
+		self.playerHasData = False
+		self.remoteHasData = False
+		self.playerCedesBus = False
+		self.dataBitCount = 0
+		self.expectedBitCount = 16
+		self.payloadValue = 0
+		self.messageSyncData = []
+		#Nothing else has seen the bits of a message given up on, so keep the buffer
+		if self.messageBitData:
+			self.messageBitData.clear()
+
+	def reset(self):
+		self.state = STATE_IDLE
+		self.lastedgesample = 0
+		self.lastedgestate = False
+		self.newedgesample = 0
+		self.newedgestate = False
+
+		self.playerHasData = False
+		self.remoteHasData = False
+		self.playerCedesBus = False
+
+		self.pulselength = 0
+
+		self.dataBitCount = 0
+		self.expectedBitCount = 16
+		self.payloadValue = 0
+
+		self.bytestartsample = 0
+		self.byteendsample = 0
+		self.bytevalue = 0
+
+		self.packetstartsample = 0
+		self.packetendsample = 0
+
+		self.messageSyncData = []
+		self.messageBitData = self.newBitList()
+
+		self.lastPayload = None
+		self.messageErrors = False
+		self.repeatCount = 0
+		self.repeatStartSample = 0
+		self.repeatEndSample = 0
+		self.repeatPacket = None
+
+	def __init__(self):
+		self.reset()
+
+	def handleEdge(self, newedgestate, newedgesample):
+		self.lastedgesample = lastedgesample = self.newedgesample
+		self.lastedgestate = self.newedgestate
+		self.newedgestate = newedgestate
+		self.newedgesample = newedgesample
+
+		self.pulselength = pulselength = newedgesample - lastedgesample
+
+		if pulselength < self.pulseTableLength:
+			pulseClass = self.pulseTable[pulselength]
+		else:
+			classifier = self.classifier
+			pulseClass = classifier.classes[bisect_right(classifier.boundaries, pulselength)]
+		self.dispatch[self.state][pulseClass](self)
+
+	def handlePulse(self, newedgestate, newedgesample, pulseClass):
+		self.lastedgesample = self.newedgesample
+		self.lastedgestate = self.newedgestate
+		self.newedgestate = newedgestate
+		self.newedgesample = newedgesample
+
+		self.pulselength = self.newedgesample - self.lastedgesample
+
+		self.dispatch[self.state][pulseClass](self)
+
+	def checkTimeout(self, samplenum):
+		if self.state != STATE_IDLE and samplenum - self.newedgesample > self.timing.extendedMessageTimeoutCycles:
+			self.handleTimeout(self.newedgesample + self.timing.extendedMessageTimeoutCycles)
+
+	def handleTimeout(self, samplenum):
+		#No edge for too long in the middle of a message, give up on it
+		self.putTimeout(samplenum)
+		self.messageErrors = True
+		if self.dataBitCount > 0:
+			self.packetendsample = self.databitend
+			self.putPacketBitCount(False)
+		self.returnToIdle()
+
+	def isRisingEdge(self):
+		return self.lastedgestate == False and self.newedgestate == True
+
+	def handleIdleReset(self):
+		#now high, was low
+		if self.isRisingEdge():
+			self.packetstartsample = self.lastedgesample
+			if self.annotateSignalling:
+				self.putResetPulse()
+			self.state = STATE_PRESYNC
+
+	def handleIdlePresync(self):
+		#now high, was low
+		if self.isRisingEdge():
+			self.packetstartsample = self.lastedgesample
+			self.messageSyncData.append([self.lastedgesample, self.newedgesample])
+			if self.annotateSignalling:
+				self.putPresyncPulse()
+			self.state = STATE_PRESYNC
+
+	def handleIdleDataBit(self):
+		if self.isRisingEdge():
+			self.putErrorUnexpectedDataBit()
+			self.messageErrors = True
+
+	def handleIdleOther(self):
+		pass
+
+	def handlePresyncDelay(self):
+		#now low, was high
+		self.messageSyncData.append([self.lastedgesample, self.newedgesample])
+		if self.annotateSignalling:
+			self.putPresyncDelayPulse()
+		self.state = STATE_SYNC
+
+	def handleSync(self):
+		#now high, was low
+		self.messageSyncData.append([self.lastedgesample, self.newedgesample])
+		if self.annotateSignalling:
+			self.putSyncPulse()
+		self.bytevalue = 0
+		self.bytestartsample = self.newedgesample
+		self.state = STATE_DATA_BIT_HIGH
+
+	def handleDataBitHigh(self):
+		#now low, was high
+		self.databitstart = self.lastedgesample
+
+		self.state = STATE_DATA_BIT_LOW
+
+	def handleOneBit(self):
+		#now high, was low
+		self.databitend = databitend = self.newedgesample
+		dataBitCount = self.dataBitCount
+		self.payloadValue |= 1 << dataBitCount
+		if self.compactPackets:
+			bits = self.messageBitData
+			bits.starts.append(self.databitstart)
+			bits.middles.append(self.lastedgesample)
+			bits.ends.append(databitend)
+			bits.values.append(1)
+		else:
+			self.messageBitData.append([self.databitstart, self.lastedgesample, databitend, 1])
+		self.dataBitCount = dataBitCount = dataBitCount + 1
+		if self.annotateSignalling:
+			self.putOneBit()
+
+		actions = self.bitActions.get(dataBitCount)
+		if actions is not None:
+			actions[1](self)
+
+		if dataBitCount == self.expectedBitCount:
+			self.endOfMessage()
+		else:
+			self.state = STATE_DATA_BIT_HIGH
+
+	def handleZeroBit(self):
+		#now high, was low
+		self.databitend = databitend = self.newedgesample
+		if self.compactPackets:
+			bits = self.messageBitData
+			bits.starts.append(self.databitstart)
+			bits.middles.append(self.lastedgesample)
+			bits.ends.append(databitend)
+			bits.values.append(0)
+		else:
+			self.messageBitData.append([self.databitstart, self.lastedgesample, databitend, 0])
+		self.dataBitCount = dataBitCount = self.dataBitCount + 1
+		if self.annotateSignalling:
+			self.putZeroBit()
+
+		actions = self.bitActions.get(dataBitCount)
+		if actions is not None:
+			actions[0](self)
+
+		if dataBitCount == self.expectedBitCount:
+			self.endOfMessage()
+		else:
+			self.state = STATE_DATA_BIT_HIGH
+
+	def handleUnexpectedPulse(self):
+		self.putError()
+		self.messageErrors = True
+		self.returnToIdle()
+
+	def endOfMessage(self):
+		self.packetendsample = self.newedgesample
+		if self.annotateSignalling:
+			self.putEndOfPacket()
+		self.putPacketBitCount()
+		self.returnToIdle()
+
+	def onRemoteHasData(self):
+		if self.annotateSignalling:
+			self.putRemoteHasData()
+		self.remoteHasData = True
+
+	def onRemoteHasNoData(self):
+		if self.annotateSignalling:
+			self.putRemoteHasNoData()
+
+	def onPlayerHasData(self):
+		if self.annotateSignalling:
+			self.putPlayerHasData()
+		self.playerHasData = True
+
+	def onPlayerHasNoData(self):
+		if self.annotateSignalling:
+			self.putPlayerHasNoData()
+
+	def onPlayerCedesBus(self):
+		if self.annotateSignalling:
+			self.putPlayerCedesBusToRemote()
+		self.playerCedesBus = True
+		self.selectMessageLength()
+
+	def onPlayerKeepsBus(self):
+		if self.annotateSignalling:
+			self.putPlayerDoesNotCedeBusToRemote()
+		self.selectMessageLength()
+
+	def selectMessageLength(self):
+		if self.playerCedesBus:
+			if not self.remoteHasData:
+				self.putPlayerCededBusWithoutRemoteAsking()
+				self.messageErrors = True
+			self.expectedBitCount = 115
+		elif self.playerHasData:
+			self.expectedBitCount = 104
+
+	#Bit number (counting from 1) -> (action if the bit is 0, action if the bit is 1)
+	bitActions = {
+		5: (onRemoteHasNoData, onRemoteHasData),
+		9: (onPlayerHasData, onPlayerHasNoData),
+		13: (onPlayerKeepsBus, onPlayerCedesBus),
+	}
+
+	#Per state, the first rule whose pulse classes match the pulse picks the handler,
+	#the last entry is used when none of them do.
+	stateRules = {
+		STATE_IDLE: (
+			((PULSE_RESET, handleIdleReset), (PULSE_PRESYNC, handleIdlePresync), (PULSE_SHORT_BIT | PULSE_LONG_BIT, handleIdleDataBit)),
+			handleIdleOther,
+		),
+		STATE_PRESYNC: (
+			((PULSE_PRESYNC_DELAY, handlePresyncDelay),),
+			handleUnexpectedPulse,
+		),
+		STATE_SYNC: (
+			((PULSE_SYNC, handleSync),),
+			handleUnexpectedPulse,
+		),
+		STATE_DATA_BIT_HIGH: (
+			(),
+			handleDataBitHigh,
+		),
+		STATE_DATA_BIT_LOW: (
+			((PULSE_SHORT_BIT, handleOneBit), (PULSE_LONG_BIT, handleZeroBit)),
+			handleUnexpectedPulse,
+		),
+	}
+
+	dispatch = compileStateRules(stateRules)
@@ -0,0 +1,151 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Sony Minidisc LCD Remote packet helpers
+
+from array import array
+
+'''
+
+Pieces of the OUTPUT_PYTHON packets, see the format description in pd.py.
+
+Compact form of <bitData>: instead of one four-element list per bit, the
+bit start/middle/end sample numbers of a message go into three array('Q')
+buffers, and the bit values into one bytearray. The state machine appends
+to them directly, so a message costs a handful of allocations instead of
+one list per bit, and a 16-bit message doesn't carry space for 115.
+
+Indexing works the same as the list form, so bitData[3][whichBit][0..3]
+and bitData[0..2] all give the same values. bitData[3][whichBit] is a
+BitRow, a view that reads the buffers at that bit without copying them.
+
+Pickled, a BitBuffer holds only the bits it has and a Payload only its bit
+count and value, so that packets are cheap to send to another process.
+
+<payload>: the message bits packed into an int and into bytes, see Payload.
+
+'''
+
+MAXIMUM_BIT_COUNT = 115
+
+class BitBuffer:
+	__slots__ = ('starts', 'middles', 'ends', 'values')
+
+	def __init__(self, starts=b'', middles=b'', ends=b'', values=b''):
+		self.starts = array('Q', starts)
+		self.middles = array('Q', middles)
+		self.ends = array('Q', ends)
+		self.values = bytearray(values)
+
+	def append(self, start, middle, end, value):
+		self.starts.append(start)
+		self.middles.append(middle)
+		self.ends.append(end)
+		self.values.append(value)
+
+	def clear(self):
+		del self.starts[:]
+		del self.middles[:]
+		del self.ends[:]
+		del self.values[:]
+
+	def __len__(self):
+		return len(self.values)
+
+	def __getitem__(self, index):
+		count = len(self.values)
+		if index < 0:
+			index += count
+		if not 0 <= index < count:
+			raise IndexError('bit index out of range')
+		return BitRow(self, index)
+
+	def __reduce__(self):
+		return (BitBuffer, (self.starts.tobytes(), self.middles.tobytes(), self.ends.tobytes(), bytes(self.values)))
+
+class BitRow:
+	__slots__ = ('bits', 'index')
+
+	def __init__(self, bits, index):
+		self.bits = bits
+		self.index = index
+
+	def __len__(self):
+		return 4
+
+	def __getitem__(self, column):
+		if column < 0:
+			column += 4
+		if column == 0:
+			return self.bits.starts[self.index]
+		if column == 1:
+			return self.bits.middles[self.index]
+		if column == 2:
+			return self.bits.ends[self.index]
+		if column == 3:
+			return self.bits.values[self.index]
+		raise IndexError('bit field index out of range')
+
+class CompactBitData:
+	__slots__ = ('startsample', 'endsample', 'bitCount', 'bits')
+
+	def __init__(self, startsample, endsample, bitCount, bits):
+		self.startsample = startsample
+		self.endsample = endsample
+		self.bitCount = bitCount
+		self.bits = bits
+
+	def __len__(self):
+		return 4
+
+	def __getitem__(self, index):
+		if index == 0:
+			return self.startsample
+		if index == 1:
+			return self.endsample
+		if index == 2:
+			return self.bitCount
+		if index == 3:
+			return self.bits
+		raise IndexError('bitData index out of range')
+
+REMOTE_DATA_START_BIT = 16
+REMOTE_DATA_SLOTS = 11
+
+class Payload:
+	'''
+	The bits of a message packed into an int, bit N of the message (counting
+	from 0, in the order received) being bit N of value.
+
+	Every field on the bus is sent LSB first, so data holds the message as
+	bytes in the order sent, and any field is (value >> firstBit) & mask.
+
+	In a 115-bit message the Remote's data block is sent as eleven 9-bit
+	slots after the two header bytes, each one a Player timing bit followed
+	by a Remote byte. remoteData holds those eleven Remote bytes, for other
+	messages it is empty.
+	'''
+
+	__slots__ = ('bitCount', 'value', 'data', 'remoteData')
+
+	def __init__(self, bitCount, value):
+		self.bitCount = bitCount
+		self.value = value
+		self.data = value.to_bytes((bitCount + 7) // 8, 'little')
+		if bitCount == MAXIMUM_BIT_COUNT:
+			self.remoteData = bytes([(value >> (REMOTE_DATA_START_BIT + 1 + (9*slot))) & 0xFF for slot in range(REMOTE_DATA_SLOTS)])
+		else:
+			self.remoteData = b''
+
+	def __eq__(self, other):
+		if not isinstance(other, Payload):
+			return NotImplemented
+		return self.bitCount == other.bitCount and self.value == other.value
+
+	def __reduce__(self):
+		return (Payload, (self.bitCount, self.value))
+
+	def __hash__(self):
+		return hash((self.bitCount, self.value))
+
+	def __repr__(self):
+		return 'Payload(%d, 0x%X)' % (self.bitCount, self.value)
@@ -2,14 +2,18 @@
 
 # Sony Minidisc LCD Remote protocol decoder
 
+from bisect import bisect_right
 import sigrokdecode as srd
+from .machine import StateMachine, STATE_NAMES, STATE_IDLE
+from .timing import SamplerateError
+from .instrument import Instrumentation, detach
 
 '''
 
 OUTPUT_PYTHON format:
 
 Packet:
-	[<syncData>, <bitData>, <cleanEnd>]
+	[<syncData>, <bitData>, <cleanEnd>, <payload>]
 
 	<syncData> is a tuple structure that looks like the following:
 		[
@@ -43,6 +47,16 @@ Packet:
 	<cleanEnd> is a boolean that says whether this message ended "normally" or with an error
 		True means it ended normally
 		False means it ended with an error
+		With the 'timeout' option on, a message that stops partway through is
+		flushed with cleanEnd False and however many bits it got before the
+		line went quiet.
+
+	<payload> is a Payload (see packet.py) with the same bits already packed:
+		payload.bitCount is the number of data bits, same as bitData[2]
+		payload.value is an int, bit N of it is the value of bitData[3][N]
+		payload.data is the message as LSB-first bytes, in the order sent
+		payload.remoteData is the eleven Remote bytes of a 115-bit message,
+			without the Player timing bits, and empty otherwise
 
 	---------
 
@@ -72,12 +86,36 @@ Packet:
 		See if there are leftover bits after the full bytes:
 			(bitData[2] - (int(bitData[2] / 8)*8))
 
-'''
+		Any LSB-first field of numBits bits starting at startBit:
+			(payload.value >> startBit) & ((1 << numBits) - 1)
+
+	---------
+
+	Compact format:
+		With the 'packetformat' option set to 'compact', <bitData> is a
+		CompactBitData and bitData[3] is a BitBuffer (see packet.py) instead
+		of lists. The sample numbers and bit values live in arrays, and all
+		of the indexing above still works the same way. Each
+		bitData[3][whichBit] is a BitRow view rather than a list.
+
+	---------
+
+	Repeats:
+		With the 'repeats' option set to 'collapse', a message with the same
+		payload as the message before it isn't put out on its own. A run of
+		them is put out as one packet, over the samples from the start of the
+		first to the end of the last, once a different message (or an error)
+		ends the run:
+			[<syncData>, <bitData>, <cleanEnd>, <payload>, <repeatCount>]
 
-class SamplerateError(Exception):
-    pass
+		The first four are those of the last message in the run, and
+		repeatCount is how many messages the run covers. None of the bit and
+		signalling annotations of the repeated messages are shown, only one
+		'repeated' message annotation over the run.
 
-class Decoder(srd.Decoder):
+'''
+
+class Decoder(srd.Decoder, StateMachine):
 	api_version = 3
 	id = 'sony_md'
 	name = 'Sony MD Remote'
@@ -92,6 +130,16 @@ class Decoder(srd.Decoder):
 	)
 	options = (
 		{'id': 'marginpct', 'desc': 'Error margin %', 'default': 20},
+		{'id': 'annotations', 'desc': 'Annotations', 'default': 'full',
+			'values': ('full', 'messages', 'none')},
+		{'id': 'timeout', 'desc': 'Flush incomplete messages after 5ms', 'default': 'no',
+			'values': ('yes', 'no')},
+		{'id': 'packetformat', 'desc': 'Python output packet format', 'default': 'lists',
+			'values': ('lists', 'compact')},
+		{'id': 'repeats', 'desc': 'Repeated messages', 'default': 'show',
+			'values': ('show', 'collapse')},
+		{'id': 'instrumentation', 'desc': 'State machine counters', 'default': 'off',
+			'values': ('off', 'counts', 'timing')},
 	)
 	annotations = (
 		('signals', 'Signals'),
@@ -102,6 +150,7 @@ class Decoder(srd.Decoder):
 		('byte', 'Byte value'),
 		('bit-count', 'Message bit count'),
 		('bit-count-error', 'Expected multiple of 8 bits'),
+		('instrumentation', 'Instrumentation'),
 	)
 	annotation_rows = (
 		('signalling', 'Signalling', (0,)),
@@ -109,8 +158,27 @@ class Decoder(srd.Decoder):
 		('byte-values', 'Byte Values', (5,)),
 		('Messages', 'Messages', (6,)),
 		('errors', 'Errors', (3, 4, 7,)),
+		('instrumentation', 'Instrumentation', (8,)),
 	)
 
+	#At the 'messages' and 'none' levels the state machine doesn't call the
+	#signalling and bit hooks at all. The error hooks are only called on errors,
+	#'none' swaps them for putNothing, which the instrumentation can still count.
+	errorAnnotations = ('putError', 'putErrorUnexpectedDataBit', 'putStateError',
+		'putPlayerCededBusWithoutRemoteAsking', 'putExpectedBitError', 'putTimeout')
+
+	def putNothing(self, *args):
+		pass
+
+	def selectAnnotations(self, level):
+		self.annotateSignalling = level == 'full'
+		self.annotateMessages = level != 'none'
+		for hook in self.errorAnnotations:
+			if level == 'none':
+				setattr(self, hook, self.putNothing)
+			else:
+				self.__dict__.pop(hook, None)
+
 	def putError(self):
 		self.put(self.lastedgesample, self.newedgesample, self.out_ann,
 				[3, ['Error']])
@@ -121,24 +189,21 @@ class Decoder(srd.Decoder):
 
 	def putStateError(self):
 		self.put(self.lastedgesample, self.newedgesample, self.out_ann,
-				[4, ['State error: %s' % (self.state)]])
+				[4, ['State error: %s' % (STATE_NAMES[self.state])]])
 
 	def putResetPulse(self):
 		self.put(self.lastedgesample, self.newedgesample, self.out_ann,
 				[0, ['Reset+Presync pulse', 'Reset', 'R']])
 
 	def putPresyncPulse(self):
-		self.messageSyncData.append([self.lastedgesample, self.newedgesample])
 		self.put(self.lastedgesample, self.newedgesample, self.out_ann,
 				[0, ['Presync pulse', 'Presync', 'PS']])
 	
 	def putPresyncDelayPulse(self):
-		self.messageSyncData.append([self.lastedgesample, self.newedgesample])
 		self.put(self.lastedgesample, self.newedgesample, self.out_ann,
 				[0, ['Presync delay', 'PSD']])
 	
 	def putSyncPulse(self):
-		self.messageSyncData.append([self.lastedgesample, self.newedgesample])
 		self.put(self.lastedgesample, self.newedgesample, self.out_ann,
 				[0, ['Sync pulse', 'S']])
 	
@@ -171,14 +236,10 @@ class Decoder(srd.Decoder):
 				[7, ['Player ceded bus to Remote without Remote asking!']])
 	
 	def putZeroBit(self):
-		self.messageBitData.append([self.databitstart, self.lastedgesample, self.databitend, 0])
-		self.dataBitCount = self.dataBitCount + 1
 		self.put(self.databitstart, self.databitend, self.out_ann,
 				[1, ['0']])
 	
 	def putOneBit(self):
-		self.messageBitData.append([self.databitstart, self.lastedgesample, self.databitend, 1])
-		self.dataBitCount = self.dataBitCount + 1
 		self.put(self.databitstart, self.databitend, self.out_ann,
 				[2, ['1']])
 	
@@ -186,58 +247,49 @@ class Decoder(srd.Decoder):
 		self.put(self.newedgesample, self.newedgesample, self.out_ann,
 				[0, ['Message End', 'St']])
 
-	def putPacketBitCount(self):
-		self.pythonOutputBitData.append([self.packetstartsample, self.packetendsample, self.dataBitCount, self.messageBitData])
+	def putPacket(self, packet):
 		self.put(self.packetstartsample, self.packetendsample, self.out_python,
-				[self.messageSyncData, [self.packetstartsample, self.packetendsample, self.dataBitCount, self.messageBitData], True])
-		self.messageSyncData = []
-		self.messageBitData = []
-		self.pythonOutputBitData = []
-		self.put(self.packetstartsample, self.packetendsample, self.out_ann,
-				[6, ['Message, %d bits' % self.dataBitCount ]])
+				packet)
+		if self.annotateMessages:
+			self.put(self.packetstartsample, self.packetendsample, self.out_ann,
+					[6, ['Message, %d bits' % self.dataBitCount ]])
+		if self.collapseRepeats:
+			self.flushAnnotations()
 	
 	def putExpectedBitError(self):
 		self.put(self.newedgesample-1, self.newedgesample, self.out_ann,
 				[7, ['Unexpected end of message']])
 
-	def returnToIdle(self):
-		self.state = 'IDLE'
-		self.playerHasData = False
-		self.remoteHasData = False
-		self.playerCedesBus = False
-		self.dataBitCount = 0
-		self.expectedBitCount = 16
-		self.messageSyncData = []
-		self.messageBitData = []
-		self.pythonOutputBitData = []
-
-	def reset(self):
-		self.state = 'IDLE'
-		self.lastedgesample = 0
-		self.lastedgestate = False
-		self.newedgesample = 0
-		self.newedgestate = False
-
-		self.playerHasData = False
-		self.remoteHasData = False
-		self.playerCedesBus = False
-
-		self.pulselength = 0
-
-		self.dataBitCount = 0
-		self.expectedBitCount = 16
-
-		self.bytestartsample = 0
-		self.byteendsample = 0
-		self.bytevalue = 0
-
-		self.packetstartsample = 0
-		self.packetendsample = 0
-
-		self.messageSyncData = []
-		self.messageBitData = []
-		self.pythonOutputBitData = []
-	
+	def putTimeout(self, samplenum):
+		self.put(self.newedgesample, samplenum, self.out_ann,
+				[3, ['Message timed out', 'Timeout']])
+
+	#With 'repeats' set to 'collapse', annotations are held back until the
+	#message they belong to ends, and dropped if it turns out to be a repeat.
+	def putBuffered(self, startsample, endsample, output, data):
+		if output == self.out_ann:
+			self.annotationBuffer.append((startsample, endsample, data))
+		else:
+			srd.Decoder.put(self, startsample, endsample, output, data)
+
+	def flushAnnotations(self):
+		for (startsample, endsample, data) in self.annotationBuffer:
+			srd.Decoder.put(self, startsample, endsample, self.out_ann, data)
+		self.annotationBuffer = []
+
+	def putRepeatedMessage(self):
+		self.annotationBuffer = []
+
+	def putRepeats(self, startsample, endsample, packet):
+		srd.Decoder.put(self, startsample, endsample, self.out_python, packet)
+		if self.annotateMessages:
+			srd.Decoder.put(self, startsample, endsample, self.out_ann,
+					[6, ['Message, %d bits, repeated %d times' % (packet[1][2], packet[4]), 'Repeated x%d' % packet[4], 'x%d' % packet[4]]])
+
+	def putInstrumentation(self):
+		for line in self.instrumentation.summaryLines():
+			srd.Decoder.put(self, 0, self.newedgesample, self.out_ann, [8, [line]])
+
 	def __init__(self):
 		self.reset()
 	
@@ -247,35 +299,19 @@ class Decoder(srd.Decoder):
 		
 		self.marginpct = self.options['marginpct']
 		
-		self.resetCycles = int(self.samplerate * (40/1000))
-		self.resetMinimumCycles = int(self.resetCycles * (1-(self.marginpct*0.01)))
-		self.resetMaximumCycles = int(self.resetCycles * (1+(self.marginpct*0.01)))
-
-		self.presyncCycles = int(self.samplerate * (1100/1000000))
-		self.presyncMinimumCycles = int(self.presyncCycles * (1-(self.marginpct*0.01)))
-		self.presyncMaximumCycles = int(self.presyncCycles * (1+(self.marginpct*0.01)))
-
-		self.presyncDelayCycles = int(self.samplerate * (950/1000000))
-		self.presyncDelayMinimumCycles = int(self.samplerate * (800/1000000))
-		self.presyncDelayMaximumCycles = int(self.samplerate * (1500/1000000))
-
-		self.syncCycles = int(self.samplerate * (220/1000000))
-		self.syncMinimumCycles = int(self.samplerate * (20/1000000))
-		self.syncMaximumCycles = int(self.syncCycles * (1+(self.marginpct*0.01)))
-
-		self.bitDelayHighIdealCycles = int(self.samplerate * (32.5/1000000))
-		self.bitDelayHighCyclesMinimum = int(self.bitDelayHighIdealCycles * (1-(self.marginpct*0.01)))
-
-		self.shortMessageDataLongCycles = int(self.samplerate * (220/1000000))
-		self.shortMessageDataLongCyclesMinimum = int(self.samplerate * (101/1000000))
-		self.shortMessageDataLongCyclesMaximum = int(self.samplerate * (280/1000000))
-
-		self.shortMessageDataShortCycles = int(self.samplerate * (17/1000000))
-		self.shortMessageDataShortCyclesMinimum = int(self.samplerate * (10/1000000))
-		self.shortMessageDataShortCyclesMaximum = int(self.samplerate * (100/1000000))
-
-		self.extendedMessageTimeoutCycles = int(self.samplerate *(5/1000))
-		#self.extendedMessageTimeoutCyclesSkip = self.extendedMessageTimeoutCycles + 50
+		self.configure(self.samplerate, self.marginpct, self.options['packetformat'] == 'compact',
+			self.options['repeats'] == 'collapse')
+		detach(self)
+		self.selectAnnotations(self.options['annotations'])
+		self.instrumentation = None
+		if self.options['instrumentation'] != 'off':
+			self.instrumentation = Instrumentation(self.options['instrumentation'] == 'timing')
+			self.instrumentation.attach(self)
+		self.timeout = self.options['timeout'] == 'yes'
+		self.annotationBuffer = []
+		self.__dict__.pop('put', None)
+		if self.collapseRepeats:
+			self.put = self.putBuffered
 
 	
 	def metadata(self, key, value):
@@ -286,122 +322,41 @@ class Decoder(srd.Decoder):
 		if not self.samplerate:
 			raise SamplerateError('Cannot decode without samplerate.')
 
-		while True:
-			self.lastedgesample = self.newedgesample
-			self.lastedgestate = self.newedgestate
-			
-			#if self.state == 'IDLE':
-			(self.newedgestate,) = self.wait([{0: 'e'}])
-			#else:
-			#(self.newedgestate,) = self.wait([{0: 'e'}, {'skip': self.extendedMessageTimeoutCyclesSkip}])
-
-			self.newedgesample = self.samplenum
-
-			self.pulselength = self.newedgesample - self.lastedgesample
-			
-			if self.state == 'IDLE':
-				#low or high
-				if self.lastedgestate == False and self.newedgestate == True:
-					#now high, was low
-					if self.pulselength in range(self.resetMinimumCycles, self.resetMaximumCycles):
-						self.packetstartsample = self.lastedgesample
-						self.putResetPulse()
-						self.state = 'PRESYNC'
-					elif self.pulselength in range(self.presyncMinimumCycles, self.presyncMaximumCycles):
-						self.packetstartsample = self.lastedgesample
-						self.putPresyncPulse()
-						self.state = 'PRESYNC'
-					elif self.pulselength in range(self.shortMessageDataShortCyclesMinimum, self.shortMessageDataShortCyclesMaximum):
-						self.putErrorUnexpectedDataBit()
-					elif self.pulselength in range(self.shortMessageDataLongCyclesMinimum, self.shortMessageDataLongCyclesMaximum):
-						self.putErrorUnexpectedDataBit()
-			elif self.state == 'PRESYNC':
-				#now low, was high
-				if self.pulselength in range(self.presyncDelayMinimumCycles, self.presyncDelayMaximumCycles):
-					self.putPresyncDelayPulse()
-					self.state = 'SYNC'
-				else:
-					self.putError()
-					self.returnToIdle()
-			elif self.state == 'SYNC':
-				#now high, was low
-				if self.pulselength in range(self.syncMinimumCycles, self.syncMaximumCycles):
-					self.putSyncPulse()
-					self.bytevalue = 0
-					self.bytestartsample = self.newedgesample
-					self.state = 'DATA-BIT-HIGH'
-				else:
-					self.putError()
-					self.returnToIdle()
-			elif self.state == 'DATA-BIT-HIGH':
-				#now low, was high
-				self.databitstart = self.lastedgesample
-
-				self.state = 'DATA-BIT-LOW'
-			elif self.state == 'DATA-BIT-LOW':
-				#now high, was low
-				if self.pulselength in range(self.shortMessageDataShortCyclesMinimum, self.shortMessageDataShortCyclesMaximum):
-					#1
-					self.databitend = self.newedgesample
-					self.putOneBit()
-
-					if self.dataBitCount == 5:
-						self.putRemoteHasData()
-						self.remoteHasData = True
-
-					if self.dataBitCount == 9:
-						self.putPlayerHasNoData()
-					
-					if self.dataBitCount == 13:
-						self.putPlayerCedesBusToRemote()
-						self.playerCedesBus = True
-						if self.playerCedesBus:
-							if not self.remoteHasData:
-								self.putPlayerCededBusWithoutRemoteAsking()
-							self.expectedBitCount = 115
-						elif self.playerHasData and not self.playerCedesBus:
-							self.expectedBitCount = 104
-
-					
-					if self.dataBitCount == self.expectedBitCount:
-						self.packetendsample = self.newedgesample
-						self.putPacketBitCount()
-						self.putEndOfPacket()
-						self.returnToIdle()
-					else:
-						self.state = 'DATA-BIT-HIGH'
-				elif self.pulselength in range(self.shortMessageDataLongCyclesMinimum, self.shortMessageDataLongCyclesMaximum):
-					#0
-					self.databitend = self.newedgesample
-					self.putZeroBit()
-
-					if self.dataBitCount == 5:
-						self.putRemoteHasNoData()
-
-					if self.dataBitCount == 9:
-						self.putPlayerHasData()
-						self.playerHasData = True
-
-					if self.dataBitCount == 13:
-						self.putPlayerDoesNotCedeBusToRemote()
-						if self.playerCedesBus:
-							if not self.remoteHasData:
-								self.putPlayerCededBusWithoutRemoteAsking()
-							self.expectedBitCount = 115
-						elif self.playerHasData and not self.playerCedesBus:
-							self.expectedBitCount = 104
-					
-					if self.dataBitCount == self.expectedBitCount:
-						self.packetendsample = self.newedgesample
-						self.putPacketBitCount()
-						self.putEndOfPacket()
-						self.returnToIdle()
-					else:
-						self.state = 'DATA-BIT-HIGH'
+		#handleEdge(), inline, with what it looks up on every edge held in locals
+		pulseTable = self.pulseTable
+		pulseTableLength = self.pulseTableLength
+		classes = self.classifier.classes
+		boundaries = self.classifier.boundaries
+		dispatch = self.dispatch
+		edge = [{0: 'e'}]
+		edgeOrTimeout = [{0: 'e'}, {'skip': self.timing.extendedMessageTimeoutCycles}]
+		try:
+			while True:
+				if self.state == STATE_IDLE or not self.timeout:
+					(newedgestate,) = self.wait(edge)
 				else:
-					self.putError()
-					self.returnToIdle()
-			else:
-				self.putStateError()
-				self.returnToIdle()
+					(newedgestate,) = self.wait(edgeOrTimeout)
+					if not self.matched[0]:
+						self.handleTimeout(self.samplenum)
+						continue
+
+				self.lastedgesample = lastedgesample = self.newedgesample
+				self.lastedgestate = self.newedgestate
+				self.newedgestate = newedgestate
+				self.newedgesample = newedgesample = self.samplenum
 
+				self.pulselength = pulselength = newedgesample - lastedgesample
+
+				if pulselength < pulseTableLength:
+					dispatch[self.state][pulseTable[pulselength]](self)
+				else:
+					dispatch[self.state][classes[bisect_right(boundaries, pulselength)]](self)
+		except EOFError:
+			#End of the capture, don't lose a run of repeats that hasn't ended yet, and
+			#sum up the instrumentation
+			if self.collapseRepeats:
+				self.flushRepeats()
+				self.flushAnnotations()
+			if self.instrumentation is not None:
+				self.putInstrumentation()
+			raise
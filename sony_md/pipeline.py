@@ -0,0 +1,103 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Sony Minidisc LCD Remote pipelined decoding
+
+import multiprocessing
+import queue
+
+from .capture import Capture, captureEdges
+from .host import Host, OUTPUT_PYTHON
+
+'''
+
+Runs the two decoder layers at the same time instead of one after the
+other: sony_md in a process of its own, reading the capture and decoding
+the edges, and the stacked Host (usually sony_md_decode) in this one. The
+whole capture then takes about as long as the slower of the two layers.
+
+sony_md's OUTPUT_PYTHON packets go over a multiprocessing queue in batches
+of batchPackets, so that each hand-off carries enough packets to be worth
+it. The queue holds at most queueBatches batches. Once it is full, sony_md
+waits for this side to catch up, so a slow stacked decoder never leaves a
+whole capture's packets waiting in memory.
+
+The packet format is 'compact' unless the options say otherwise, as
+BitBuffers and Payloads pickle to just the bits they hold (see packet.py),
+a few arrays rather than a list per bit, which pickle and unpickle about
+three times as fast.
+Any of sony_md's options work, 'repeats'=collapse included, as sony_md
+decodes the capture in one go.
+
+Example:
+	semantic = Host('sony_md_decode', capture.samplerate)
+	packetCount = runPipeline(capture, 'D0', {'annotations': 'none'}, semantic)
+
+'''
+
+BATCH_PACKETS = 256
+QUEUE_BATCHES = 16
+
+pipelineDefaults = {'packetformat': 'compact'}
+
+def physicalProcess(packetQueue, path, samplerate, unitsize, channel, options, batchPackets):
+	#Puts lists of packets, then the packet count, or the exception that stopped it
+	try:
+		capture = Capture.open(path, samplerate, unitsize)
+		physical = Host('sony_md', capture.samplerate, options, collect=())
+		batch = []
+		packetCount = 0
+
+		def putPython(startsample, endsample, data):
+			nonlocal batch, packetCount
+			batch.append((startsample, endsample, data))
+			if len(batch) >= batchPackets:
+				#The queue pickles the batch later, so it can't be reused
+				packetQueue.put(batch)
+				packetCount += len(batch)
+				batch = []
+		physical.decoder.srdSinks[OUTPUT_PYTHON] = putPython
+
+		(level, edges) = captureEdges(capture.levelChunks(channel))
+		physical.runEdges(edges, level, capture.sampleCount)
+		if batch:
+			packetQueue.put(batch)
+			packetCount += len(batch)
+		packetQueue.put(packetCount)
+	except Exception as e:
+		packetQueue.put(e)
+
+def receive(packetQueue, process):
+	while True:
+		try:
+			return packetQueue.get(timeout=1)
+		except queue.Empty:
+			if not process.is_alive() and packetQueue.empty():
+				raise RuntimeError('sony_md process exited with code %s' % process.exitcode)
+
+def runPipeline(capture, channel, options, semantic, batchPackets=BATCH_PACKETS, queueBatches=QUEUE_BATCHES):
+	'''
+	Decodes capture with sony_md in another process, and each of its
+	packets with semantic, a Host, in this one. Returns the packet count.
+	'''
+	packetQueue = multiprocessing.Queue(queueBatches)
+	process = multiprocessing.Process(target=physicalProcess, args=(packetQueue, capture.path,
+		capture.samplerate, capture.unitsize, channel, dict(pipelineDefaults, **options), batchPackets))
+	process.start()
+	finished = False
+	try:
+		decode = semantic.decodePacket
+		while True:
+			batch = receive(packetQueue, process)
+			if isinstance(batch, Exception):
+				raise batch
+			if not isinstance(batch, list):
+				finished = True
+				return batch
+			for (startsample, endsample, data) in batch:
+				decode(startsample, endsample, data)
+	finally:
+		if not finished:
+			#sony_md may be stuck on a full queue that nothing will empty now
+			process.terminate()
+		process.join()
+		packetQueue.close()
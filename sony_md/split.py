@@ -0,0 +1,85 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Sony Minidisc LCD Remote capture splitting
+
+from .capture import Capture, captureEdges, quietGaps
+from .host import Host, OUTPUT_PYTHON
+from .machine import STATE_IDLE
+from .timing import Timing
+
+'''
+
+Cuts one long capture into segments that sony_md can decode separately, so
+that they can be decoded in parallel.
+
+Every message starts with a 40ms reset or a 1.1ms presync low pulse, which
+sony_md recognises in IDLE, and the line idles high between messages. So a
+capture is cut at the falling edge that starts a low stretch at least as
+long as the shortest reset, once the segment before it is at least
+segmentSamples long. Each segment starts one sample before that edge, with
+the line still high, so the decoder sees the edge and the reset just as it
+would have in the middle of the capture.
+
+That gives the same packets as decoding the whole capture only if sony_md
+was in IDLE when the edge came, which it is unless the message before it
+was cut short. decodeSegments() checks what state each segment ended in, and
+joins a segment that didn't end in IDLE with the one after it and decodes
+them again, until every segment fits onto the one before it.
+
+sony_md's 'repeats' option can't be 'collapse', as runs of repeats would be
+broken at every cut.
+
+sony_md_decode isn't split. Besides tempCarryoverShiftJISByte, its
+PlayerState carries the LCD text being put together and the values the
+changes are worked out from from one message to the next. It is several
+times faster than sony_md, so it runs once over the stitched packets, and
+everything it carries over is exactly what it would have been without the
+split.
+
+'''
+
+def splitPoints(gaps, segmentSamples):
+	nextSplit = segmentSamples
+	for gap in gaps:
+		if gap >= nextSplit:
+			yield gap
+			nextSplit = gap + segmentSamples
+
+def captureSegments(capture, channel, options, segmentSamples):
+	if options.get('repeats') == 'collapse':
+		raise ValueError("A capture can't be split with sony_md's 'repeats' option set to 'collapse'")
+	minimumSamples = Timing(capture.samplerate, options.get('marginpct', 20)).resetMinimumCycles
+	gaps = quietGaps(capture.levelChunks(channel), minimumSamples)
+	bounds = [0] + [gap - 1 for gap in splitPoints(gaps, segmentSamples)] + [capture.sampleCount]
+	return list(zip(bounds, bounds[1:]))
+
+def decodeSegment(job):
+	(path, samplerate, unitsize, channel, options, (start, end)) = job
+	capture = Capture.open(path, samplerate, unitsize)
+	host = Host('sony_md', capture.samplerate, options, collect=(OUTPUT_PYTHON,))
+	(level, edges) = captureEdges(capture.levelChunks(channel, start, end), start)
+	host.runEdges(edges, level, end)
+	return (list(host.outputs[OUTPUT_PYTHON]), host.decoder.state == STATE_IDLE)
+
+def decodeSegments(mapper, capture, channel, options, segments):
+	'''
+	sony_md's packets for the whole capture, the segments decoded with
+	mapper, which is map() or an Executor's map().
+	'''
+	results = {}
+	while True:
+		jobs = [segment for segment in segments if segment not in results]
+		decoded = mapper(decodeSegment, [(capture.path, capture.samplerate, capture.unitsize, channel, options, segment)
+			for segment in jobs])
+		for (segment, result) in zip(jobs, decoded):
+			results[segment] = result
+
+		joined = []
+		for segment in segments:
+			if joined and joined[-1] in results and not results[joined[-1]][1]:
+				joined[-1] = (joined[-1][0], segment[1])
+			else:
+				joined.append(segment)
+		if joined == segments:
+			return [packet for segment in segments for packet in results[segment][0]]
+		segments = joined
@@ -0,0 +1,126 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Sony Minidisc LCD Remote pulse timing
+
+from bisect import bisect_right
+
+'''
+
+Pulse length windows, in samples, for a given samplerate and error margin.
+
+These are shared by the sigrok Decoder and the offline Engine, so both
+accept and reject exactly the same pulses.
+
+All windows are half-open, the same as range(minimum, maximum).
+
+'''
+
+class SamplerateError(Exception):
+    pass
+
+class Timing:
+	def __init__(self, samplerate, marginpct=20):
+		if not samplerate:
+			raise SamplerateError('Cannot decode without samplerate.')
+
+		self.samplerate = samplerate
+		self.marginpct = marginpct
+
+		self.resetCycles = int(self.samplerate * (40/1000))
+		self.resetMinimumCycles = int(self.resetCycles * (1-(self.marginpct*0.01)))
+		self.resetMaximumCycles = int(self.resetCycles * (1+(self.marginpct*0.01)))
+
+		self.presyncCycles = int(self.samplerate * (1100/1000000))
+		self.presyncMinimumCycles = int(self.presyncCycles * (1-(self.marginpct*0.01)))
+		self.presyncMaximumCycles = int(self.presyncCycles * (1+(self.marginpct*0.01)))
+
+		self.presyncDelayCycles = int(self.samplerate * (950/1000000))
+		self.presyncDelayMinimumCycles = int(self.samplerate * (800/1000000))
+		self.presyncDelayMaximumCycles = int(self.samplerate * (1500/1000000))
+
+		self.syncCycles = int(self.samplerate * (220/1000000))
+		self.syncMinimumCycles = int(self.samplerate * (20/1000000))
+		self.syncMaximumCycles = int(self.syncCycles * (1+(self.marginpct*0.01)))
+
+		self.bitDelayHighIdealCycles = int(self.samplerate * (32.5/1000000))
+		self.bitDelayHighCyclesMinimum = int(self.bitDelayHighIdealCycles * (1-(self.marginpct*0.01)))
+
+		self.shortMessageDataLongCycles = int(self.samplerate * (220/1000000))
+		self.shortMessageDataLongCyclesMinimum = int(self.samplerate * (101/1000000))
+		self.shortMessageDataLongCyclesMaximum = int(self.samplerate * (280/1000000))
+
+		self.shortMessageDataShortCycles = int(self.samplerate * (17/1000000))
+		self.shortMessageDataShortCyclesMinimum = int(self.samplerate * (10/1000000))
+		self.shortMessageDataShortCyclesMaximum = int(self.samplerate * (100/1000000))
+
+		self.extendedMessageTimeoutCycles = int(self.samplerate *(5/1000))
+
+PULSE_RESET = 0x01
+PULSE_PRESYNC = 0x02
+PULSE_PRESYNC_DELAY = 0x04
+PULSE_SYNC = 0x08
+PULSE_SHORT_BIT = 0x10
+PULSE_LONG_BIT = 0x20
+
+PULSE_CLASS_COUNT = 0x40
+
+class PulseClassifier:
+	'''
+	Sorts pulse lengths into pulse classes.
+
+	A pulse class is a bitmask of the PULSE_* windows the length falls into.
+	Some windows overlap (a sync pulse is also a valid bit, for example), so
+	one pulse can be in several at once.
+
+	The window edges are kept as one sorted list of boundaries. Between two
+	neighbouring boundaries the class can't change, so classifying a pulse
+	is a search for its slot in that list followed by a lookup of the slot's
+	class.
+
+	Pulses shorter than tableLength are also looked up directly in a table
+	indexed by pulse length. The table runs to the last boundary (the end of
+	the reset window), but stops at maximumTableLength, so at high sample
+	rates it still covers the bit, sync and presync pulses that make up
+	nearly every edge while the rare reset pulses fall back to the search.
+
+	Build one per Timing and share it, classify() keeps no state.
+	'''
+
+	maximumTableLength = 1 << 16
+
+	def __init__(self, timing):
+		windows = (
+			(PULSE_RESET, timing.resetMinimumCycles, timing.resetMaximumCycles),
+			(PULSE_PRESYNC, timing.presyncMinimumCycles, timing.presyncMaximumCycles),
+			(PULSE_PRESYNC_DELAY, timing.presyncDelayMinimumCycles, timing.presyncDelayMaximumCycles),
+			(PULSE_SYNC, timing.syncMinimumCycles, timing.syncMaximumCycles),
+			(PULSE_SHORT_BIT, timing.shortMessageDataShortCyclesMinimum, timing.shortMessageDataShortCyclesMaximum),
+			(PULSE_LONG_BIT, timing.shortMessageDataLongCyclesMinimum, timing.shortMessageDataLongCyclesMaximum),
+		)
+
+		self.boundaries = sorted(set([minimum for (pulseClass, minimum, maximum) in windows] + [maximum for (pulseClass, minimum, maximum) in windows]))
+
+		#Slot 0 is everything below the first boundary, slot n starts at boundaries[n-1]
+		self.classes = []
+		for start in [None] + self.boundaries:
+			slotClass = 0
+			if start is not None:
+				for (pulseClass, minimum, maximum) in windows:
+					if minimum <= start < maximum:
+						slotClass |= pulseClass
+			self.classes.append(slotClass)
+
+		self.tableLength = min(self.boundaries[-1], self.maximumTableLength)
+		table = bytearray(self.tableLength)
+		for slot in range(1, len(self.boundaries)):
+			start = self.boundaries[slot-1]
+			if start >= self.tableLength:
+				break
+			end = min(self.boundaries[slot], self.tableLength)
+			table[start:end] = bytes([self.classes[slot]]) * (end - start)
+		self.table = bytes(table)
+
+	def classify(self, pulselength):
+		if pulselength < self.tableLength:
+			return self.table[pulselength]
+		return self.classes[bisect_right(self.boundaries, pulselength)]
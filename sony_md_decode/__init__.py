@@ -5,6 +5,13 @@ Decoder for the Sony MD LCD Remote protocol
 
 TODO: Everything
 
+Only pd needs libsigrokdecode, the modules it is built from can be used on
+machines without it.
+
 '''
 
-from .pd import *
\ No newline at end of file
+try:
+	from .pd import *
+except ImportError as e:
+	if e.name != 'sigrokdecode':
+		raise
\ No newline at end of file
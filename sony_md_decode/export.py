@@ -0,0 +1,124 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Sony MD LCD Remote message columns
+
+from array import array
+
+from .layout import blockLayout
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+'''
+
+One row per message in columns, for analysing whole captures with NumPy
+instead of going through the annotations.
+
+With a Decoder's messageColumns set to a MessageColumns, decode() adds a row
+for every message it is given:
+	startsample, endsample: of the message's bits
+	bitCount
+	remoteHeader, playerHeader: bytes 0 and 1 of the message
+	payload: the message as sent, PAYLOAD_BYTES bytes, zero padded
+	checksumValid: 1 or 0, -1 for a message with no data block or an
+		incomplete message
+	packetType: the first packet type byte of the data block, -1 without one
+	repeatCount: 1, or for a run of repeats collapsed by sony_md the number
+		of messages it stands for, the rest of the row being the message
+		repeated
+
+Each column is an array.array, so collecting needs nothing extra and costs
+a few bytes a message. save() writes them out, as a .npz with NumPy or as
+an Arrow IPC file (.arrow or .feather) with pyarrow, and arrays() gives
+them as NumPy arrays, payload as a (rows, PAYLOAD_BYTES) uint8 array.
+
+Example:
+	semantic = Host('sony_md_decode', samplerate)
+	semantic.decoder.messageColumns = MessageColumns()
+	...
+	semantic.decoder.messageColumns.save('rig-07.npz')
+	columns = numpy.load('rig-07.npz')
+	invalid = columns['packetType'][columns['checksumValid'] == 0]
+
+'''
+
+PAYLOAD_BYTES = 15
+
+#(name, array typecode, NumPy dtype) of each column but payload
+COLUMNS = (
+	('startsample', 'q', 'int64'),
+	('endsample', 'q', 'int64'),
+	('bitCount', 'B', 'uint8'),
+	('remoteHeader', 'B', 'uint8'),
+	('playerHeader', 'B', 'uint8'),
+	('checksumValid', 'b', 'int8'),
+	('packetType', 'h', 'int16'),
+	('repeatCount', 'q', 'int64'),
+)
+
+class MessageColumns:
+	def __init__(self):
+		self.columns = dict((name, array(typecode)) for (name, typecode, dtype) in COLUMNS)
+		self.payload = bytearray()
+		self.appendStartSample = self.columns['startsample'].append
+		self.appendEndSample = self.columns['endsample'].append
+		self.appendBitCount = self.columns['bitCount'].append
+		self.appendRemoteHeader = self.columns['remoteHeader'].append
+		self.appendPlayerHeader = self.columns['playerHeader'].append
+		self.appendChecksumValid = self.columns['checksumValid'].append
+		self.appendPacketType = self.columns['packetType'].append
+		self.appendRepeatCount = self.columns['repeatCount'].append
+
+	def __len__(self):
+		return len(self.columns['startsample'])
+
+	def append(self, startsample, endsample, bitCount, messageValue, checksumValid, repeatCount=1):
+		'''
+		checksumValid is None for an incomplete message.
+		'''
+		self.appendStartSample(startsample)
+		self.appendEndSample(endsample)
+		self.appendBitCount(bitCount)
+		self.appendRemoteHeader(messageValue & 0xFF)
+		self.appendPlayerHeader((messageValue >> 8) & 0xFF)
+		self.payload += messageValue.to_bytes(PAYLOAD_BYTES, 'little')
+
+		layout = blockLayout(messageValue) if checksumValid is not None else None
+		if layout is None:
+			self.appendChecksumValid(-1)
+			self.appendPacketType(-1)
+		else:
+			self.appendChecksumValid(1 if checksumValid else 0)
+			self.appendPacketType((messageValue >> layout.firstBits[0]) & 0xFF)
+		self.appendRepeatCount(repeatCount)
+
+	def arrays(self):
+		if np is None:
+			raise RuntimeError('MessageColumns.arrays() needs NumPy')
+		arrays = dict((name, np.frombuffer(self.columns[name], dtype=dtype)) for (name, typecode, dtype) in COLUMNS)
+		arrays['payload'] = np.frombuffer(self.payload, dtype='uint8').reshape(-1, PAYLOAD_BYTES)
+		return arrays
+
+	def save(self, path):
+		if path.endswith('.arrow') or path.endswith('.feather'):
+			self.saveArrow(path)
+		elif np is None:
+			raise RuntimeError('Saving %s needs NumPy, or a .arrow path and pyarrow' % path)
+		else:
+			np.savez(path, **self.arrays())
+
+	def saveArrow(self, path):
+		try:
+			import pyarrow.ipc
+		except ImportError:
+			raise RuntimeError('Saving %s needs pyarrow' % path)
+		fields = dict((name, pyarrow.array(self.columns[name], type=getattr(pyarrow, dtype)()))
+			for (name, typecode, dtype) in COLUMNS)
+		fields['payload'] = pyarrow.array([bytes(self.payload[offset:offset + PAYLOAD_BYTES])
+			for offset in range(0, len(self.payload), PAYLOAD_BYTES)], type=pyarrow.binary(PAYLOAD_BYTES))
+		table = pyarrow.table(fields)
+		with pyarrow.OSFile(path, 'wb') as arrowFile:
+			with pyarrow.ipc.new_file(arrowFile, table.schema) as writer:
+				writer.write_table(table)
@@ -0,0 +1,56 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Sony MD LCD Remote data block layouts
+
+'''
+
+Where every byte of a data block sits in a message, worked out once.
+
+A data block is eleven slots after the two header bytes: ten data bytes and
+a checksum. From the Player each slot is just a byte. From the Remote each
+slot is one Player timing bit followed by the Remote's byte, so the bytes
+are on a 9-bit stride and never line up with the Player's.
+
+For each slot, a BlockLayout has:
+	slotStarts: the first bit of the slot, timing bit included
+	firstBits, lastBits: the first and last bit of the byte itself
+	valueIndices: where the byte lands in the decoder's values list
+
+'''
+
+BLOCK_START_BIT = 16
+BLOCK_SLOTS = 11
+BLOCK_DATA_SLOTS = 10
+BLOCK_FIRST_VALUE = 2
+
+class BlockLayout:
+	__slots__ = ('stride', 'slotStarts', 'firstBits', 'lastBits', 'valueIndices')
+
+	def __init__(self, stride, timingBits=0):
+		self.stride = stride
+		self.slotStarts = tuple(BLOCK_START_BIT + (stride*slot) for slot in range(BLOCK_SLOTS))
+		self.firstBits = tuple(slotStart + timingBits for slotStart in self.slotStarts)
+		self.lastBits = tuple(firstBit + 7 for firstBit in self.firstBits)
+		self.valueIndices = tuple(BLOCK_FIRST_VALUE + slot for slot in range(BLOCK_SLOTS))
+
+	def extractBytes(self, messageValue):
+		'''
+		All eleven bytes of the block, out of the message packed LSB first as an
+		int (see the sony_md payload).
+		'''
+		return [(messageValue >> firstBit) & 0xFF for firstBit in self.firstBits]
+
+PLAYER_BLOCK_LAYOUT = BlockLayout(8)
+REMOTE_BLOCK_LAYOUT = BlockLayout(9, timingBits=1)
+
+def blockLayout(messageValue):
+	'''
+	The layout of the message's data block, from its header: bit 12 set (the
+	Player cedes the bus) for a Remote block, bits 8 and 12 both clear (the
+	Player has data) for a Player block, otherwise None.
+	'''
+	if (messageValue >> 12) & 1:
+		return REMOTE_BLOCK_LAYOUT
+	if not (messageValue >> 8) & 1:
+		return PLAYER_BLOCK_LAYOUT
+	return None
@@ -0,0 +1,310 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Sony MD LCD Remote packet type registry
+
+from collections import namedtuple
+
+'''
+
+Layout of every packet type found in Player and Remote data blocks.
+
+Each packet type is keyed on its type byte and lists:
+	length: how many bytes the packet takes, type byte included
+	command: text for the Commands row, covering commandLength bytes
+	labels: annotations put on the type byte itself
+	fields: the bytes after the type byte, see the field kinds below
+	blocks: for packets whose second byte picks one of several blocks
+	handler: name of a Decoder method for anything the fields can't say
+
+Offsets count from the type byte. In a Player data block they are bytes,
+in a Remote data block they are the 9-bit slots (one Player timing bit and
+one Remote byte each).
+
+Field kinds:
+	Static: a byte that has always had the same value
+	Unknown: a byte nobody has worked out yet
+	Enum: a named byte (or run of bytes) with a meaning per known value
+	Number: a named byte shown as a number
+	Labels: a byte that just gets some fixed annotations
+
+Annotations are (class, text) pairs, an Enum meaning that is just a string
+is shown in the Data Field Values row.
+
+Enum and Number fields can also feed the player/remote state, see state.py.
+For an Enum the state is (field name, {byte value: state value}), for a
+Number it is the field name. A Block's state is the field name its eight
+data bytes go into.
+
+The Decoder compiles these once when it is loaded, with compilePacketTypes().
+
+'''
+
+UNSURE = (11, 'Unsure')
+
+class Static(namedtuple('Static', 'offset expected')):
+	__slots__ = ()
+	putter = 'putStaticField'
+
+class Unknown(namedtuple('Unknown', 'offset')):
+	__slots__ = ()
+	putter = 'putUnknownField'
+
+class Enum(namedtuple('Enum', 'offset name meanings unsure length state')):
+	__slots__ = ()
+	putter = 'putEnumField'
+
+	def __new__(cls, offset, name, meanings, unsure=False, length=1, state=None):
+		meanings = dict((value, ((3, meaning),) if isinstance(meaning, str) else meaning) for (value, meaning) in meanings.items())
+		return super().__new__(cls, offset, name, meanings, unsure, length, state)
+
+class Number(namedtuple('Number', 'offset name format unsure state')):
+	__slots__ = ()
+	putter = 'putNumberField'
+
+	def __new__(cls, offset, name, format, unsure=False, state=None):
+		return super().__new__(cls, offset, name, format, unsure, state)
+
+class Labels(namedtuple('Labels', 'offset annotations')):
+	__slots__ = ()
+	putter = 'putLabelsField'
+
+Block = namedtuple('Block', 'label fields state')
+
+class PacketType(namedtuple('PacketType', 'length command commandLength labels fields blocks handler')):
+	__slots__ = ()
+
+	def __new__(cls, length, command=None, commandLength=None, labels=(), fields=(), blocks=None, handler=None):
+		if commandLength is None:
+			commandLength = length
+		return super().__new__(cls, length, command, commandLength, labels, fields, blocks, handler)
+
+def unknownBytes(first, last):
+	return tuple(Unknown(offset) for offset in range(first, last + 1))
+
+def compileFields(decoderClass, fields):
+	return tuple((getattr(decoderClass, field.putter), field) for field in fields)
+
+def compilePacketTypes(decoderClass, packetTypes):
+	'''
+	Swap every field for a (putter function, field) pair and every handler
+	name for the function itself, so expanding a packet is one dict lookup
+	and then straight calls.
+	'''
+	compiled = {}
+	for (typeByte, packetType) in packetTypes.items():
+		blocks = None
+		if packetType.blocks is not None:
+			blocks = dict((blockByte, block._replace(fields=compileFields(decoderClass, block.fields)))
+				for (blockByte, block) in packetType.blocks.items())
+		handler = None
+		if packetType.handler is not None:
+			handler = getattr(decoderClass, packetType.handler)
+		compiled[typeByte] = packetType._replace(fields=compileFields(decoderClass, packetType.fields),
+			blocks=blocks, handler=handler)
+	return compiled
+
+PLAYER_PACKET_TYPES = {
+	0x01: PacketType(2, 'Request Remote Capabilities',
+		labels=((3, 'Request Remote capabilities'),),
+		fields=(
+			Enum(1, 'Which block?', {
+				0x01: 'First block',
+				0x02: 'Second block, LCD capabilities?',
+				0x05: 'Fifth block',
+				0x06: 'Sixth block?',
+				0x7F: 'Unknown, seen from D-EJ955',
+			}, unsure=True),
+		)),
+	0x02: PacketType(2, 'Unknown, seems to be two bytes sent soon after initialization?',
+		labels=(UNSURE, (3, 'Unknown, seems to be two bytes sent soon after initialization?')),
+		fields=(
+			Static(1, 0x80),
+		)),
+	0x03: PacketType(4, 'Scroll Control?',
+		labels=(UNSURE, (3, 'Scroll control?')),
+		fields=(
+			Static(1, 0x80),
+			Enum(2, 'Enable scrolling?', {
+				(0x02, 0x80): 'Scrolling: Enabled',
+				(0x00, 0x00): 'Scrolling: Disabled',
+			}, unsure=True, length=2),
+		)),
+	0x05: PacketType(2, 'LCD Backlight Control',
+		labels=((3, 'LCD Backlight Control'),),
+		fields=(
+			Enum(1, 'LCD Backlight State', {
+				0x00: 'LCD Backlight: Off',
+				0x7F: 'LCD Backlight: On',
+			}),
+		)),
+	0x06: PacketType(6, 'LCD Remote Service Mode?',
+		labels=(UNSURE, (3, 'LCD Remote Service Mode Control?')),
+		handler='expandServiceMode'),
+	0x08: PacketType(4, 'Unknown, seems to be sent before 0xC8 text updates?',
+		labels=(UNSURE, (3, 'Unknown, seems to be sent before 0xC8 text updates')),
+		fields=(
+			Static(1, 0x80),
+			Static(2, 0x07),
+			Static(3, 0x80),
+		)),
+	0x09: PacketType(1, 'Unsure, seems to be sent before 0xC8 text updates, but not always?',
+		labels=(UNSURE, (3, 'Unknown, seems to be sent before 0xC8 text updates, but not always sent'))),
+	0x18: PacketType(1, 'Unsure, seems to get a response from remote? Seen from D-EJ955',
+		labels=(UNSURE, (3, 'Unsure, seems to get a response from remote? Seen from D-EJ955'))),
+	0x40: PacketType(2, 'Volume Level',
+		labels=((3, 'Volume Level'),),
+		handler='expandVolumeLevel'),
+	0x41: PacketType(2, 'Playback Mode',
+		labels=((3, 'Playback Mode'),),
+		fields=(
+			Enum(1, 'Current Playback Mode', {
+				0x00: 'Current Playback Mode: Normal',
+				0x01: 'Current Playback Mode: Repeat All Tracks',
+				0x02: 'Current Playback Mode: One Track, Stop Afterwards',
+				0x03: 'Current Playback Mode: Repeat One Track',
+				0x04: 'Current Playback Mode: Shuffle No Repeats',
+				0x05: 'Current Playback Mode: Shuffle With Repeats',
+				0x06: 'Current Playback Mode: PGM, No Repeats',
+				0x07: 'Current Playback Mode: PGM, Repeat',
+			}),
+		)),
+	0x42: PacketType(2, 'Recording Indicator',
+		labels=((3, 'Recording Indicator'),),
+		fields=(
+			Enum(1, 'Recording Indicator State', {
+				0x00: 'Recording Indicator: Off',
+				0x7F: 'Recording Indicator: On',
+			}),
+		)),
+	0x43: PacketType(2, 'Battery Level Indicator',
+		labels=((3, 'Battery Level Indicator'),),
+		fields=(
+			Enum(1, 'Battery Level Indicator State', {
+				0x00: 'Battery Level Indicator: Off',
+				0x01: 'Battery Level Indicator: 1/4 bars, blinking',
+				0x7F: 'Battery Level Indicator: Charging',
+				0x80: 'Battery Level Indicator: Empty, blinking',
+				0x9F: 'Battery Level Indicator: 1/4 bars',
+				0xBF: 'Battery Level Indicator: 2/4 bars',
+				0xDF: 'Battery Level Indicator: 3/4 bars',
+				0xFF: 'Battery Level Indicator: 4/4 bars',
+			}),
+		)),
+	0x44: PacketType(2, 'Unknown, presumably an indicator control. Seen from D-EJ955.',
+		labels=(UNSURE,),
+		fields=(
+			Static(1, 0x00),
+		)),
+	0x46: PacketType(2, 'EQ/Sound Indicator',
+		labels=((3, 'EQ/Sound Indicator'),),
+		fields=(
+			Enum(1, 'EQ/Sound Indicator State', {
+				0x00: 'EQ/Sound Indicator: Normal',
+				0x01: (UNSURE, (3, 'EQ/Sound Indicator: Bass 1?')),
+				0x02: (UNSURE, (3, 'EQ/Sound Indicator: Bass 2?')),
+				0x03: 'EQ/Sound Indicator: Sound 1',
+				0x04: 'EQ/Sound Indicator: Sound 2',
+			}),
+		)),
+	0x47: PacketType(2, 'Alarm Indicator',
+		labels=((3, 'Alarm Indicator'),),
+		fields=(
+			Enum(1, 'Alarm Indicator State', {
+				0x00: 'Alarm Indicator: Off',
+				0x7F: 'Alarm Indicator: On',
+			}),
+		)),
+	0x48: PacketType(1, 'Unknown, happens near track changes?',
+		labels=(UNSURE, (3, 'Unknown, happens near track changes?'))),
+	0x49: PacketType(1, 'Unknown, happens 12 packets after a 0x46?',
+		labels=(UNSURE, (3, 'Unknown, happens 12 packets after a 0x46?'))),
+	0x4A: PacketType(1, 'Unknown, happens before 0xC8 text updates?',
+		labels=(UNSURE, (3, 'Unknown, happens before 0xC8 text updates?'))),
+	0xA0: PacketType(5, 'Track number',
+		labels=((3, 'Track number'),),
+		fields=(
+			Enum(1, 'Track Number Indicator Enable', {
+				0x00: 'Track Number Indicator: On',
+				0x80: 'Track Number Indicator: Off',
+			}, state=('trackNumberShown', {0x00: True, 0x80: False})),
+			Static(2, 0x00),
+			Static(3, 0x00),
+			Number(4, 'Current Track Number', 'Current Track Number: %d', state='trackNumber'),
+		)),
+	0xA1: PacketType(5, 'LCD Disc Icon Control',
+		labels=((3, 'LCD Disc Icon Control'),),
+		fields=(
+			Static(1, 0x00),
+			Enum(2, 'LCD Disc Icon Outline', {
+				0x00: 'LCD Disc Icon Outline: Off',
+				0x7F: 'LCD Disc Icon Outline: On',
+			}),
+			Enum(3, 'LCD Disc Icon Fill Segments Enable', {
+				0x00: 'LCD Disc Icon Fill Segments: All disabled',
+				0x7F: 'LCD Disc Icon Fill Segments: All enabled',
+			}),
+			Enum(4, 'LCD Disc Icon Fill Segment Animation', {
+				0x00: 'LCD Disc Icon Fill Segment Animation: No animation, no segments displayed',
+				0x01: 'LCD Disc Icon Fill Segment Animation: "Fast Spinning" animation',
+				0x03: 'LCD Disc Icon Fill Segment Animation: "Spinning" animation',
+				0x7F: 'LCD Disc Icon Fill Segment Animation: No animation, all segments displayed',
+			}),
+		)),
+	0xA2: PacketType(5, 'Unknown, happens near track changes?',
+		labels=(UNSURE, (3, 'Unknown, happens near track changes?')),
+		fields=(
+			Static(1, 0x01),
+			Static(2, 0x01),
+			Static(3, 0x7F),
+			Static(4, 0x00),
+		)),
+	0xA3: PacketType(5, 'Unknown, seen from D-EJ955',
+		labels=((3, 'Unknown, seen from D-EJ955'), UNSURE),
+		fields=(
+			Static(1, 0x00),
+			Static(2, 0x00),
+			Static(3, 0xFF),
+			Static(4, 0xFF),
+		)),
+	0xA5: PacketType(4, 'Unknown, happens after initialization?',
+		labels=(UNSURE, (3, 'Unknown, happens after initialization?')),
+		fields=(
+			Static(1, 0x01),
+			Static(2, 0x76),
+			Static(3, 0x81),
+		)),
+	0xC0: PacketType(10, 'Player capabilities?',
+		labels=(UNSURE, (3, 'Player capabilities?')),
+		blocks={
+			0x05: Block('Fifth block?', unknownBytes(2, 9), 'playerCapabilities5'),
+		}),
+	0xC8: PacketType(11, 'LCD Text', commandLength=10,
+		labels=((3, 'LCD Text'),),
+		fields=(
+			Enum(1, 'Which segment?', {
+				0x02: 'Non-final segment?',
+				0x01: 'Final segment?',
+			}, unsure=True),
+			Static(2, 0x00),
+		),
+		handler='expandLCDText'),
+}
+
+REMOTE_PACKET_TYPES = {
+	0x83: PacketType(5,
+		labels=(UNSURE, (3, 'Serial number?')),
+		fields=unknownBytes(1, 4)),
+	0xC0: PacketType(10,
+		labels=((3, 'Remote capabilities'),),
+		blocks={
+			0x01: Block('First block, LCD capabilities?', unknownBytes(2, 6) + (
+				Number(7, 'Pixels tall?', 'Pixels tall: %d', unsure=True),
+				Number(8, 'Pixels wide?', 'Pixels wide: %d', unsure=True),
+				Labels(9, (UNSURE, (9, 'Character sets supported?'))),
+			), 'remoteCapabilities1'),
+			0x02: Block('Second block?', (
+				Number(2, 'Characters displayed?', 'Characters displayed: %d', unsure=True),
+			) + unknownBytes(3, 9), 'remoteCapabilities2'),
+			0x05: Block('Fifth block?', unknownBytes(2, 9), 'remoteCapabilities5'),
+		}),
+}
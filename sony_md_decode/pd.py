@@ -3,6 +3,42 @@
 # Sony MD LCD Remote decoder
 
 import sigrokdecode as srd
+from .state import PlayerState, LCD_TEXT_SEGMENT
+from .packettypes import compilePacketTypes, PLAYER_PACKET_TYPES, REMOTE_PACKET_TYPES
+from .layout import PLAYER_BLOCK_LAYOUT, REMOTE_BLOCK_LAYOUT, BLOCK_DATA_SLOTS, blockLayout
+from .shiftjis import characterClasses, decodeShiftJIS, SJIS_LEAD, SJIS_PRINTABLE, SJIS_HALF_KATAKANA
+from .templates import TemplateCache, MessageTemplate, tokenBitData, tokenSample
+from .statistics import CaptureStatistics, META_OUTPUTS
+
+'''
+
+OUTPUT_PYTHON format:
+
+State changes:
+	{<field>: <value>, ...}
+
+	Put over the whole message, only when a message with a valid checksum
+	changed at least one field, and only holding the fields that changed.
+	Fields are absent until the first message that sets them.
+
+	Fields:
+		'volume': int, 0 to 32
+		'trackNumber': int
+		'trackNumberShown': bool
+		'lcdText': bytes, Shift-JIS text on the LCD, sent when the final
+			0xC8 segment of a string arrives
+		'playerCapabilities5': bytes, the eight bytes of the Player's 0xC0
+			fifth block
+		'remoteCapabilities1', 'remoteCapabilities2', 'remoteCapabilities5':
+			bytes, the eight bytes after the block number in the Remote's 0xC0
+			first, second and fifth blocks
+
+	A run of repeated messages collapsed by sony_md's 'repeats' option is
+	shown as one annotation, but still updates the state once per message,
+	as repeated 0xC8 text segments are appended each time. Any changes are
+	put over the whole run.
+
+'''
 
 class SamplerateError(Exception):
     pass
@@ -34,6 +70,7 @@ class Decoder(srd.Decoder):
 		('data-field-unknown', 'Data Field (Unknown)'),
 		('data-field-static', 'Data Field (Static)'),
 		('command', 'Command'),
+		('statistics', 'Statistics'),
 	)
 	annotation_rows = (
 		('informational', 'Informational', (0,)),
@@ -47,6 +84,12 @@ class Decoder(srd.Decoder):
 		('debugs-two', 'Debugs 2', (5,)),
 		('errors', 'Errors', (10,)),
 		('warnings', 'Warnings', (11,)),
+		('statistics', 'Statistics', (16,)),
+	)
+	options = (
+		{'id': 'cachesize', 'desc': 'Decoded message cache size (0 to disable)', 'default': 256},
+		{'id': 'debugrows', 'desc': 'Debug rows', 'default': 'yes', 'values': ('yes', 'no')},
+		{'id': 'statistics', 'desc': 'Statistics summary every N messages (0 to disable)', 'default': 0},
 	)
 
 	characters = {
@@ -68,61 +111,45 @@ class Decoder(srd.Decoder):
 			[0, ['Message Start', 'S']])
 
 	def putBinaryMSBFirst(self, bitData, startBit, numBits):
-		currentBit = startBit
-		bitsLeft = numBits
 		valueStart = bitData[3][startBit][0]
 		valueEnd = bitData[3][(startBit+numBits-1)][2]
-		value = "0b"
-
-		while bitsLeft > 0:
-			value += str(bitData[3][currentBit][3])
-			currentBit += 1
-			bitsLeft -= 1
+		bits = (self.messageValue >> startBit) & ((1 << numBits) - 1)
+		value = "0b" + format(bits, '0%db' % numBits)[::-1]
 		
 		self.put(valueStart, valueEnd, self.out_ann,
 			[5, [value]])
 
+	hexBytes = tuple('0x%02X ' % value for value in range(256))
+
+	def putDebugHex(self, bitData):
+		#Bit count, the two headers and the data block bytes, all in one go from values
+		hexBytes = self.hexBytes
+		self.put(bitData[0], bitData[1], self.out_ann,
+			[4, ['%d   %s   %s   %s' % (bitData[2], hexBytes[self.values[0]], hexBytes[self.values[1]],
+				''.join([hexBytes[value] for value in self.values[2:]]))]])
+
 	def putValueMSBFirst(self, bitData, startBit, numBits):
-		currentBit = startBit
-		bitsLeft = numBits
 		valueStart = bitData[3][startBit][0]
 		valueEnd = bitData[3][(startBit+numBits-1)][2]
-		value = 0
-
-		while bitsLeft > 0:
-			value <<= 1
-			value += bitData[3][currentBit][3]
-			currentBit += 1
-			bitsLeft -= 1
+		bits = (self.messageValue >> startBit) & ((1 << numBits) - 1)
+		value = int(format(bits, '0%db' % numBits)[::-1], 2)
 
 		self.checksum ^= value
 		
 		if numBits % 8 == 0:
 			self.put(valueStart, valueEnd, self.out_ann,
 				[2, ['Value: 0x%02X' % value]])
-			self.debugOutHex += ('0x%02X ' % value)
 		elif numBits % 9 == 0:
 			self.put(valueStart, valueEnd, self.out_ann,
 				[2, ['Value: 0o%03o' % value]])
-			self.debugOutHex += ('0o%03o ' % value)
 		else:
 			self.put(valueStart, valueEnd, self.out_ann,
 				[2, ['Value (Low %d bits): 0x%X' % (numBits, value)]])
-			self.debugOutHex += ('0x%X ' % value)
 	
 	def putValueLSBFirst(self, bitData, startBit, numBits):
-		currentBit = startBit
-		shiftBy = 0
-		bitsLeft = numBits
 		valueStart = bitData[3][startBit][0]
 		valueEnd = bitData[3][(startBit+numBits-1)][2]
-		value = 0
-
-		while bitsLeft > 0:
-			value += (bitData[3][currentBit][3] << shiftBy)
-			shiftBy += 1
-			currentBit += 1
-			bitsLeft -= 1
+		value = (self.messageValue >> startBit) & ((1 << numBits) - 1)
 
 		self.checksum ^= value
 		self.values.append(value)
@@ -130,18 +157,24 @@ class Decoder(srd.Decoder):
 		if numBits % 8 == 0:
 			self.put(valueStart, valueEnd, self.out_ann,
 				[2, ['Value: 0x%02X' % value]])
-			self.debugOutHex += ('0x%02X ' % value)
 		elif numBits % 9 == 0:
 			self.put(valueStart, valueEnd, self.out_ann,
 				[2, ['Value: 0o%03o' % value]])
-			self.debugOutHex += ('0o%03o ' % value)
 		else:
 			self.put(valueStart, valueEnd, self.out_ann,
 				[2, ['Value (Low %d bits): 0x%X' % (numBits, value)]])
-			self.debugOutHex += ('0x%X ' % value)
 		
 		return value
 
+	def putByteValue(self, bitData, firstBit, lastBit, value):
+		self.checksum ^= value
+		self.values.append(value)
+
+		self.put(bitData[3][firstBit][0], bitData[3][lastBit][2], self.out_ann,
+			[2, ['Value: 0x%02X' % value]])
+
+		return value
+
 	def putStaticByte(self, bitData, currentBit, value, expectedValue):
 		self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
 			[9, ['Static?']])
@@ -274,900 +307,458 @@ class Decoder(srd.Decoder):
 		self.put(bitData[3][currentBit+7][0], bitData[3][currentBit+7][2], self.out_ann,
 			[3, ['Player Present']])
 	
-	def putLCDCharacter(self, bitData, currentBit, values, index):
-		isFirstOfDouble = lambda x: x in range(0x81, 0x9f) or x in range(0xe0, 0xef)
-		isSJISHalfKata = lambda x: x in range(0xa1, 0xdf)
-		isPrintable = lambda x: x in range(0x20, 0x7e)
-
-		twoByteStartIndices = []
-		charIndex = 0
-		while charIndex < len(values):
-			if isFirstOfDouble(values[charIndex]):
-				twoByteStartIndices.append(charIndex)
-				charIndex += 1
-			charIndex += 1
-
-		value = values[index]
-		nextValue = values[index + 1] if index < len(values) - 1 else None
-		if value in self.characters: # self.characters takes priority
-			self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-				[3, [self.characters[value]]])
-			return
-		if index - 1 in twoByteStartIndices: return # The correct character has already been displayed.
-		if index in twoByteStartIndices:
-			if nextValue is None:
-				self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-					[3, ['First byte of 2-byte SJIS sequence, see next message for remainder and decode.']])
-				self.tempCarryoverShiftJISByte = value
-			else:
+	def putLCDText(self, bitData, currentBit, values):
+		#One pass over the segment. A two-byte character is shown across both of
+		#its bytes, and a first byte at the very end is carried over to the next
+		#segment in tempCarryoverShiftJISByte.
+		lastIndex = len(values) - 1
+		secondHalf = False
+		for (index, value) in enumerate(values):
+			charStart = bitData[3][currentBit][0]
+			charEnd = bitData[3][currentBit+7][2]
+			self.put(charStart, charEnd, self.out_ann,
+				[9, ['String position %d' % (index+1)]])
+
+			characterClass = characterClasses[value]
+			isFirstOfDouble = (not secondHalf) and (characterClass == SJIS_LEAD)
+			if value in self.characters: # self.characters takes priority
+				self.put(charStart, charEnd, self.out_ann,
+					[3, [self.characters[value]]])
+			elif secondHalf:
+				pass # The correct character has already been displayed.
+			elif isFirstOfDouble:
+				if index == lastIndex:
+					self.put(charStart, charEnd, self.out_ann,
+						[3, ['First byte of 2-byte SJIS sequence, see next message for remainder and decode.']])
+					self.tempCarryoverShiftJISByte = value
+				else:
+					self.tempCarryoverShiftJISByte = 0
+					self.put(charStart, bitData[3][currentBit+15][2], self.out_ann,
+						[3, [decodeShiftJIS(value, values[index+1])]])
+			elif self.tempCarryoverShiftJISByte != 0:
+				self.put(charStart, charEnd, self.out_ann,
+					[3, [decodeShiftJIS(self.tempCarryoverShiftJISByte, value)]])
 				self.tempCarryoverShiftJISByte = 0
-				self.put(bitData[3][currentBit][0], bitData[3][currentBit+15][2], self.out_ann,
-					[3, [bytes([value, nextValue]).decode('sjis')]])
-		elif self.tempCarryoverShiftJISByte != 0:
-			self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-				[3, [bytes([self.tempCarryoverShiftJISByte, value]).decode('sjis')]])
-			self.tempCarryoverShiftJISByte = 0
-			self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-				[11, ['This is the second-half of a full-width SJIS, taking the first half from the previous message.']])
-		elif isPrintable(value):
-			self.tempCarryoverShiftJISByte = 0
-			self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-				[3, [bytes([value]).decode('sjis')]])
-		elif isSJISHalfKata(value):
-			self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-				[3, ['SJIS half-width katakana - shouldn\'t be possible']])
-			self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-				[11, ['Probably the second-half of a full-width SJIS, missed the previous message with the first half?']])
+				self.put(charStart, charEnd, self.out_ann,
+					[11, ['This is the second-half of a full-width SJIS, taking the first half from the previous message.']])
+			elif characterClass == SJIS_PRINTABLE:
+				self.tempCarryoverShiftJISByte = 0
+				self.put(charStart, charEnd, self.out_ann,
+					[3, [decodeShiftJIS(value)]])
+			elif characterClass == SJIS_HALF_KATAKANA:
+				self.put(charStart, charEnd, self.out_ann,
+					[3, ['SJIS half-width katakana - shouldn\'t be possible']])
+				self.put(charStart, charEnd, self.out_ann,
+					[11, ['Probably the second-half of a full-width SJIS, missed the previous message with the first half?']])
+			else:
+				self.put(charStart, charEnd, self.out_ann,
+					[3, ['Unknown character']])
+				self.put(charStart, charEnd, self.out_ann,
+					[10, ['Unknown character']])
+
+			secondHalf = isFirstOfDouble
+			currentBit += 8
+
+	def putSpan(self, bitData, firstBit, lastBit, annotations):
+		for (annotationClass, text) in annotations:
+			self.put(bitData[3][firstBit][0], bitData[3][lastBit][2], self.out_ann,
+				[annotationClass, [text]])
+
+	def putStaticField(self, bitData, field, layout, slot):
+		slot += field.offset
+		self.putStaticByte(bitData, layout.firstBits[slot], self.values[layout.valueIndices[slot]], field.expected)
+
+	def putUnknownField(self, bitData, field, layout, slot):
+		slot += field.offset
+		self.putUnknownByte(bitData, layout.firstBits[slot], self.values[layout.valueIndices[slot]])
+
+	def putEnumField(self, bitData, field, layout, slot):
+		slot += field.offset
+		fieldStart = layout.firstBits[slot]
+		fieldEnd = layout.lastBits[slot+field.length-1]
+		valueIndex = layout.valueIndices[slot]
+		if field.length == 1:
+			value = self.values[valueIndex]
 		else:
-			self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-				[3, ['Unknown character']])
-			self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-				[10, ['Unknown character']])
+			value = tuple(self.values[valueIndex:(valueIndex+field.length)])
+
+		if field.unsure:
+			self.putSpan(bitData, fieldStart, fieldEnd, ((11, 'Unsure'),))
+		self.putSpan(bitData, fieldStart, fieldEnd, ((9, field.name),))
+		meaning = field.meanings.get(value)
+		if meaning is None:
+			self.putSpan(bitData, fieldStart, fieldEnd, ((10, 'UNRECOGNIZED VALUE'),))
+			return
+		self.putSpan(bitData, fieldStart, fieldEnd, meaning)
+		if field.state is not None:
+			self.playerState.queueUpdate(field.state[0], field.state[1][value])
+
+	def putNumberField(self, bitData, field, layout, slot):
+		slot += field.offset
+		value = self.values[layout.valueIndices[slot]]
+		if field.unsure:
+			self.putSpan(bitData, layout.firstBits[slot], layout.lastBits[slot], ((11, 'Unsure'),))
+		self.putSpan(bitData, layout.firstBits[slot], layout.lastBits[slot], ((9, field.name), (3, field.format % value)))
+		if field.state is not None:
+			self.playerState.queueUpdate(field.state, value)
+
+	def putLabelsField(self, bitData, field, layout, slot):
+		slot += field.offset
+		self.putSpan(bitData, layout.firstBits[slot], layout.lastBits[slot], field.annotations)
+
+	def putFields(self, bitData, fields, layout, slot):
+		for (putField, field) in fields:
+			putField(self, bitData, field, layout, slot)
+
+	def expandBlock(self, bitData, blocks, layout, slot):
+		blockStart = layout.firstBits[slot+1]
+		blockEnd = layout.lastBits[slot+1]
+		valueIndex = layout.valueIndices[slot]
+		self.putSpan(bitData, blockStart, blockEnd, ((11, 'Unsure'), (9, 'Which block?')))
+		block = blocks.get(self.values[valueIndex+1])
+		if block is None:
+			self.putSpan(bitData, blockStart, blockEnd, ((10, 'UNRECOGNIZED VALUE'),))
+			return False
+		self.putSpan(bitData, blockStart, blockEnd, ((3, block.label),))
+		self.putFields(bitData, block.fields, layout, slot)
+		self.playerState.queueUpdate(block.state, bytes(self.values[(valueIndex+2):(valueIndex+10)]))
+		return True
+
+	def expandPacket(self, bitData, packetType, layout, slot):
+		#slot is where the type byte sits in the data block, see layout.py.
+		#Returns False if the packet's block number wasn't recognized.
+		if packetType.command is not None:
+			self.putSpan(bitData, layout.firstBits[slot], layout.lastBits[slot+packetType.commandLength-1],
+				((15, packetType.command),))
+		self.putSpan(bitData, layout.firstBits[slot], layout.lastBits[slot], packetType.labels)
+		self.putFields(bitData, packetType.fields, layout, slot)
+		if packetType.blocks is not None:
+			if not self.expandBlock(bitData, packetType.blocks, layout, slot):
+				return False
+		if packetType.handler is not None:
+			packetType.handler(self, bitData, layout.firstBits[slot], layout.valueIndices[slot])
+		return True
+
+	def expandServiceMode(self, bitData, currentBit, currentByte):
+		if self.values[currentByte+1] == 0x7F:
+			self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
+				[3, ['LCD Remote Service Mode End']])
+		elif (self.values[currentByte+1] == 0x00) and (self.values[currentByte+2] == 0x06) and (self.values[currentByte+3] == 0x01) and (self.values[currentByte+4] == 0x03) and (self.values[currentByte+5] == 0x80):
+			self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+47][2], self.out_ann,
+				[11, ['Unsure']])
+			self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+47][2], self.out_ann,
+				[3, ['LCD Remote Service Mode All Segments On?']])
+		else:
+			self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
+				[10, ['UNRECOGNIZED VALUE']])
+
+	def expandVolumeLevel(self, bitData, currentBit, currentByte):
+		self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
+			[9, ['Current Volume Level']])
+		if self.values[currentByte+1] == 0xFF:
+			self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
+				[3, ['Current Volume Level: 32/32']])
+			self.playerState.queueUpdate('volume', 32)
+		elif self.values[currentByte+1] < 32:
+			self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
+				[3, ['Current Volume Level: %d/32' % self.values[3]]])
+			self.playerState.queueUpdate('volume', self.values[currentByte+1])
+		else:
+			self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
+				[10, ['UNRECOGNIZED VALUE']])
 
-	def expandPlayerDataBlock(self, bitData, currentBit, packetType):
-		currentByte = 2
-		notDone = True
-
-		while notDone:
-			if currentByte >= 12:
-				notDone = False
-			elif self.values[currentByte] == 0x00:
-				notDone = False
-			else:
-				self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-					[9, ['Packet type']])
-				if self.values[currentByte] == 0x01:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+15][2], self.out_ann,
-						[15, ['Request Remote Capabilities']])
-
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['Request Remote capabilities']])
-
-					self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-						[11, ['Unsure']])
-					self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-						[9, ['Which block?']])
-					if self.values[currentByte+1] == 0x01:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['First block']])
-					elif self.values[currentByte+1] == 0x02:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Second block, LCD capabilities?']])
-					elif self.values[currentByte+1] == 0x05:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Fifth block']])
-					elif self.values[currentByte+1] == 0x06:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Sixth block?']])
-					elif self.values[currentByte+1] == 0x7F:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Unknown, seen from D-EJ955']])
-					else:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[10, ['UNRECOGNIZED VALUE']])
-					
-					currentBit += (2*8)
-					currentByte += 2
-				elif self.values[currentByte] == 0x02:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+15][2], self.out_ann,
-						[15, ['Unknown, seems to be two bytes sent soon after initialization?']])
-
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[11, ['Unsure']])
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['Unknown, seems to be two bytes sent soon after initialization?']])
-
-					self.putStaticByte(bitData, currentBit+8, self.values[currentByte+1], 0x80)
-
-					currentBit += (2*8)
-					currentByte += 2
-				elif self.values[currentByte] == 0x03:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+31][2], self.out_ann,
-						[15, ['Scroll Control?']])
-
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[11, ['Unsure']])
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['Scroll control?']])
-					
-					self.putStaticByte(bitData, currentBit+8, self.values[currentByte+1], 0x80)
-
-					self.put(bitData[3][currentBit+16][0], bitData[3][currentBit+31][2], self.out_ann,
-						[11, ['Unsure']])
-					self.put(bitData[3][currentBit+16][0], bitData[3][currentBit+31][2], self.out_ann,
-						[9, ['Enable scrolling?']])
-					if (self.values[currentByte+2] == 0x02) and (self.values[currentByte+3] == 0x80):
-						self.put(bitData[3][currentBit+16][0], bitData[3][currentBit+31][2], self.out_ann,
-							[3, ['Scrolling: Enabled']])
-					elif (self.values[currentByte+2] == 0x00) and (self.values[currentByte+3] == 0x00):
-						self.put(bitData[3][currentBit+16][0], bitData[3][currentBit+31][2], self.out_ann,
-							[3, ['Scrolling: Disabled']])
-					else:
-						self.put(bitData[3][currentBit+16][0], bitData[3][currentBit+31][2], self.out_ann,
-							[10, ['UNRECOGNIZED VALUE']])
-					
-					currentBit += (4*8)
-					currentByte += 4
-				elif self.values[currentByte] == 0x05:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+15][2], self.out_ann,
-						[15, ['LCD Backlight Control']])
-
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['LCD Backlight Control']])
-					self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-						[9, ['LCD Backlight State']])
-
-					if self.values[currentByte+1] == 0x00:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['LCD Backlight: Off']])
-					elif self.values[currentByte+1] == 0x7F:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['LCD Backlight: On']])
-					else:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[10, ['UNRECOGNIZED VALUE']])
-
-					currentBit += (2*8)
-					currentByte += 2
-				elif self.values[currentByte] == 0x06:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+47][2], self.out_ann,
-						[15, ['LCD Remote Service Mode?']])
-
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[11, ['Unsure']])
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['LCD Remote Service Mode Control?']])
-					
-					if self.values[currentByte+1] == 0x7F:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['LCD Remote Service Mode End']])
-					elif (self.values[currentByte+1] == 0x00) and (self.values[currentByte+2] == 0x06) and (self.values[currentByte+3] == 0x01) and (self.values[currentByte+4] == 0x03) and (self.values[currentByte+5] == 0x80):
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+47][2], self.out_ann,
-							[11, ['Unsure']])
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+47][2], self.out_ann,
-							[3, ['LCD Remote Service Mode All Segments On?']])
-					else:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[10, ['UNRECOGNIZED VALUE']])
-					
-					currentBit += (6*8)
-					currentByte += 6
-				elif self.values[currentByte] == 0x08:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+31][2], self.out_ann,
-						[15, ['Unknown, seems to be sent before 0xC8 text updates?']])
-
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[11, ['Unsure']])
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['Unknown, seems to be sent before 0xC8 text updates']])
-					
-					self.putStaticByte(bitData, currentBit+8, self.values[currentByte+1], 0x80)
-					self.putStaticByte(bitData, currentBit+16, self.values[currentByte+2], 0x07)
-					self.putStaticByte(bitData, currentBit+24, self.values[currentByte+3], 0x80)
-					
-					currentBit += (4*8)
-					currentByte += 4
-				elif self.values[currentByte] == 0x09:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[15, ['Unsure, seems to be sent before 0xC8 text updates, but not always?']])
-
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[11, ['Unsure']])
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['Unknown, seems to be sent before 0xC8 text updates, but not always sent']])
-					
-					currentBit += 8
-					currentByte += 1
-				elif self.values[currentByte] == 0x18:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[15, ['Unsure, seems to get a response from remote? Seen from D-EJ955']])
-
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[11, ['Unsure']])
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['Unsure, seems to get a response from remote? Seen from D-EJ955']])
-					
-					currentBit += 8
-					currentByte += 1
-				elif self.values[currentByte] == 0x40:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+15][2], self.out_ann,
-						[15, ['Volume Level']])
-
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['Volume Level']])
-
-					self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-						[9, ['Current Volume Level']])
-					if self.values[currentByte+1] == 0xFF:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Current Volume Level: 32/32']])
-					elif self.values[currentByte+1] < 32:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Current Volume Level: %d/32' % self.values[3]]])
-					else:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[10, ['UNRECOGNIZED VALUE']])
-
-					currentBit += (2*8)
-					currentByte += 2
-				elif self.values[currentByte] == 0x41:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+15][2], self.out_ann,
-						[15, ['Playback Mode']])
-
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['Playback Mode']])
-					
-					self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-						[9, ['Current Playback Mode']])
-					if self.values[currentByte+1] == 0x00:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Current Playback Mode: Normal']])
-					elif self.values[currentByte+1] == 0x01:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Current Playback Mode: Repeat All Tracks']])
-					elif self.values[currentByte+1] == 0x02:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Current Playback Mode: One Track, Stop Afterwards']])
-					elif self.values[currentByte+1] == 0x03:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Current Playback Mode: Repeat One Track']])
-					elif self.values[currentByte+1] == 0x04:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Current Playback Mode: Shuffle No Repeats']])
-					elif self.values[currentByte+1] == 0x05:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Current Playback Mode: Shuffle With Repeats']])
-					elif self.values[currentByte+1] == 0x06:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Current Playback Mode: PGM, No Repeats']])
-					elif self.values[currentByte+1] == 0x07:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Current Playback Mode: PGM, Repeat']])
-					else:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[10, ['UNRECOGNIZED VALUE']])
-
-					currentBit += (2*8)
-					currentByte += 2
-				elif self.values[currentByte] == 0x42:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+15][2], self.out_ann,
-						[15, ['Recording Indicator']])
-
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['Recording Indicator']])
-
-					self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-						[9, ['Recording Indicator State']])
-					if self.values[currentByte+1] == 0x00:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Recording Indicator: Off']])
-					elif self.values[currentByte+1] == 0x7F:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Recording Indicator: On']])
-					else:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[10, ['UNRECOGNIZED VALUE']])
-
-					currentBit += (2*8)
-					currentByte += 2
-				elif self.values[currentByte] == 0x43:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+15][2], self.out_ann,
-						[15, ['Battery Level Indicator']])
-
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['Battery Level Indicator']])
-						
-					self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-						[9, ['Battery Level Indicator State']])
-					if self.values[currentByte+1] == 0x00:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Battery Level Indicator: Off']])
-					elif self.values[currentByte+1] == 0x01:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Battery Level Indicator: 1/4 bars, blinking']])
-					elif self.values[currentByte+1] == 0x7F:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Battery Level Indicator: Charging']])
-					elif self.values[currentByte+1] == 0x80:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Battery Level Indicator: Empty, blinking']])
-					elif self.values[currentByte+1] == 0x9F:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Battery Level Indicator: 1/4 bars']])
-					elif self.values[currentByte+1] == 0xBF:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Battery Level Indicator: 2/4 bars']])
-					elif self.values[currentByte+1] == 0xDF:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Battery Level Indicator: 3/4 bars']])
-					elif self.values[currentByte+1] == 0xFF:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Battery Level Indicator: 4/4 bars']])
-					else:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[10, ['UNRECOGNIZED VALUE']])
-
-					currentBit += (2*8)
-					currentByte += 2
-				elif self.values[currentByte] == 0x44:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[11, ['Unsure']])
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+15][2], self.out_ann,
-						[15, ['Unknown, presumably an indicator control. Seen from D-EJ955.']])
-					
-					self.putStaticByte(bitData, currentBit+8, self.values[currentByte+1], 0x00)
-
-					currentBit += (2*8)
-					currentByte += 2
-				elif self.values[currentByte] == 0x46:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+15][2], self.out_ann,
-						[15, ['EQ/Sound Indicator']])
-
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['EQ/Sound Indicator']])
-
-					self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-						[9, ['EQ/Sound Indicator State']])
-					if self.values[currentByte+1] == 0x00:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['EQ/Sound Indicator: Normal']])
-					elif self.values[currentByte+1] == 0x01:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[11, ['Unsure']])
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['EQ/Sound Indicator: Bass 1?']])
-					elif self.values[currentByte+1] == 0x02:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[11, ['Unsure']])
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['EQ/Sound Indicator: Bass 2?']])
-					elif self.values[currentByte+1] == 0x03:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['EQ/Sound Indicator: Sound 1']])
-					elif self.values[currentByte+1] == 0x04:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['EQ/Sound Indicator: Sound 2']])
-					else:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[10, ['UNRECOGNIZED VALUE']])
-
-					currentBit += (2*8)
-					currentByte += 2
-				elif self.values[currentByte] == 0x47:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+15][2], self.out_ann,
-						[15, ['Alarm Indicator']])
-
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['Alarm Indicator']])
-
-					self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-						[9, ['Alarm Indicator State']])
-					if self.values[currentByte+1] == 0x00:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Alarm Indicator: Off']])
-					elif self.values[currentByte+1] == 0x7F:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Alarm Indicator: On']])
-					else:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[10, ['UNRECOGNIZED VALUE']])
-
-					currentBit += (2*8)
-					currentByte += 2
-				elif self.values[currentByte] == 0x48:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[15, ['Unknown, happens near track changes?']])
-
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[11, ['Unsure']])
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['Unknown, happens near track changes?']])
-
-					currentBit += 8
-					currentByte += 1
-				elif self.values[currentByte] == 0x49:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[15, ['Unknown, happens 12 packets after a 0x46?']])
-
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[11, ['Unsure']])
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['Unknown, happens 12 packets after a 0x46?']])
-
-					currentBit += 8
-					currentByte += 1
-				elif self.values[currentByte] == 0x4A:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[15, ['Unknown, happens before 0xC8 text updates?']])
-
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[11, ['Unsure']])
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['Unknown, happens before 0xC8 text updates?']])
-
-					currentBit += 8
-					currentByte += 1
-				elif self.values[currentByte] == 0xA0:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+39][2], self.out_ann,
-						[15, ['Track number']])
-
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['Track number']])
-
-					self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-						[9, ['Track Number Indicator Enable']])
-					if self.values[currentByte+1] == 0x00:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Track Number Indicator: On']])
-					elif self.values[currentByte+1] == 0x80:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Track Number Indicator: Off']])
-					else:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[10, ['UNRECOGNIZED VALUE']])
-					
-					self.putStaticByte(bitData, currentBit+16, self.values[currentByte+2], 0x00)
-					self.putStaticByte(bitData, currentBit+24, self.values[currentByte+3], 0x00)
-					
-					self.put(bitData[3][currentBit+32][0], bitData[3][currentBit+39][2], self.out_ann,
-						[9, ['Current Track Number']])
-					self.put(bitData[3][currentBit+32][0], bitData[3][currentBit+39][2], self.out_ann,
-						[3, ['Current Track Number: %d' % self.values[currentByte+4]]])
-					
-					currentBit += (5*8)
-					currentByte += 5
-				elif self.values[currentByte] == 0xA1:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+39][2], self.out_ann,
-						[15, ['LCD Disc Icon Control']])
-
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['LCD Disc Icon Control']])
-
-					self.putStaticByte(bitData, currentBit+8, self.values[currentByte+1], 0x00)
-
-					self.put(bitData[3][currentBit+16][0], bitData[3][currentBit+23][2], self.out_ann,
-						[9, ['LCD Disc Icon Outline']])
-					if self.values[currentByte+2] == 0x00:
-						self.put(bitData[3][currentBit+16][0], bitData[3][currentBit+23][2], self.out_ann,
-							[3, ['LCD Disc Icon Outline: Off']])
-					elif self.values[currentByte+2] == 0x7F:
-						self.put(bitData[3][currentBit+16][0], bitData[3][currentBit+23][2], self.out_ann,
-							[3, ['LCD Disc Icon Outline: On']])
-					else:
-						self.put(bitData[3][currentBit+16][0], bitData[3][currentBit+23][2], self.out_ann,
-							[10, ['UNRECOGNIZED VALUE']])
-					
-					self.put(bitData[3][currentBit+24][0], bitData[3][currentBit+31][2], self.out_ann,
-						[9, ['LCD Disc Icon Fill Segments Enable']])
-					if self.values[currentByte+3] == 0x00:
-						self.put(bitData[3][currentBit+24][0], bitData[3][currentBit+31][2], self.out_ann,
-							[3, ['LCD Disc Icon Fill Segments: All disabled']])
-					elif self.values[currentByte+3] == 0x7F:
-						self.put(bitData[3][currentBit+24][0], bitData[3][currentBit+31][2], self.out_ann,
-							[3, ['LCD Disc Icon Fill Segments: All enabled']])
-					else:
-						self.put(bitData[3][currentBit+24][0], bitData[3][currentBit+31][2], self.out_ann,
-							[10, ['UNRECOGNIZED VALUE']])
-
-					self.put(bitData[3][currentBit+32][0], bitData[3][currentBit+39][2], self.out_ann,
-						[9, ['LCD Disc Icon Fill Segment Animation']])
-					if self.values[currentByte+4] == 0x00:
-						self.put(bitData[3][currentBit+32][0], bitData[3][currentBit+39][2], self.out_ann,
-							[3, ['LCD Disc Icon Fill Segment Animation: No animation, no segments displayed']])
-					elif self.values[currentByte+4] == 0x01:
-						self.put(bitData[3][currentBit+32][0], bitData[3][currentBit+39][2], self.out_ann,
-							[3, ['LCD Disc Icon Fill Segment Animation: "Fast Spinning" animation']])
-					elif self.values[currentByte+4] == 0x03:
-						self.put(bitData[3][currentBit+32][0], bitData[3][currentBit+39][2], self.out_ann,
-							[3, ['LCD Disc Icon Fill Segment Animation: "Spinning" animation']])
-					elif self.values[currentByte+4] == 0x7F:
-						self.put(bitData[3][currentBit+32][0], bitData[3][currentBit+39][2], self.out_ann,
-							[3, ['LCD Disc Icon Fill Segment Animation: No animation, all segments displayed']])
-					else:
-						self.put(bitData[3][currentBit+32][0], bitData[3][currentBit+39][2], self.out_ann,
-							[10, ['UNRECOGNIZED VALUE']])
-
-					currentBit += (5*8)
-					currentByte += 5
-				elif self.values[currentByte] == 0xA2:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+39][2], self.out_ann,
-						[15, ['Unknown, happens near track changes?']])
-
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[11, ['Unsure']])
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['Unknown, happens near track changes?']])
-
-					self.putStaticByte(bitData, currentBit+8, self.values[currentByte+1], 0x01)
-					self.putStaticByte(bitData, currentBit+16, self.values[currentByte+2], 0x01)
-					self.putStaticByte(bitData, currentBit+24, self.values[currentByte+3], 0x7F)
-					self.putStaticByte(bitData, currentBit+32, self.values[currentByte+4], 0x00)
-
-					currentBit += (5*8)
-					currentByte += 5
-				elif self.values[currentByte] == 0xA3:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+39][2], self.out_ann,
-						[15, ['Unknown, seen from D-EJ955']])
-					
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['Unknown, seen from D-EJ955']])
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[11, ['Unsure']])
-
-					self.putStaticByte(bitData, currentBit+8, self.values[currentByte+1], 0x00)
-					self.putStaticByte(bitData, currentBit+16, self.values[currentByte+2], 0x00)
-					self.putStaticByte(bitData, currentBit+24, self.values[currentByte+3], 0xFF)
-					self.putStaticByte(bitData, currentBit+32, self.values[currentByte+4], 0xFF)
-
-					currentBit += (5*8)
-					currentByte += 5
-				elif self.values[currentByte] == 0xA5:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+31][2], self.out_ann,
-						[15, ['Unknown, happens after initialization?']])
-
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[11, ['Unsure']])
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['Unknown, happens after initialization?']])
-
-					self.putStaticByte(bitData, currentBit+8, self.values[currentByte+1], 0x01)
-					self.putStaticByte(bitData, currentBit+16, self.values[currentByte+2], 0x76)
-					self.putStaticByte(bitData, currentBit+24, self.values[currentByte+3], 0x81)
-
-					currentBit += (4*8)
-					currentByte += 4
-				elif self.values[currentByte] == 0xC0:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+79][2], self.out_ann,
-						[15, ['Player capabilities?']])
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[11, ['Unsure']])
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['Player capabilities?']])
-
-					self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-						[11, ['Unsure']])
-					self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-						[9, ['Which block?']])
-					if self.values[currentByte+1] == 0x05:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Fifth block?']])
-						
-						self.putUnknownByte(bitData, currentBit+16, self.values[currentByte+2])
-						self.putUnknownByte(bitData, currentBit+24, self.values[currentByte+3])
-						self.putUnknownByte(bitData, currentBit+32, self.values[currentByte+4])
-						self.putUnknownByte(bitData, currentBit+40, self.values[currentByte+5])
-						self.putUnknownByte(bitData, currentBit+48, self.values[currentByte+6])
-						self.putUnknownByte(bitData, currentBit+56, self.values[currentByte+7])
-						self.putUnknownByte(bitData, currentBit+64, self.values[currentByte+8])
-						self.putUnknownByte(bitData, currentBit+72, self.values[currentByte+9])
-					else:
-						self.put(bitData[3][currentBit+10][0], bitData[3][currentBit+17][2], self.out_ann,
-							[10, ['UNRECOGNIZED VALUE']])
-					
-					currentBit += (10*8)
-					currentByte += 10
-				elif self.values[currentByte] == 0xC8:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+79][2], self.out_ann,
-						[15, ['LCD Text']])
-
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[3, ['LCD Text']])
-
-					self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-						[11, ['Unsure']])
-					self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-						[9, ['Which segment?']])
-					if self.values[currentByte+1] == 0x02:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Non-final segment?']])
-					elif self.values[currentByte+1] == 0x01:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[3, ['Final segment?']])
-					else:
-						self.put(bitData[3][currentBit+8][0], bitData[3][currentBit+15][2], self.out_ann,
-							[10, ['UNRECOGNIZED VALUE']])
-						
-					self.putStaticByte(bitData, currentBit+16, self.values[currentByte+2], 0x00)
-
-					splicedValues = self.values[(currentByte+3):(currentByte+10)]
-					self.put(bitData[3][currentBit+24][0], bitData[3][currentBit+31][2], self.out_ann,
-						[9, ['String position 1']])
-					self.putLCDCharacter(bitData, currentBit+24, splicedValues, 0)
-					self.put(bitData[3][currentBit+32][0], bitData[3][currentBit+39][2], self.out_ann,
-						[9, ['String position 2']])
-					self.putLCDCharacter(bitData, currentBit+32, splicedValues, 1)
-					self.put(bitData[3][currentBit+40][0], bitData[3][currentBit+47][2], self.out_ann,
-						[9, ['String position 3']])
-					self.putLCDCharacter(bitData, currentBit+40, splicedValues, 2)
-					self.put(bitData[3][currentBit+48][0], bitData[3][currentBit+55][2], self.out_ann,
-						[9, ['String position 4']])
-					self.putLCDCharacter(bitData, currentBit+48, splicedValues, 3)
-					self.put(bitData[3][currentBit+56][0], bitData[3][currentBit+63][2], self.out_ann,
-						[9, ['String position 5']])
-					self.putLCDCharacter(bitData, currentBit+56, splicedValues, 4)
-					self.put(bitData[3][currentBit+64][0], bitData[3][currentBit+71][2], self.out_ann,
-						[9, ['String position 6']])
-					self.putLCDCharacter(bitData, currentBit+64, splicedValues, 5)
-					self.put(bitData[3][currentBit+72][0], bitData[3][currentBit+79][2], self.out_ann,
-						[9, ['String position 7']])
-					self.putLCDCharacter(bitData, currentBit+72, splicedValues, 6)
-
-					currentBit += (11*8)
-					currentByte += 11
-				else:
-					self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
-						[10, ['UNRECOGNIZED VALUE']])
-					currentBit += 8
-					currentByte += 1
-					notDone = False
-
-		if currentBit < 96:
-			self.put(bitData[3][currentBit][0], bitData[3][95][2], self.out_ann,
-				[9, ['Segment not used by recognized message types']])
-			self.put(bitData[3][currentBit][0], bitData[3][95][2], self.out_ann,
-				[12, ['Segment not used by recognized message types']])
-		
-		while currentBit < 96:
-			if self.values[currentByte] == 0x00:
-				currentBit += 8
-				currentByte += 1
-			else:
-				self.put(bitData[3][currentBit][0], bitData[3][currentBit+7][2], self.out_ann,
+	def expandLCDText(self, bitData, currentBit, currentByte):
+		if self.values[currentByte+1] in (0x01, 0x02):
+			self.playerState.queueUpdate(LCD_TEXT_SEGMENT, (bytes(self.values[(currentByte+3):(currentByte+10)]), self.values[currentByte+1] == 0x01))
+
+		self.putLCDText(bitData, currentBit+24, self.values[(currentByte+3):(currentByte+10)])
+
+	def putUnclaimedSlots(self, bitData, layout, slot):
+		if slot >= BLOCK_DATA_SLOTS:
+			return
+		self.put(bitData[3][layout.slotStarts[slot]][0], bitData[3][layout.lastBits[BLOCK_DATA_SLOTS-1]][2], self.out_ann,
+			[9, ['Segment not used by recognized message types']])
+		self.put(bitData[3][layout.slotStarts[slot]][0], bitData[3][layout.lastBits[BLOCK_DATA_SLOTS-1]][2], self.out_ann,
+			[12, ['Segment not used by recognized message types']])
+
+		for slot in range(slot, BLOCK_DATA_SLOTS):
+			if self.values[layout.valueIndices[slot]] != 0x00:
+				self.put(bitData[3][layout.firstBits[slot]][0], bitData[3][layout.lastBits[slot]][2], self.out_ann,
 					[10, ['Unclaimed byte is nonzero!']])
-				currentBit += 8
-				currentByte += 1
-	
-	def putPlayerDataBlock(self, bitData, currentBit):
-		#put up basic data about the message segment
-		self.put(bitData[3][currentBit][0], bitData[3][(currentBit+87)][2], self.out_ann,
-			[1, ['Player data block?']])
-		self.put(bitData[3][currentBit][0], bitData[3][currentBit+87][2], self.out_ann,
-			[7, ['Player', 'P']])
 
-		self.putValueLSBFirst(bitData, currentBit, 8)
-		self.putValueLSBFirst(bitData, currentBit+8, 8)
-		self.putValueLSBFirst(bitData, currentBit+16, 8)
-		self.putValueLSBFirst(bitData, currentBit+24, 8)
-		self.putValueLSBFirst(bitData, currentBit+32, 8)
-		self.putValueLSBFirst(bitData, currentBit+40, 8)
-		self.putValueLSBFirst(bitData, currentBit+48, 8)
-		self.putValueLSBFirst(bitData, currentBit+56, 8)
-		self.putValueLSBFirst(bitData, currentBit+64, 8)
-		self.putValueLSBFirst(bitData, currentBit+72, 8)
-		self.put(bitData[3][currentBit+80][0], bitData[3][currentBit+87][2], self.out_ann,
+	def expandPlayerDataBlock(self, bitData, currentBit, packetType):
+		layout = PLAYER_BLOCK_LAYOUT
+		slot = 0
+
+		while slot < BLOCK_DATA_SLOTS and self.values[layout.valueIndices[slot]] != 0x00:
+			self.put(bitData[3][layout.firstBits[slot]][0], bitData[3][layout.lastBits[slot]][2], self.out_ann,
+				[9, ['Packet type']])
+			playerPacketType = self.playerPacketTypes.get(self.values[layout.valueIndices[slot]])
+			if playerPacketType is None:
+				self.put(bitData[3][layout.firstBits[slot]][0], bitData[3][layout.lastBits[slot]][2], self.out_ann,
+					[10, ['UNRECOGNIZED VALUE']])
+				slot += 1
+				break
+
+			self.expandPacket(bitData, playerPacketType, layout, slot)
+			slot += playerPacketType.length
+
+		self.putUnclaimedSlots(bitData, layout, slot)
+	
+	def putBlockChecksum(self, bitData, layout, value):
+		firstBit = layout.firstBits[BLOCK_DATA_SLOTS]
+		lastBit = layout.lastBits[BLOCK_DATA_SLOTS]
+		self.put(bitData[3][firstBit][0], bitData[3][lastBit][2], self.out_ann,
 			[9, ['Checksum']])
 		tempCalcedChecksum = self.checksum
-		tempReceivedChecksum = self.putValueLSBFirst(bitData, currentBit+80, 8)
-		if tempCalcedChecksum == tempReceivedChecksum:
-			self.put(bitData[3][currentBit+80][0], bitData[3][currentBit+87][2], self.out_ann,
+		tempReceivedChecksum = self.putByteValue(bitData, firstBit, lastBit, value)
+		self.checksumValid = tempCalcedChecksum == tempReceivedChecksum
+		if self.checksumValid:
+			self.put(bitData[3][firstBit][0], bitData[3][lastBit][2], self.out_ann,
 				[3, ['Checksum, calculated value 0x%02X, valid!' % tempCalcedChecksum]])
 		else:
-			self.put(bitData[3][currentBit+80][0], bitData[3][currentBit+87][2], self.out_ann,
+			self.put(bitData[3][firstBit][0], bitData[3][lastBit][2], self.out_ann,
 				[6, ['Checksum, calculated value 0x%02X, invalid!' % tempCalcedChecksum]])
 
+	def putPlayerDataBlock(self, bitData, currentBit):
+		layout = PLAYER_BLOCK_LAYOUT
+		blockValues = layout.extractBytes(self.messageValue)
+
+		#put up basic data about the message segment
+		self.put(bitData[3][layout.slotStarts[0]][0], bitData[3][layout.lastBits[BLOCK_DATA_SLOTS]][2], self.out_ann,
+			[1, ['Player data block?']])
+		self.put(bitData[3][layout.slotStarts[0]][0], bitData[3][layout.lastBits[BLOCK_DATA_SLOTS]][2], self.out_ann,
+			[7, ['Player', 'P']])
+
+		for slot in range(BLOCK_DATA_SLOTS):
+			self.putByteValue(bitData, layout.firstBits[slot], layout.lastBits[slot], blockValues[slot])
+		self.putBlockChecksum(bitData, layout, blockValues[BLOCK_DATA_SLOTS])
+
 		self.expandPlayerDataBlock(bitData, currentBit, self.values[2])
 	
-	def putRemoteDataBlockTransfer(self, bitData, currentBit):
-		self.put(bitData[3][currentBit][0], bitData[3][currentBit][2], self.out_ann,
+	def putRemoteDataBlockTransfer(self, bitData, layout, slot):
+		self.put(bitData[3][layout.slotStarts[slot]][0], bitData[3][layout.slotStarts[slot]][2], self.out_ann,
 			[7, ['Player', 'P']])
-		self.put(bitData[3][currentBit+1][0], bitData[3][currentBit+8][2], self.out_ann,
+		self.put(bitData[3][layout.firstBits[slot]][0], bitData[3][layout.lastBits[slot]][2], self.out_ann,
 			[8, ['Remote', 'R']])
-		return self.putValueLSBFirst(bitData, currentBit+1, 8)
 
 	def expandRemoteDataBlock(self, bitData, currentBit, packetType):
-		self.put(bitData[3][currentBit+1][0], bitData[3][currentBit+8][2], self.out_ann,
+		layout = REMOTE_BLOCK_LAYOUT
+		self.put(bitData[3][layout.firstBits[0]][0], bitData[3][layout.lastBits[0]][2], self.out_ann,
 			[9, ['Packet type?']])
 		
-		if packetType == 0x83:
-			self.put(bitData[3][currentBit+1][0], bitData[3][currentBit+8][2], self.out_ann,
-				[11, ['Unsure']])
-			self.put(bitData[3][currentBit+1][0], bitData[3][currentBit+8][2], self.out_ann,
-				[3, ['Serial number?']])
-
-			self.putUnknownByte(bitData, currentBit+10, self.values[3])
-			self.putUnknownByte(bitData, currentBit+19, self.values[4])
-			self.putUnknownByte(bitData, currentBit+28, self.values[5])
-			self.putUnknownByte(bitData, currentBit+37, self.values[6])
-
-			currentBit += 45
-		elif packetType == 0xC0:
-			self.put(bitData[3][currentBit+1][0], bitData[3][currentBit+8][2], self.out_ann,
-				[3, ['Remote capabilities']])
-
-			self.put(bitData[3][currentBit+10][0], bitData[3][currentBit+17][2], self.out_ann,
-				[11, ['Unsure']])
-			self.put(bitData[3][currentBit+10][0], bitData[3][currentBit+17][2], self.out_ann,
-				[9, ['Which block?']])
-			if self.values[3] == 0x01:
-				self.put(bitData[3][currentBit+10][0], bitData[3][currentBit+17][2], self.out_ann,
-					[3, ['First block, LCD capabilities?']])
-				
-				self.putUnknownByte(bitData, currentBit+19, self.values[4])
-				self.putUnknownByte(bitData, currentBit+28, self.values[5])
-				self.putUnknownByte(bitData, currentBit+37, self.values[6])
-				self.putUnknownByte(bitData, currentBit+46, self.values[7])
-				self.putUnknownByte(bitData, currentBit+55, self.values[8])
-
-				self.put(bitData[3][currentBit+64][0], bitData[3][currentBit+71][2], self.out_ann,
-					[11, ['Unsure']])
-				self.put(bitData[3][currentBit+64][0], bitData[3][currentBit+71][2], self.out_ann,
-					[9, ['Pixels tall?']])
-				self.put(bitData[3][currentBit+64][0], bitData[3][currentBit+71][2], self.out_ann,
-					[3, ['Pixels tall: %d' % self.values[9]]])
-				self.put(bitData[3][currentBit+73][0], bitData[3][currentBit+80][2], self.out_ann,
-					[11, ['Unsure']])
-				self.put(bitData[3][currentBit+73][0], bitData[3][currentBit+80][2], self.out_ann,
-					[9, ['Pixels wide?']])
-				self.put(bitData[3][currentBit+73][0], bitData[3][currentBit+80][2], self.out_ann,
-					[3, ['Pixels wide: %d' % self.values[10]]])
-				self.put(bitData[3][currentBit+82][0], bitData[3][currentBit+89][2], self.out_ann,
-					[11, ['Unsure']])
-				self.put(bitData[3][currentBit+82][0], bitData[3][currentBit+89][2], self.out_ann,
-					[9, ['Character sets supported?']])
-				currentBit += 90
-			elif self.values[3] == 0x02:
-				self.put(bitData[3][currentBit+10][0], bitData[3][currentBit+17][2], self.out_ann,
-					[3, ['Second block?']])
-
-				self.put(bitData[3][currentBit+19][0], bitData[3][currentBit+26][2], self.out_ann,
-					[11, ['Unsure']])
-				self.put(bitData[3][currentBit+19][0], bitData[3][currentBit+26][2], self.out_ann,
-					[9, ['Characters displayed?']])
-				self.put(bitData[3][currentBit+19][0], bitData[3][currentBit+26][2], self.out_ann,
-					[3, ['Characters displayed: %d' % self.values[4]]])
-
-				self.putUnknownByte(bitData, currentBit+28, self.values[5])
-				self.putUnknownByte(bitData, currentBit+37, self.values[6])
-				self.putUnknownByte(bitData, currentBit+46, self.values[7])
-				self.putUnknownByte(bitData, currentBit+55, self.values[8])
-				self.putUnknownByte(bitData, currentBit+64, self.values[9])
-				self.putUnknownByte(bitData, currentBit+73, self.values[10])
-				self.putUnknownByte(bitData, currentBit+82, self.values[11])
-
-				currentBit += 90
-			elif self.values[3] == 0x05:
-				self.put(bitData[3][currentBit+10][0], bitData[3][currentBit+17][2], self.out_ann,
-					[3, ['Fifth block?']])
-				
-				self.putUnknownByte(bitData, currentBit+19, self.values[4])
-				self.putUnknownByte(bitData, currentBit+28, self.values[5])
-				self.putUnknownByte(bitData, currentBit+37, self.values[6])
-				self.putUnknownByte(bitData, currentBit+46, self.values[7])
-				self.putUnknownByte(bitData, currentBit+55, self.values[8])
-				self.putUnknownByte(bitData, currentBit+64, self.values[9])
-				self.putUnknownByte(bitData, currentBit+73, self.values[10])
-				self.putUnknownByte(bitData, currentBit+82, self.values[11])
-
-				currentBit += 90
-			else:
-				self.put(bitData[3][currentBit+10][0], bitData[3][currentBit+17][2], self.out_ann,
+		remotePacketType = self.remotePacketTypes.get(packetType)
+		if remotePacketType is None:
+			self.put(bitData[3][layout.firstBits[0]][0], bitData[3][layout.lastBits[0]][2], self.out_ann,
 					[10, ['UNRECOGNIZED VALUE']])
+			slot = 1
+		elif self.expandPacket(bitData, remotePacketType, layout, 0):
+			slot = remotePacketType.length
 		else:
-			self.put(bitData[3][currentBit+1][0], bitData[3][currentBit+8][2], self.out_ann,
-					[10, ['UNRECOGNIZED VALUE']])
-			currentBit += 9
+			slot = 0
 		
-		if currentBit < 106:
-			self.put(bitData[3][currentBit][0], bitData[3][105][2], self.out_ann,
-				[9, ['Segment not used by recognized message types']])
-			self.put(bitData[3][currentBit][0], bitData[3][105][2], self.out_ann,
-				[12, ['Segment not used by recognized message types']])
-		
-		while currentBit < 106:
-			if self.values[int(2+((currentBit-16)/9))] == 0x00:
-				currentBit += 9
-			else:
-				self.put(bitData[3][currentBit+1][0], bitData[3][currentBit+8][2], self.out_ann,
-					[10, ['Unclaimed byte is nonzero!']])
-				currentBit += 9
+		self.putUnclaimedSlots(bitData, layout, slot)
 	
 	def putRemoteDataBlock(self, bitData, currentBit):
+		layout = REMOTE_BLOCK_LAYOUT
+		blockValues = layout.extractBytes(self.messageValue)
+
 		#put up basic data about the transfer
-		self.put(bitData[3][currentBit][0], bitData[3][currentBit+98][2], self.out_ann,
+		self.put(bitData[3][layout.slotStarts[0]][0], bitData[3][layout.lastBits[BLOCK_DATA_SLOTS]][2], self.out_ann,
 			[1, ['Remote Data Block (With timing bits from Player)']])
-		self.putRemoteDataBlockTransfer(bitData, currentBit)
-		self.putRemoteDataBlockTransfer(bitData, currentBit+9)
-		self.putRemoteDataBlockTransfer(bitData, currentBit+18)
-		self.putRemoteDataBlockTransfer(bitData, currentBit+27)
-		self.putRemoteDataBlockTransfer(bitData, currentBit+36)
-		self.putRemoteDataBlockTransfer(bitData, currentBit+45)
-		self.putRemoteDataBlockTransfer(bitData, currentBit+54)
-		self.putRemoteDataBlockTransfer(bitData, currentBit+63)
-		self.putRemoteDataBlockTransfer(bitData, currentBit+72)
-		self.putRemoteDataBlockTransfer(bitData, currentBit+81)
-		self.put(bitData[3][currentBit+91][0], bitData[3][currentBit+98][2], self.out_ann,
-			[9, ['Checksum']])
-		tempCalcedChecksum = self.checksum
-		tempReceivedChecksum = self.putRemoteDataBlockTransfer(bitData, currentBit+90)
-		if tempCalcedChecksum == tempReceivedChecksum:
-			self.put(bitData[3][currentBit+91][0], bitData[3][currentBit+98][2], self.out_ann,
-				[3, ['Checksum, calculated value 0x%02X, valid!' % tempCalcedChecksum]])
-		else:
-			self.put(bitData[3][currentBit+91][0], bitData[3][currentBit+98][2], self.out_ann,
-				[6, ['Checksum, calculated value 0x%02X, invalid!' % tempCalcedChecksum]])
+		for slot in range(BLOCK_DATA_SLOTS):
+			self.putRemoteDataBlockTransfer(bitData, layout, slot)
+			self.putByteValue(bitData, layout.firstBits[slot], layout.lastBits[slot], blockValues[slot])
+		self.putRemoteDataBlockTransfer(bitData, layout, BLOCK_DATA_SLOTS)
+		self.putBlockChecksum(bitData, layout, blockValues[BLOCK_DATA_SLOTS])
 
 		self.expandRemoteDataBlock(bitData, currentBit, self.values[2])
 
 
 	def expandMessage(self, bitData):
+		if self.templateCache is None:
+			self.expandMessageBits(bitData)
+		else:
+			key = (bitData[2], self.messageValue, self.tempCarryoverShiftJISByte)
+			template = self.templateCache.get(key)
+			if template is None:
+				template = self.recordTemplate(bitData)
+				self.templateCache.add(key, template)
+			else:
+				self.playerState.queueUpdates(template.updates)
+				self.checksum = template.checksum
+				self.checksumValid = template.checksumValid
+				self.tempCarryoverShiftJISByte = template.tempCarryoverShiftJISByte
+			self.replayTemplate(bitData, template)
+
+		self.putStateChanges(bitData)
+
+	def recordTemplate(self, bitData):
+		template = MessageTemplate()
+		firstUpdate = len(self.playerState.pendingUpdates)
+
+		put = self.put
+		self.put = template.record
+		try:
+			self.expandMessageBits(tokenBitData(bitData[2], self.messageValue))
+		except Exception:
+			self.put = put
+			self.replayTemplate(bitData, template)
+			raise
+		self.put = put
+
+		template.updates = self.playerState.pendingUpdates[firstUpdate:]
+		template.checksum = self.checksum
+		template.checksumValid = self.checksumValid
+		template.tempCarryoverShiftJISByte = self.tempCarryoverShiftJISByte
+		return template
+
+	def replayTemplate(self, bitData, template):
+		for (startToken, endToken, output, data) in template.puts:
+			self.put(tokenSample(bitData, startToken), tokenSample(bitData, endToken), output, data)
+
+	def expandMessageBits(self, bitData):
 		currentBit = 0
 
-		self.putBinaryMSBFirst(bitData, 0, bitData[2])
-
-		self.debugOutHex += str(bitData[2])
-		self.debugOutHex += "   "
+		if self.debugRows:
+			self.putBinaryMSBFirst(bitData, 0, bitData[2])
 
 		self.putRemoteHeader(bitData, currentBit)
 		currentBit += 8
 
-		self.debugOutHex += "   "
-
 		self.putPlayerHeader(bitData, currentBit)
 		currentBit += 8
 
-		self.debugOutHex += "   "
 		self.checksum = 0
+		self.checksumValid = True
 
-		if (bitData[3][8][3] == 0) and (bitData[3][12][3] == 0):
+		layout = blockLayout(self.messageValue)
+		if layout is PLAYER_BLOCK_LAYOUT:
 			self.putPlayerDataBlock(bitData, currentBit)
 			currentBit += 88
-		elif (bitData[3][12][3] == 1):
+		elif layout is REMOTE_BLOCK_LAYOUT:
 			if (bitData[3][4][3] == 0):
 				self.put(bitData[3][12][0], bitData[3][12][2], self.out_ann,
 					[10, ['Player ceded bus to Remote without Remote asking!']])
 			self.putRemoteDataBlock(bitData, currentBit)
 			currentBit += 99
 
-		self.put(bitData[0], bitData[1], self.out_ann,
-				[4, [self.debugOutHex]])
-		self.debugOutHex = ""
+		if self.debugRows:
+			self.putDebugHex(bitData)
 		self.values = []
 
+	def putStateChanges(self, bitData):
+		if not self.checksumValid:
+			self.playerState.discardUpdates()
+			return
+		changes = self.playerState.applyUpdates()
+		if changes:
+			self.put(bitData[0], bitData[1], self.out_python, changes)
+
+	def putIncompleteMessage(self, bitData):
+		if self.debugRows:
+			self.putBinaryMSBFirst(bitData, 0, bitData[2])
+		self.put(bitData[0], bitData[1], self.out_ann,
+			[10, ['Incomplete message, %d bits' % bitData[2]]])
+
+	def putRepeatedMessages(self, startsample, endsample, repeatCount):
+		self.put(startsample, endsample, self.out_ann,
+			[0, ['Previous message repeated %d times' % repeatCount, 'Repeated x%d' % repeatCount, 'x%d' % repeatCount]])
+
 	def putMessageEnd(self, messageEndSample):
 		self.put(messageEndSample, messageEndSample, self.out_ann,
 			[0, ['Message End', 'E']])
+
+	#With statistics on, every put goes through here to count the errors and warnings
+	def putCounted(self, startsample, endsample, output, data):
+		if output == self.out_ann:
+			self.statistics.countAnnotation(data[0], data[1][0])
+		srd.Decoder.put(self, startsample, endsample, output, data)
+
+	def putStatistics(self, endsample):
+		for line in self.statistics.summaryLines(self.samplerate):
+			srd.Decoder.put(self, self.statisticsStartSample, endsample, self.out_ann, [16, [line]])
+		values = self.statistics.metaValues(self.samplerate)
+		for (key, output) in self.out_meta:
+			srd.Decoder.put(self, self.statisticsStartSample, endsample, output, values[key])
+		self.statisticsStartSample = endsample
+		self.statisticsNextSummary = self.statistics.messages + self.statisticsInterval
 	
 	def reset(self):
 		self.state = 'IDLE'
+		self.playerState = PlayerState()
 
 		self.values = []
 
 		self.checksum = 0
+		self.messageValue = 0
 
 		self.tempCarryoverShiftJISByte = 0
 
-		self.debugOutHex = ""
-		self.debugOutBinary = ""
+		self.debugRows = True
+
+		self.templateCache = None
+
+		self.samplerate = None
+		self.statistics = None
+		self.statisticsInterval = 0
+		self.statisticsNextSummary = 0
+		self.statisticsStartSample = 0
+
+		self.messageColumns = None
 
 	def __init__(self):
 		self.reset()
 	
 	def start(self):
-		#self.out_python = self.register(srd.OUTPUT_PYTHON)
+		self.out_python = self.register(srd.OUTPUT_PYTHON)
 		self.out_ann = self.register(srd.OUTPUT_ANN)
+
+		self.debugRows = self.options['debugrows'] == 'yes'
+
+		if self.options['cachesize'] > 0:
+			self.templateCache = TemplateCache(self.options['cachesize'])
+		else:
+			self.templateCache = None
+
+		self.__dict__.pop('put', None)
+		self.statisticsInterval = self.options['statistics']
+		if self.statisticsInterval > 0:
+			self.statistics = CaptureStatistics(self.playerPacketTypes)
+			self.out_meta = [(key, self.register(srd.OUTPUT_META, meta=(metaType, name, description)))
+				for (key, metaType, name, description) in META_OUTPUTS]
+			self.statisticsNextSummary = self.statisticsInterval
+			self.put = self.putCounted
+		else:
+			self.statistics = None
+
+	def metadata(self, key, value):
+		if key == srd.SRD_CONF_SAMPLERATE:
+			self.samplerate = value
 	
+	def packBits(self, bitData):
+		value = 0
+		for whichBit in range(bitData[2]):
+			value |= bitData[3][whichBit][3] << whichBit
+		return value
+
 	def decode(self, startsample, endsample, data):
-		syncData, bitData, cleanEnd = data
+		if len(data) > 4:
+			self.putRepeatedMessages(startsample, endsample, data[4])
+			self.replayRepeats(startsample, endsample, data)
+			if self.statistics is not None:
+				self.statistics.countRepeats(startsample, endsample, data[1][2], data[3].value, self.checksumValid, data[4])
+				self.checkStatistics(endsample)
+			if self.messageColumns is not None:
+				self.messageColumns.append(startsample, endsample, data[1][2], data[3].value, self.checksumValid, data[4])
+			return
+
+		syncData, bitData, cleanEnd = data[:3]
+
+		if len(data) > 3:
+			self.messageValue = data[3].value
+		else:
+			self.messageValue = self.packBits(bitData)
 		
 		startOfBits = bitData[0]
 		endOfBits = bitData[1]
@@ -1176,6 +767,44 @@ class Decoder(srd.Decoder):
 		self.putMessageStart(startOfBits)
 		#for index, dataBit in enumerate(byteData):
 			#self.putDataByte(dataByte)
-		self.expandMessage(bitData)
+		if cleanEnd:
+			self.expandMessage(bitData)
+		else:
+			self.putIncompleteMessage(bitData)
 		self.putMessageEnd(endOfBits)
-				
+
+		if self.statistics is not None:
+			if cleanEnd:
+				self.statistics.countMessage(startOfBits, endOfBits, numberOfBits, self.messageValue, self.checksumValid)
+			else:
+				self.statistics.countIncomplete(startOfBits, endOfBits, numberOfBits)
+			self.checkStatistics(endOfBits)
+
+		if self.messageColumns is not None:
+			self.messageColumns.append(startOfBits, endOfBits, numberOfBits, self.messageValue,
+				self.checksumValid if cleanEnd else None)
+
+	def replayRepeats(self, startsample, endsample, data):
+		#Expand each repeat again for its state updates, keeping only the
+		#changes (put over the run) and the annotation counts
+		put = self.put
+		countAnnotation = self.statistics.countAnnotation if self.statistics is not None else None
+		def putRepeat(repeatStart, repeatEnd, output, putData):
+			if output == self.out_python:
+				put(startsample, endsample, output, putData)
+			elif countAnnotation is not None and output == self.out_ann:
+				countAnnotation(putData[0], putData[1][0])
+		self.put = putRepeat
+		try:
+			self.messageValue = data[3].value
+			for repeat in range(data[4]):
+				self.expandMessage(data[1])
+		finally:
+			self.put = put
+
+	def checkStatistics(self, endsample):
+		if self.statistics.messages >= self.statisticsNextSummary:
+			self.putStatistics(endsample)
+
+Decoder.playerPacketTypes = compilePacketTypes(Decoder, PLAYER_PACKET_TYPES)
+Decoder.remotePacketTypes = compilePacketTypes(Decoder, REMOTE_PACKET_TYPES)
@@ -0,0 +1,44 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Sony MD LCD Remote Shift-JIS helpers
+
+'''
+
+Lookup tables for the LCD text in 0xC8 packets.
+
+characterClasses has one entry per byte value: the first byte of a
+two-byte (full-width) character, a printable single byte, a half-width
+katakana byte, or anything else. The ranges are the ones the remote text
+decoding has always used.
+
+decodeShiftJIS() decodes one or two bytes, keeping every result so a
+character only goes through the codec the first time it is seen. A byte
+sequence that isn't valid Shift-JIS raises UnicodeDecodeError, as before.
+
+'''
+
+SJIS_OTHER = 0
+SJIS_LEAD = 1
+SJIS_PRINTABLE = 2
+SJIS_HALF_KATAKANA = 3
+
+def classifyByte(value):
+	if value in range(0x81, 0x9f) or value in range(0xe0, 0xef):
+		return SJIS_LEAD
+	if value in range(0x20, 0x7e):
+		return SJIS_PRINTABLE
+	if value in range(0xa1, 0xdf):
+		return SJIS_HALF_KATAKANA
+	return SJIS_OTHER
+
+characterClasses = bytes(classifyByte(value) for value in range(256))
+
+decodedCharacters = dict((value, bytes([value]).decode('sjis')) for value in range(256) if characterClasses[value] == SJIS_PRINTABLE)
+
+def decodeShiftJIS(first, second=None):
+	key = first if second is None else (first << 8) | second
+	text = decodedCharacters.get(key)
+	if text is None:
+		text = bytes([first, second]).decode('sjis')
+		decodedCharacters[key] = text
+	return text
@@ -0,0 +1,66 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Sony MD LCD Remote player/remote state model
+
+'''
+
+What the Player has told the Remote so far (and the Remote the Player),
+kept up to date one decoded message at a time.
+
+While a message is expanded, the decoder queues (field, value) updates with
+queueUpdate(). Once the message is done, applyUpdates() folds them into the
+state and returns only the fields whose value actually changed. Each update
+is a dict store and compare, so the cost per message doesn't depend on how
+much state there is.
+
+LCD text arrives in 0xC8 segments of seven bytes. Segments are collected
+until the final one and the whole string (raw Shift-JIS bytes, up to the
+0xFF end marker) only becomes the 'lcdText' field then.
+
+'''
+
+LCD_TEXT_SEGMENT = 'lcdTextSegment'
+LCD_TEXT_END = 0xFF
+
+class PlayerState:
+	def __init__(self):
+		self.reset()
+
+	def reset(self):
+		self.fields = {}
+		self.pendingUpdates = []
+		self.lcdTextSegments = []
+
+	def queueUpdate(self, field, value):
+		self.pendingUpdates.append((field, value))
+
+	def queueUpdates(self, updates):
+		self.pendingUpdates.extend(updates)
+
+	def discardUpdates(self):
+		self.pendingUpdates = []
+
+	def addTextSegment(self, segment, isFinal, changes):
+		self.lcdTextSegments.append(segment)
+		if isFinal:
+			text = b''.join(self.lcdTextSegments)
+			self.lcdTextSegments = []
+			end = text.find(LCD_TEXT_END)
+			if end >= 0:
+				text = text[:end]
+			self.setField('lcdText', text, changes)
+
+	def setField(self, field, value, changes):
+		if field not in self.fields or self.fields[field] != value:
+			self.fields[field] = value
+			changes[field] = value
+
+	def applyUpdates(self):
+		changes = {}
+		for (field, value) in self.pendingUpdates:
+			if field == LCD_TEXT_SEGMENT:
+				self.addTextSegment(value[0], value[1], changes)
+			else:
+				self.setField(field, value, changes)
+		self.pendingUpdates = []
+		return changes
@@ -0,0 +1,146 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Sony MD LCD Remote capture statistics
+
+from .layout import PLAYER_BLOCK_LAYOUT, BLOCK_DATA_SLOTS, blockLayout
+
+'''
+
+Running totals over a whole capture, so that a capture can be checked
+without exporting and going through every annotation.
+
+Everything but the error and warning counts is worked out from each
+message's bits, so messages replayed from the template cache count the
+same as ones that were expanded:
+	messages, by bit count, with incomplete messages and runs of repeats
+		collapsed by sony_md counted on their own as well, every repeat
+		in a run counting the same as if it had been put out on its own
+	player packet type bytes, every one in a Player data block
+	remote block types, the packet type byte of a Remote data block
+	valid and invalid data block checksums
+	first and last sample of the messages, for messages per second of
+		capture time
+
+errors and warnings count the annotations on the Errors and Warnings rows
+by their text, through the Decoder's putCounted().
+
+The Decoder's 'statistics' option turns this on and sets how many messages
+go between summaries. Each summary of the totals so far is put as
+annotations over the messages since the last one, and as the numbers in
+META_OUTPUTS on OUTPUT_META.
+
+'''
+
+#(key, type, name, description) of each OUTPUT_META output
+META_OUTPUTS = (
+	('messages', int, 'Messages', 'Messages decoded so far'),
+	('messagesPerSecond', float, 'Messages per second', 'Messages per second of capture time'),
+	('checksumsValid', int, 'Valid checksums', 'Data blocks with a valid checksum'),
+	('checksumsInvalid', int, 'Invalid checksums', 'Data blocks with an invalid checksum'),
+	('errorCount', int, 'Errors', 'Error annotations'),
+	('warningCount', int, 'Warnings', 'Warning annotations'),
+)
+
+def countKey(counts, key, count=1):
+	counts[key] = counts.get(key, 0) + count
+
+class CaptureStatistics:
+	def __init__(self, playerPacketTypes):
+		self.playerPacketTypes = playerPacketTypes
+
+		self.messages = 0
+		self.bitCounts = {}
+		self.incomplete = 0
+		self.repeatRuns = 0
+		self.repeatedMessages = 0
+		self.playerPacketTypeCounts = {}
+		self.remoteBlockTypeCounts = {}
+		self.checksumsValid = 0
+		self.checksumsInvalid = 0
+		self.errors = {}
+		self.warnings = {}
+
+		self.firstSample = None
+		self.lastSample = None
+
+	def countSpan(self, startsample, endsample):
+		if self.firstSample is None:
+			self.firstSample = startsample
+		self.lastSample = endsample
+
+	def countMessage(self, startsample, endsample, bitCount, messageValue, checksumValid):
+		self.countSpan(startsample, endsample)
+		self.messages += 1
+		countKey(self.bitCounts, bitCount)
+		self.countBlock(messageValue, checksumValid)
+
+	def countBlock(self, messageValue, checksumValid, count=1):
+		layout = blockLayout(messageValue)
+		if layout is None:
+			return
+		values = layout.extractBytes(messageValue)
+		if layout is PLAYER_BLOCK_LAYOUT:
+			slot = 0
+			while slot < BLOCK_DATA_SLOTS and values[slot] != 0x00:
+				countKey(self.playerPacketTypeCounts, values[slot], count)
+				packetType = self.playerPacketTypes.get(values[slot])
+				if packetType is None:
+					break
+				slot += packetType.length
+		else:
+			countKey(self.remoteBlockTypeCounts, values[0], count)
+
+		if checksumValid:
+			self.checksumsValid += count
+		else:
+			self.checksumsInvalid += count
+
+	def countIncomplete(self, startsample, endsample, bitCount):
+		self.countSpan(startsample, endsample)
+		self.messages += 1
+		self.incomplete += 1
+		countKey(self.bitCounts, bitCount)
+
+	def countRepeats(self, startsample, endsample, bitCount, messageValue, checksumValid, repeatCount):
+		self.countSpan(startsample, endsample)
+		self.messages += repeatCount
+		self.repeatRuns += 1
+		self.repeatedMessages += repeatCount
+		countKey(self.bitCounts, bitCount, repeatCount)
+		self.countBlock(messageValue, checksumValid, repeatCount)
+
+	def countAnnotation(self, annotationClass, text):
+		if annotationClass == 10:
+			countKey(self.errors, text)
+		elif annotationClass == 11:
+			countKey(self.warnings, text)
+
+	def messagesPerSecond(self, samplerate):
+		if not samplerate or self.firstSample is None or self.lastSample <= self.firstSample:
+			return 0.0
+		return self.messages * samplerate / (self.lastSample - self.firstSample)
+
+	def metaValues(self, samplerate):
+		return {
+			'messages': self.messages,
+			'messagesPerSecond': self.messagesPerSecond(samplerate),
+			'checksumsValid': self.checksumsValid,
+			'checksumsInvalid': self.checksumsInvalid,
+			'errorCount': sum(self.errors.values()),
+			'warningCount': sum(self.warnings.values()),
+		}
+
+	def summaryLines(self, samplerate):
+		lines = ['Messages: %d (%s), %d incomplete, %d repeated in %d runs' % (self.messages,
+			', '.join('%d bits %d' % item for item in sorted(self.bitCounts.items())),
+			self.incomplete, self.repeatedMessages, self.repeatRuns)]
+		if samplerate:
+			lines.append('Messages per second: %.1f' % self.messagesPerSecond(samplerate))
+		lines.append('Player packet types: ' + (', '.join('0x%02X %d' % item
+			for item in sorted(self.playerPacketTypeCounts.items())) or 'none'))
+		lines.append('Remote block types: ' + (', '.join('0x%02X %d' % item
+			for item in sorted(self.remoteBlockTypeCounts.items())) or 'none'))
+		lines.append('Checksums: %d valid, %d invalid' % (self.checksumsValid, self.checksumsInvalid))
+		lines.append('Errors: ' + (', '.join('%s %d' % item for item in sorted(self.errors.items())) or 'none'))
+		lines.append('Warnings: ' + (', '.join('%s %d' % item for item in sorted(self.warnings.items())) or 'none'))
+		return lines
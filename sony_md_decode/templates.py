@@ -0,0 +1,85 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Sony MD LCD Remote decoded message templates
+
+from collections import OrderedDict
+
+'''
+
+Cache of what expandMessage() did for a message, so that a message that
+has been seen before only has to be replayed rather than decoded again.
+
+Everything expandMessage() puts depends only on the message's bits and on
+the Shift-JIS byte carried over from the previous message, so templates are
+keyed on (bit count, packed payload, carried byte).
+
+A template is recorded by expanding the message against a stand-in bitData
+whose sample numbers are tokens naming a bit and a column of it (see
+tokenBitData()). Each annotation is stored with the tokens it was put at,
+and replaying it swaps the tokens for the new message's sample numbers.
+
+Along with the annotations, a template keeps the player/remote state
+updates that were queued, whether the checksum was valid, and the values
+that carry on to the next message.
+
+The 'cachesize' option sets how many templates are kept, least recently
+used first out, and 0 turns the cache off. The Decoder's templateCache
+counts its hits and misses.
+
+'''
+
+TOKEN_COLUMNS = 4
+#Tokens for bitData[0] and bitData[1], past the end of any message
+TOKEN_MESSAGE_START = TOKEN_COLUMNS * 128
+TOKEN_MESSAGE_END = TOKEN_MESSAGE_START + 1
+
+def tokenBitData(bitCount, messageValue):
+	bits = [[(TOKEN_COLUMNS*whichBit), (TOKEN_COLUMNS*whichBit)+1, (TOKEN_COLUMNS*whichBit)+2, (messageValue >> whichBit) & 1]
+		for whichBit in range(bitCount)]
+	return [TOKEN_MESSAGE_START, TOKEN_MESSAGE_END, bitCount, bits]
+
+def tokenSample(bitData, token):
+	if token == TOKEN_MESSAGE_START:
+		return bitData[0]
+	if token == TOKEN_MESSAGE_END:
+		return bitData[1]
+	return bitData[3][token // TOKEN_COLUMNS][token % TOKEN_COLUMNS]
+
+class MessageTemplate:
+	__slots__ = ('puts', 'updates', 'checksum', 'checksumValid', 'tempCarryoverShiftJISByte')
+
+	def __init__(self):
+		self.puts = []
+		self.updates = []
+		self.checksum = 0
+		self.checksumValid = True
+		self.tempCarryoverShiftJISByte = 0
+
+	def record(self, startToken, endToken, output, data):
+		self.puts.append((startToken, endToken, output, data))
+
+class TemplateCache:
+	def __init__(self, maximumSize):
+		self.maximumSize = maximumSize
+		self.templates = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	def get(self, key):
+		template = self.templates.get(key)
+		if template is None:
+			self.misses += 1
+		else:
+			self.hits += 1
+			self.templates.move_to_end(key)
+		return template
+
+	def add(self, key, template):
+		self.templates[key] = template
+		if len(self.templates) > self.maximumSize:
+			self.templates.popitem(last=False)
+
+	def clear(self):
+		self.templates.clear()
+		self.hits = 0
+		self.misses = 0
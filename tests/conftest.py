@@ -0,0 +1,44 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Tests run against the decoders in the checkout, under the sigrokdecode
+# stand-in from sony_md.host
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sony_md.host import install
+
+#The decoder packages import sigrokdecode as soon as they are imported
+install()
+
+from sony_md.generator import Generator, captureSamples
+
+from decoding import SAMPLERATE, mixedMessages, messageEdges, writeSession
+
+@pytest.fixture(scope='session')
+def cleanEdges():
+	return messageEdges(mixedMessages)
+
+@pytest.fixture(scope='session')
+def noisyEdges():
+	'''
+	mixedMessages three times over, with jitter, glitches and messages cut short.
+	'''
+	return messageEdges(mixedMessages * 3, jitterpct=5, glitchpct=3, truncatepct=5)
+
+@pytest.fixture(scope='module')
+def captures(tmp_path_factory):
+	'''
+	A directory of three one-second session files and one that isn't a capture.
+	'''
+	directory = tmp_path_factory.mktemp('captures')
+	sampleCount = SAMPLERATE
+	for seed in range(3):
+		edges = list(Generator(SAMPLERATE, jitterpct=5, seed=seed).captureEdges(sampleCount, resetEvery=10))
+		writeSession(str(directory / ('capture%d.sr' % seed)), captureSamples(edges, sampleCount))
+	(directory / 'broken.sr').write_bytes(b'not a capture')
+	return directory
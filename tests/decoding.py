@@ -0,0 +1,95 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Helpers shared by the tests
+
+import json
+import sys
+import zipfile
+
+from sony_md import batch
+from sony_md.generator import Generator, headerMessage, playerMessage, remoteMessage
+from sony_md.host import Host, OUTPUT_ANN, OUTPUT_PYTHON
+
+SAMPLERATE = 250000
+
+textSegment = playerMessage([0xC8, 0x02, 0x00] + list(b'ABCDEFG'))
+finalSegment = playerMessage([0xC8, 0x01, 0x00] + list(b'xy') + [0xFF] * 5)
+volume = playerMessage([0x40, 0x05])
+capabilities = remoteMessage([0xC0, 0x02, 0x0C])
+
+#Runs of repeats, LCD text over two messages, and all three message lengths
+mixedMessages = ([headerMessage()] * 3 + [textSegment, textSegment, finalSegment] + [headerMessage()] * 4
+	+ [volume] * 3 + [capabilities] * 2 + [textSegment] * 3 + [finalSegment])
+
+def messageEdges(messages, seed=1, resetEvery=4, samplerate=SAMPLERATE, **generatorOptions):
+	return list(Generator(samplerate, seed=seed, **generatorOptions).messagesEdges(messages, resetEvery))
+
+def bitsValue(bits):
+	'''
+	A message's bits packed into an int, the same as its payload value.
+	'''
+	return sum(bit << whichBit for (whichBit, bit) in enumerate(bits))
+
+def decodePhysical(edges, options=None, samplerate=SAMPLERATE, sampleCount=None):
+	'''
+	sony_md after running edges through it.
+	'''
+	return Host('sony_md', samplerate, options).runEdges(edges, 0, sampleCount)
+
+def decodeLayers(edges, physicalOptions=None, decodeOptions=None, samplerate=SAMPLERATE, sampleCount=None):
+	'''
+	sony_md with sony_md_decode stacked on it, statistics on, after running
+	edges through them.
+	'''
+	decodeOptions = dict({'statistics': sys.maxsize}, **(decodeOptions or {}))
+	physical = Host('sony_md', samplerate, physicalOptions)
+	semantic = physical.stack(Host('sony_md_decode', samplerate, decodeOptions))
+	physical.runEdges(edges, 0, sampleCount)
+	return (physical, semantic)
+
+def packets(physical):
+	return [packetKey(*packet) for packet in physical.outputs[OUTPUT_PYTHON]]
+
+def changes(semantic):
+	return [data for (startsample, endsample, data) in semantic.outputs[OUTPUT_PYTHON]]
+
+def annotations(host):
+	return list(host.outputs[OUTPUT_ANN])
+
+def packetKey(startsample, endsample, data):
+	'''
+	A sony_md packet as plain values, the same for either packet format.
+	'''
+	bitData = data[1]
+	bits = [list(bitData[3][whichBit]) for whichBit in range(bitData[2])]
+	return (startsample, endsample, [list(pulse) for pulse in data[0]], [bitData[0], bitData[1], bitData[2], bits],
+		data[2], bytes(data[3].data), data[3].bitCount, data[4:])
+
+def writeSession(path, samples, samplerate=SAMPLERATE, chunkBytes=1 << 16):
+	'''
+	A sigrok session file with samples on D1 and D0 held high.
+	'''
+	data = bytes((sample << 1) | 1 for sample in samples)
+	with zipfile.ZipFile(path, 'w') as session:
+		session.writestr('version', '2')
+		session.writestr('metadata', '[global]\nsigrok version=0.5.2\n\n[device 1]\ncapturefile=logic-1\n'
+			'total probes=2\nsamplerate=%d kHz\ntotal analog=0\nprobe1=D0\nprobe2=D1\nunitsize=1\n' % (samplerate // 1000))
+		for (whichChunk, offset) in enumerate(range(0, len(data), chunkBytes)):
+			session.writestr('logic-1-%d' % (whichChunk + 1), data[offset:offset + chunkBytes])
+	return path
+
+#What differs from one batch run to the next
+batchTimings = ('seconds', 'samplesPerSecond', 'messagesPerSecond')
+
+def runBatch(tmp_path, *arguments):
+	'''
+	python -m sony_md on D1, giving its exit code, the result lines without
+	their timings, and the totals line.
+	'''
+	output = tmp_path / 'results.jsonl'
+	exitCode = batch.main(list(arguments) + ['--channel', 'D1', '--output', str(output)])
+	lines = [json.loads(line) for line in output.read_text().splitlines()]
+	for line in lines:
+		for key in batchTimings:
+			line.pop(key, None)
+	return (exitCode, lines[:-1], lines[-1])
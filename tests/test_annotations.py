@@ -0,0 +1,46 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# sony_md's 'annotations' option
+
+import pytest
+
+from sony_md.engine import Engine
+from sony_md.host import OUTPUT_ANN
+
+from decoding import SAMPLERATE, decodePhysical, packets, annotations
+
+#Signals, and the 0 and 1 bit classes
+signallingClasses = (0, 1, 2)
+
+def test_messages_level_leaves_out_signalling_and_bits(noisyEdges):
+	full = annotations(decodePhysical(noisyEdges, {'annotations': 'full'}))
+	assert any(data[0] in signallingClasses for (startsample, endsample, data) in full)
+	assert any(data[0] in (3, 4, 7) for (startsample, endsample, data) in full)
+	messages = annotations(decodePhysical(noisyEdges, {'annotations': 'messages'}))
+	assert messages == [annotation for annotation in full if annotation[2][0] not in signallingClasses]
+
+def test_none_level_puts_no_annotations(noisyEdges):
+	assert decodePhysical(noisyEdges, {'annotations': 'none'}).outputs[OUTPUT_ANN].count == 0
+
+@pytest.mark.parametrize('level', ('messages', 'none'))
+def test_packets_do_not_depend_on_the_level(noisyEdges, level):
+	assert packets(decodePhysical(noisyEdges, {'annotations': level})) == packets(decodePhysical(noisyEdges))
+
+class HookCounter(Engine):
+	def __init__(self, annotateSignalling):
+		Engine.__init__(self, SAMPLERATE)
+		self.annotateSignalling = annotateSignalling
+		self.calls = 0
+
+	def putOneBit(self):
+		self.calls += 1
+
+	def putSyncPulse(self):
+		self.calls += 1
+
+def test_hooks_are_not_called_unless_annotated(cleanEdges):
+	(annotated, headless) = (HookCounter(annotateSignalling) for annotateSignalling in (True, False))
+	for engine in (annotated, headless):
+		engine.decodeEdges(cleanEdges)
+	assert annotated.calls > 0
+	assert headless.calls == 0
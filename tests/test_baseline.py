@@ -0,0 +1,52 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Output of both decoders against that of the original decoders
+
+import hashlib
+import itertools
+import json
+import os
+
+import pytest
+
+from sony_md.generator import Generator
+from sony_md.host import Host, OUTPUT_ANN, OUTPUT_PYTHON
+
+'''
+
+baseline.json holds, for a few Generator captures, the count and SHA-256 of
+what the original sony_md and sony_md_decode put, each item as its repr():
+	physicalAnnotations, decodeAnnotations: sorted, as the order annotations
+		are put in within a message isn't part of the output
+	packets: in order, the first three elements of each OUTPUT_PYTHON packet
+		in the default 'lists' packet format, the only ones it had
+
+sony_md_decode's OUTPUT_PYTHON is left out, the original put nothing there.
+
+'''
+
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')) as baselineFile:
+	cases = json.load(baselineFile)
+
+def digest(items):
+	return hashlib.sha256('\n'.join(items).encode()).hexdigest()
+
+@pytest.mark.parametrize('case', cases, ids=lambda case: '%d-%s' % (case['samplerate'], case['options']))
+def test_matches_baseline(case):
+	samplerate = case['samplerate']
+	generatorOptions = dict(case['generator'])
+	generator = Generator(samplerate, **generatorOptions)
+	messages = list(itertools.islice(generator.realisticMessages(), case['messages']))
+	edges = list(generator.messagesEdges(messages, case['resetEvery']))
+	assert digest(map(repr, edges)) == case['edges'], 'the Generator no longer makes the same capture'
+
+	physical = Host('sony_md', samplerate, case['options'])
+	semantic = physical.stack(Host('sony_md_decode', samplerate))
+	physical.runEdges(edges)
+	streams = {
+		'physicalAnnotations': sorted(repr(item) for item in physical.outputs[OUTPUT_ANN]),
+		'packets': [repr((startsample, endsample, data[:3])) for (startsample, endsample, data) in physical.outputs[OUTPUT_PYTHON]],
+		'decodeAnnotations': sorted(repr(item) for item in semantic.outputs[OUTPUT_ANN]),
+	}
+	for (name, items) in streams.items():
+		assert (name, len(items), digest(items)) == (name, case[name]['count'], case[name]['sha256'])
@@ -0,0 +1,22 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# python -m sony_md over a directory of captures
+
+from decoding import runBatch
+
+def test_modes_give_the_same_results(captures, tmp_path):
+	(exitCode, inProcess, totals) = runBatch(tmp_path, str(captures), '--workers', '1')
+	assert exitCode == 1
+	assert [result['file'].rsplit('/', 1)[1] for result in inProcess] == ['broken.sr', 'capture0.sr', 'capture1.sr', 'capture2.sr']
+	assert 'error' in inProcess[0]
+	assert all(result['messages'] > 0 and result['changes'] for result in inProcess[1:])
+	assert (totals['files'], totals['failed'], totals['workers']) == (4, 1, 1)
+	assert totals['messages'] == sum(result['messages'] for result in inProcess[1:])
+
+	(exitCode, pooled, totals) = runBatch(tmp_path, str(captures), '--workers', '2')
+	assert pooled == inProcess
+	assert totals['workers'] == 2
+
+	(exitCode, pipelined, totals) = runBatch(tmp_path, str(captures), '--pipeline', '--workers', '8')
+	assert pipelined == inProcess
+	assert totals['workers'] == 2
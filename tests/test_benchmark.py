@@ -0,0 +1,21 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# sony_md.benchmark's records
+
+from sony_md.benchmark import runBenchmarks
+
+def test_records():
+	records = dict((record['benchmark'], record) for record in runBenchmarks([250000], ['polling'], 20, 1))
+	assert sorted(records) == ['engine-edges', 'engine-samples', 'sony_md', 'sony_md-compact', 'sony_md-headless', 'sony_md_decode']
+	for record in records.values():
+		assert record['messages'] == 20
+		assert record['allocatedBlocksPerMessage'] is not None
+		assert record['retainedBlocksPerMessage'] is not None
+	assert records['sony_md']['edges'] == records['engine-edges']['edges'] > 0
+	assert records['sony_md_decode']['edges'] is None
+	assert records['sony_md_decode']['edgesPerSecond'] is None
+
+def test_compact_packets_allocate_less():
+	records = dict((record['benchmark'], record) for record in runBenchmarks([250000], ['realistic'], 50, 1))
+	assert records['sony_md-compact']['retainedBlocksPerMessage'] < records['sony_md']['retainedBlocksPerMessage']
+	assert records['sony_md-headless']['allocatedBlocksPerMessage'] < records['sony_md']['allocatedBlocksPerMessage']
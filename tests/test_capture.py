@@ -0,0 +1,78 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Reading captures, and finding where they can be split
+
+import pytest
+
+from sony_md.capture import Capture, captureEdges, quietGaps, parseSamplerate
+from sony_md.generator import Generator, captureSamples
+
+from decoding import SAMPLERATE, writeSession
+
+sampleCount = SAMPLERATE // 2
+edges = [edge for edge in Generator(SAMPLERATE, jitterpct=5, seed=3).captureEdges(sampleCount, resetEvery=10)
+	if edge[0] < sampleCount]
+samples = captureSamples(edges, sampleCount)
+
+@pytest.fixture
+def session(tmp_path):
+	return Capture.open(writeSession(str(tmp_path / 'capture.sr'), samples, chunkBytes=10007))
+
+@pytest.fixture
+def raw(tmp_path):
+	path = tmp_path / 'capture.bin'
+	path.write_bytes(bytes((sample << 1) | 1 for sample in samples))
+	return Capture.open(str(path), SAMPLERATE)
+
+def test_parse_samplerate():
+	assert parseSamplerate('250 kHz') == 250000
+	assert parseSamplerate('1.5 MHz') == 1500000
+	assert parseSamplerate('8000') == 8000
+	with pytest.raises(ValueError):
+		parseSamplerate('fast')
+
+def test_raw_captures_need_a_samplerate(raw):
+	with pytest.raises(ValueError):
+		Capture.open(raw.path)
+
+@pytest.mark.parametrize('which', ('session', 'raw'))
+def test_edges_are_those_written(which, request):
+	capture = request.getfixturevalue(which)
+	assert (capture.samplerate, capture.sampleCount) == (SAMPLERATE, sampleCount)
+	channel = 'D1' if which == 'session' else 1
+	assert b''.join(capture.levelChunks(channel)) == bytes(samples)
+	(level, captureEdgeList) = captureEdges(capture.levelChunks(channel))
+	assert (level, list(captureEdgeList)) == (0, edges)
+	(level, heldHigh) = captureEdges(capture.levelChunks(0))
+	assert (level, list(heldHigh)) == (1, [])
+
+def test_channel_names(session):
+	assert session.channelIndex('D1') == 1
+	with pytest.raises(ValueError):
+		session.channelIndex('D7')
+
+@pytest.mark.parametrize('span', ((0, 100), (10000, 10007), (9999, 30029), (sampleCount - 5, sampleCount)))
+def test_part_of_a_capture(session, span):
+	(start, end) = span
+	assert b''.join(session.levelChunks('D1', start, end)) == bytes(samples[start:end])
+	(level, partEdges) = captureEdges(session.levelChunks('D1', start, end), start)
+	assert list(partEdges) == [edge for edge in edges if start < edge[0] < end]
+
+def slowQuietGaps(levels, minimumSamples):
+	gaps = []
+	start = None
+	for (samplenum, level) in enumerate(list(levels) + [1]):
+		if level == 0 and start is None:
+			start = samplenum
+		elif level == 1 and start is not None:
+			if start > 0 and samplenum - start >= minimumSamples:
+				gaps.append(start)
+			start = None
+	return gaps
+
+@pytest.mark.parametrize('chunkSize', (7, 1000, len(samples)))
+@pytest.mark.parametrize('minimumSamples', (1, 50, 400))
+def test_quiet_gaps(chunkSize, minimumSamples):
+	levels = bytes(samples)
+	chunks = [levels[offset:offset + chunkSize] for offset in range(0, len(levels), chunkSize)]
+	assert list(quietGaps(chunks, minimumSamples)) == slowQuietGaps(levels, minimumSamples)
@@ -0,0 +1,22 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# sony_md_decode's 'debugrows' option
+
+from decoding import mixedMessages, messageEdges, decodeLayers, changes, annotations
+
+#Debug and Debug2, the hex and binary rows
+DEBUG_CLASSES = (4, 5)
+
+def test_no_debug_rows_leaves_out_only_those(noisyEdges):
+	(physical, withRows) = decodeLayers(noisyEdges, decodeOptions={'debugrows': 'yes'})
+	(physical, withoutRows) = decodeLayers(noisyEdges, decodeOptions={'debugrows': 'no'})
+	debug = [annotation for annotation in annotations(withRows) if annotation[2][0] in DEBUG_CLASSES]
+	assert debug
+	assert annotations(withoutRows) == [annotation for annotation in annotations(withRows) if annotation[2][0] not in DEBUG_CLASSES]
+	assert changes(withoutRows) == changes(withRows)
+
+def test_hex_row_is_the_message_bytes():
+	(physical, semantic) = decodeLayers(messageEdges(mixedMessages[:1]))
+	rows = dict((row, texts[0]) for (startsample, endsample, (row, texts)) in annotations(semantic) if row in DEBUG_CLASSES)
+	assert rows[4].split() == ['16', '0x80', '0x81']
+	assert rows[5] == '0b' + ''.join(str(bit) for bit in mixedMessages[0])
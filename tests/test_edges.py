@@ -0,0 +1,28 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Finding edges and classifying pulses over a whole sample buffer
+
+import pytest
+
+from sony_md.engine import Engine, findEdges, findEdgeArrays, np
+from sony_md.generator import captureSamples
+
+from decoding import SAMPLERATE, packetKey
+
+def sampleArray(edges):
+	return np.frombuffer(captureSamples(edges, edges[-1][0] + 100), dtype=np.uint8)
+
+def test_find_edges(noisyEdges):
+	assert list(findEdges(captureSamples(noisyEdges, noisyEdges[-1][0] + 100))) == noisyEdges
+
+@pytest.mark.skipif(np is None, reason='needs NumPy')
+def test_find_edge_arrays(noisyEdges):
+	(edgeSamples, edgeLevels) = findEdgeArrays(sampleArray(noisyEdges))
+	assert list(zip(edgeSamples.tolist(), edgeLevels.tolist())) == noisyEdges
+
+@pytest.mark.skipif(np is None, reason='needs NumPy')
+@pytest.mark.parametrize('timeout', (False, True))
+def test_array_decode_is_the_same(noisyEdges, timeout):
+	fromArrays = Engine(SAMPLERATE, timeout=timeout).decodeSamples(sampleArray(noisyEdges))
+	fromEdges = Engine(SAMPLERATE, timeout=timeout).decodeEdges(noisyEdges)
+	assert [packetKey(*packet) for packet in fromArrays] == [packetKey(*packet) for packet in fromEdges]
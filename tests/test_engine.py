@@ -0,0 +1,23 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# The offline Engine against sony_md's Decoder
+
+import pytest
+
+from sony_md.engine import Engine
+from sony_md.generator import captureSamples
+
+from decoding import SAMPLERATE, decodePhysical, packets, packetKey
+
+@pytest.mark.parametrize('timeout', (False, True))
+@pytest.mark.parametrize('collapseRepeats', (False, True))
+def test_engine_puts_the_same_packets(noisyEdges, timeout, collapseRepeats):
+	options = {'timeout': 'yes' if timeout else 'no', 'repeats': 'collapse' if collapseRepeats else 'show'}
+	engine = Engine(SAMPLERATE, timeout=timeout, collapseRepeats=collapseRepeats)
+	assert [packetKey(*packet) for packet in engine.decodeEdges(noisyEdges)] == packets(decodePhysical(noisyEdges, options))
+
+def test_samples_decode_the_same_as_edges(noisyEdges):
+	samples = captureSamples(noisyEdges, noisyEdges[-1][0] + 1)
+	fromSamples = Engine(SAMPLERATE).decodeSamples(samples)
+	fromEdges = Engine(SAMPLERATE).decodeEdges(noisyEdges)
+	assert [packetKey(*packet) for packet in fromSamples] == [packetKey(*packet) for packet in fromEdges]
@@ -0,0 +1,59 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# sony_md_decode's message columns
+
+import pytest
+
+from sony_md.host import Host, OUTPUT_PYTHON
+from sony_md_decode.export import MessageColumns, PAYLOAD_BYTES, np
+
+from decoding import SAMPLERATE, mixedMessages, volume, capabilities, bitsValue
+
+def decodeColumns(edges, repeats):
+	physical = Host('sony_md', SAMPLERATE, {'repeats': repeats})
+	semantic = physical.stack(Host('sony_md_decode', SAMPLERATE))
+	semantic.decoder.messageColumns = MessageColumns()
+	physical.runEdges(edges)
+	return (list(physical.outputs[OUTPUT_PYTHON]), semantic.decoder.messageColumns)
+
+@pytest.mark.parametrize('repeats', ('show', 'collapse'))
+def test_one_row_per_packet(cleanEdges, repeats):
+	(packets, messageColumns) = decodeColumns(cleanEdges, repeats)
+	columns = messageColumns.columns
+	assert len(messageColumns) == len(packets)
+	assert sum(columns['repeatCount']) == len(mixedMessages)
+	for (row, (startsample, endsample, data)) in enumerate(packets):
+		assert (columns['startsample'][row], columns['endsample'][row]) == (startsample, endsample)
+		assert columns['bitCount'][row] == data[1][2]
+		assert columns['repeatCount'][row] == (data[4] if len(data) > 4 else 1)
+		payload = messageColumns.payload[row * PAYLOAD_BYTES:(row + 1) * PAYLOAD_BYTES]
+		assert int.from_bytes(payload, 'little') == data[3].value
+		assert columns['remoteHeader'][row] == payload[0]
+		assert columns['playerHeader'][row] == payload[1]
+
+def test_data_block_columns(cleanEdges):
+	(packets, messageColumns) = decodeColumns(cleanEdges, 'show')
+	columns = messageColumns.columns
+	values = [data[3].value for (startsample, endsample, data) in packets]
+	for (message, packetType) in ((volume, 0x40), (capabilities, 0xC0)):
+		row = values.index(bitsValue(message))
+		assert (columns['checksumValid'][row], columns['packetType'][row]) == (1, packetType)
+
+def test_incomplete_messages_have_no_data_block():
+	messageColumns = MessageColumns()
+	messageColumns.append(10, 20, 12, 0x40C8, None)
+	assert (messageColumns.columns['checksumValid'][0], messageColumns.columns['packetType'][0]) == (-1, -1)
+
+@pytest.mark.skipif(np is None, reason='needs NumPy')
+def test_save_npz(cleanEdges, tmp_path):
+	(packets, messageColumns) = decodeColumns(cleanEdges, 'collapse')
+	path = str(tmp_path / 'columns.npz')
+	messageColumns.save(path)
+	with np.load(path) as saved:
+		assert saved['payload'].shape == (len(packets), PAYLOAD_BYTES)
+		assert saved['repeatCount'].tolist() == messageColumns.columns['repeatCount'].tolist()
+
+@pytest.mark.skipif(np is not None, reason='NumPy is installed')
+def test_save_without_numpy(tmp_path):
+	with pytest.raises(RuntimeError):
+		MessageColumns().save(str(tmp_path / 'columns.npz'))
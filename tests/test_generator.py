@@ -0,0 +1,36 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# The synthetic bus signal Generator
+
+from sony_md.generator import Generator, captureSamples, sampleChunks, headerMessage, playerMessage
+from sony_md.host import Host, OUTPUT_PYTHON
+
+from decoding import SAMPLERATE
+
+def realisticEdges(seed, **options):
+	generator = Generator(SAMPLERATE, seed=seed, **options)
+	return list(generator.captureEdges(SAMPLERATE))
+
+def test_same_seed_same_capture():
+	assert realisticEdges(1, jitterpct=5, glitchpct=5, truncatepct=5) == realisticEdges(1, jitterpct=5, glitchpct=5, truncatepct=5)
+	assert realisticEdges(1, jitterpct=5) != realisticEdges(2, jitterpct=5)
+
+def test_edges_alternate_within_the_capture():
+	edges = realisticEdges(3, jitterpct=5, glitchpct=5, truncatepct=5)
+	assert edges[0] == (1, 1)
+	assert all(edge[0] < SAMPLERATE for edge in edges)
+	assert all(later[0] > earlier[0] and later[1] != earlier[1] for (earlier, later) in zip(edges, edges[1:]))
+
+def test_clean_messages_decode_as_sent():
+	messages = [headerMessage(), playerMessage([0x40, 0x05])] * 5
+	generator = Generator(SAMPLERATE, jitterpct=10, seed=4)
+	physical = Host('sony_md', SAMPLERATE).runEdges(generator.messagesEdges(messages, resetEvery=3))
+	packets = list(physical.outputs[OUTPUT_PYTHON])
+	assert [[bit[3] for bit in data[1][3]] for (startsample, endsample, data) in packets] == messages
+
+def test_sample_chunks():
+	edges = realisticEdges(5)
+	samples = captureSamples(edges, SAMPLERATE)
+	assert len(samples) == SAMPLERATE
+	assert b''.join(sampleChunks(edges, SAMPLERATE, chunkLength=1000)) == bytes(samples)
+	assert samples[0] == 0 and samples[1] == 1
@@ -0,0 +1,38 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# The in-process decoder Host
+
+import pytest
+
+from sony_md import host
+from sony_md.generator import captureSamples
+from sony_md.host import Host, OUTPUT_ANN, OUTPUT_PYTHON, OUTPUT_META
+
+from decoding import SAMPLERATE, mixedMessages, annotations
+
+def test_install_uses_the_stand_in_without_libsigrokdecode():
+	assert host.install() is host.standIn
+
+def test_unknown_options_are_refused():
+	with pytest.raises(ValueError):
+		Host('sony_md', SAMPLERATE, {'nosuchoption': 1})
+
+def test_outputs_left_out_of_collect_are_only_counted(cleanEdges):
+	collected = Host('sony_md', SAMPLERATE).runEdges(cleanEdges)
+	counted = Host('sony_md', SAMPLERATE, collect=()).runEdges(cleanEdges)
+	for outputType in (OUTPUT_ANN, OUTPUT_PYTHON):
+		assert len(counted.outputs[outputType]) == 0
+		assert counted.outputs[outputType].count == collected.outputs[outputType].count > 0
+
+def test_samples_decode_the_same_as_edges(cleanEdges):
+	fromEdges = Host('sony_md', SAMPLERATE).runEdges(cleanEdges)
+	fromSamples = Host('sony_md', SAMPLERATE).runSamples(captureSamples(cleanEdges, cleanEdges[-1][0] + 1))
+	assert annotations(fromSamples) == annotations(fromEdges)
+
+def test_stack_sends_packets_on(cleanEdges):
+	physical = Host('sony_md', SAMPLERATE)
+	semantic = physical.stack(Host('sony_md_decode', SAMPLERATE, {'statistics': 5}))
+	physical.runEdges(cleanEdges)
+	assert physical.outputs[OUTPUT_PYTHON].count == len(mixedMessages)
+	assert annotations(semantic)
+	assert ('Messages', 5) in [data for (startsample, endsample, data) in semantic.outputs[OUTPUT_META]]
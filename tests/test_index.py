@@ -0,0 +1,88 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# The message index, and decoding part of a capture with it
+
+import bisect
+
+import pytest
+
+from sony_md.capture import Capture, captureEdges
+from sony_md.generator import Generator, captureSamples
+from sony_md.host import Host, OUTPUT_PYTHON
+from sony_md.index import MessageIndex, decodeWindow, indexPath
+
+from decoding import SAMPLERATE, writeSession, packetKey, changes
+
+sampleCount = 2 * SAMPLERATE
+
+@pytest.fixture(scope='module')
+def capture(tmp_path_factory):
+	generator = Generator(SAMPLERATE, jitterpct=5, truncatepct=5, seed=5)
+	edges = list(generator.captureEdges(sampleCount, resetEvery=5))
+	path = str(tmp_path_factory.mktemp('index') / 'capture.sr')
+	return Capture.open(writeSession(path, captureSamples(edges, sampleCount)))
+
+@pytest.fixture(scope='module')
+def wholePackets(capture):
+	physical = Host('sony_md', capture.samplerate)
+	(level, edges) = captureEdges(capture.levelChunks('D1'))
+	physical.runEdges(edges, level, capture.sampleCount)
+	return [packetKey(*packet) for packet in physical.outputs[OUTPUT_PYTHON]]
+
+@pytest.fixture(scope='module')
+def index(capture):
+	return MessageIndex.build(capture, 'D1')
+
+def test_index_has_every_packet(index, wholePackets, capture):
+	assert list(index.starts) == [packet[0] for packet in wholePackets]
+	assert list(index.ends) == [packet[1] for packet in wholePackets]
+	assert list(index.bitCounts) == [packet[6] for packet in wholePackets]
+
+def test_save_and_load(index, capture, tmp_path):
+	path = indexPath(str(tmp_path / 'capture.sr'))
+	index.save(path)
+	loaded = MessageIndex.load(path)
+	assert (loaded.samplerate, loaded.sampleCount, loaded.options()) == (index.samplerate, index.sampleCount, index.options())
+	for column in ('starts', 'ends', 'bitCounts', 'hashes'):
+		assert getattr(loaded, column) == getattr(index, column)
+
+	with open(path, 'r+b') as indexFile:
+		indexFile.truncate(indexFile.seek(0, 2) - 1)
+	with pytest.raises(ValueError):
+		MessageIndex.load(path)
+
+@pytest.mark.parametrize('window', ((0, 0.1), (0.3, 0.35), (0.5, 1.5), (1.9, 2)))
+def test_window_decodes_the_same_as_whole(index, wholePackets, capture, window):
+	(start, end) = (int(seconds * capture.samplerate) for seconds in window)
+	physical = decodeWindow(capture, index, start, end, 'D1')
+	packets = [packetKey(*packet) for packet in physical.outputs[OUTPUT_PYTHON]]
+	first = wholePackets.index(packets[0])
+	assert packets == wholePackets[first:first + len(packets)]
+	wanted = [packet for packet in wholePackets if start <= packet[0] < end]
+	assert wanted and all(packet in packets for packet in wanted)
+
+def test_window_ends_on_the_next_messages_first_rising_edge(index, capture):
+	(start, end) = (int(0.3 * capture.samplerate), int(0.35 * capture.samplerate))
+	physical = decodeWindow(capture, index, start, end, 'D1')
+	nextStart = index.starts[bisect.bisect_left(index.starts, end)]
+	(level, edges) = captureEdges(capture.levelChunks('D1'))
+	risingEdge = next(samplenum for (samplenum, level) in edges if samplenum > nextStart)
+	assert physical.decoder.newedgesample == risingEdge
+	assert physical.decoder.lastedgesample == nextStart
+
+def test_window_with_a_stacked_decoder(index, capture):
+	semantic = Host('sony_md_decode', capture.samplerate)
+	decodeWindow(capture, index, 0, capture.sampleCount, 'D1', stack=semantic)
+	whole = Host('sony_md', capture.samplerate)
+	wholeSemantic = whole.stack(Host('sony_md_decode', capture.samplerate))
+	(level, edges) = captureEdges(capture.levelChunks('D1'))
+	whole.runEdges(edges, level, capture.sampleCount)
+	assert changes(semantic) == changes(wholeSemantic)
+
+def test_index_must_match(index, capture):
+	with pytest.raises(ValueError):
+		decodeWindow(capture, index, 0, 1000, 'D1', {'marginpct': 30})
+	changed = MessageIndex.build(capture, 'D1')
+	changed.hashes[0] ^= 1
+	with pytest.raises(ValueError):
+		decodeWindow(capture, changed, 0, 1000, 'D1')
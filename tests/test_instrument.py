@@ -0,0 +1,50 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# sony_md's 'instrumentation' option
+
+import collections
+
+import pytest
+
+from sony_md.engine import Engine
+from sony_md.host import Host, OUTPUT_ANN, OUTPUT_PYTHON
+from sony_md.instrument import Instrumentation, detach
+from sony_md.machine import StateMachine, STATE_NAMES
+
+from decoding import SAMPLERATE, decodePhysical, packets
+
+#Instrumentation row
+INSTRUMENTATION_CLASS = 8
+
+@pytest.mark.parametrize('instrumentation', ('counts', 'timing'))
+def test_counts_without_changing_the_output(noisyEdges, instrumentation):
+	plain = decodePhysical(noisyEdges, {'timeout': 'yes'})
+	counted = decodePhysical(noisyEdges, {'instrumentation': instrumentation, 'timeout': 'yes'})
+	assert packets(counted) == packets(plain)
+
+	counters = counted.decoder.instrumentation
+	assert sum(counters.edges) == len(noisyEdges)
+	assert counters.packets == dict(collections.Counter(data[1][2] for (startsample, endsample, data) in counted.outputs[OUTPUT_PYTHON]))
+	assert counters.errors
+	assert (counters.nanoseconds is not None) == (instrumentation == 'timing')
+
+	summary = [texts[0] for (startsample, endsample, (row, texts)) in counted.outputs[OUTPUT_ANN] if row == INSTRUMENTATION_CLASS]
+	assert summary == counters.summaryLines()
+	nonInstrumentation = [annotation for annotation in counted.outputs[OUTPUT_ANN] if annotation[2][0] != INSTRUMENTATION_CLASS]
+	assert nonInstrumentation == list(plain.outputs[OUTPUT_ANN])
+
+def test_detach(noisyEdges):
+	engine = Engine(SAMPLERATE)
+	counters = Instrumentation()
+	counters.attach(engine)
+	assert engine.dispatch is not StateMachine.dispatch
+	detach(engine)
+	assert engine.dispatch is StateMachine.dispatch
+	engine.decodeEdges(noisyEdges)
+	assert sum(counters.edges) == 0
+
+def test_as_dict(noisyEdges):
+	counters = decodePhysical(noisyEdges, {'instrumentation': 'counts'}).decoder.instrumentation
+	result = counters.asDict()
+	assert sorted(result['edges']) == sorted(STATE_NAMES)
+	assert sum(result['packets'].values()) == sum(counters.packets.values())
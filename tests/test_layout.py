@@ -0,0 +1,34 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Data block slot layouts
+
+from sony_md.generator import playerMessage, remoteMessage, headerMessage, checksum
+from sony_md_decode.layout import PLAYER_BLOCK_LAYOUT, REMOTE_BLOCK_LAYOUT, BLOCK_SLOTS, blockLayout
+
+from decoding import bitsValue
+
+block = [0xC0, 0x02, 0x0C, 0x11, 0x22, 0x33, 0x44, 0x55, 0x66, 0x77]
+
+def test_player_block_bytes():
+	values = PLAYER_BLOCK_LAYOUT.extractBytes(bitsValue(playerMessage(block)))
+	assert values == block + [checksum(block)]
+
+def test_remote_block_bytes():
+	assert REMOTE_BLOCK_LAYOUT.extractBytes(bitsValue(remoteMessage(block)))[:-1] == block
+
+def test_both_layouts_give_the_same_checksum():
+	playerValues = PLAYER_BLOCK_LAYOUT.extractBytes(bitsValue(playerMessage(block)))
+	remoteValues = REMOTE_BLOCK_LAYOUT.extractBytes(bitsValue(remoteMessage(block)))
+	assert playerValues == remoteValues
+
+def test_slots():
+	assert len(PLAYER_BLOCK_LAYOUT.slotStarts) == len(REMOTE_BLOCK_LAYOUT.slotStarts) == BLOCK_SLOTS
+	assert PLAYER_BLOCK_LAYOUT.firstBits == PLAYER_BLOCK_LAYOUT.slotStarts
+	assert REMOTE_BLOCK_LAYOUT.firstBits == tuple(slotStart + 1 for slotStart in REMOTE_BLOCK_LAYOUT.slotStarts)
+	assert REMOTE_BLOCK_LAYOUT.lastBits[-1] == len(remoteMessage(block)) - 1
+	assert PLAYER_BLOCK_LAYOUT.lastBits[-1] == len(playerMessage(block)) - 1
+
+def test_block_layout_from_the_header():
+	assert blockLayout(bitsValue(playerMessage(block))) is PLAYER_BLOCK_LAYOUT
+	assert blockLayout(bitsValue(remoteMessage(block))) is REMOTE_BLOCK_LAYOUT
+	assert blockLayout(bitsValue(headerMessage())) is None
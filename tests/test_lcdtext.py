@@ -0,0 +1,58 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# 0xC8 LCD text segments and their Shift-JIS
+
+import pytest
+
+from sony_md.generator import lcdTextMessages
+from sony_md_decode.shiftjis import *
+
+from decoding import messageEdges, decodeLayers, changes, annotations
+
+def test_character_classes():
+	assert characterClasses[ord('A')] == SJIS_PRINTABLE
+	assert characterClasses[0x82] == SJIS_LEAD
+	assert characterClasses[0xB1] == SJIS_HALF_KATAKANA
+	assert characterClasses[0xFF] == SJIS_OTHER
+
+def test_decode_single_and_full_width():
+	assert decodeShiftJIS(ord('A')) == 'A'
+	assert decodeShiftJIS(0x82, 0xA0) == 'あ'
+	assert decodeShiftJIS(0x82, 0xA0) == 'あ'
+
+def test_invalid_sequence_raises():
+	with pytest.raises(UnicodeDecodeError):
+		decodeShiftJIS(0x82, 0x20)
+
+#Data Field Values and Unsure rows
+VALUE_CLASS = 3
+UNSURE_CLASS = 11
+
+def textAnnotations(text):
+	(physical, semantic) = decodeLayers(messageEdges(lcdTextMessages(text)))
+	texts = [texts[0] for (startsample, endsample, (row, texts)) in annotations(semantic) if row in (VALUE_CLASS, UNSURE_CLASS)]
+	return (changes(semantic), texts)
+
+def characters(texts):
+	return [text for text in texts if len(text) == 1]
+
+def test_ascii():
+	(stateChanges, texts) = textAnnotations(b'Hello,MD!!')
+	assert stateChanges == [{'lcdText': b'Hello,MD!!'}]
+	assert ''.join(characters(texts)) == 'Hello,MD!!'
+	assert texts.count('<End of string>, 0xFF') == 4
+
+def test_full_width_in_one_segment():
+	(stateChanges, texts) = textAnnotations(b'A\x82\xa0B')
+	assert characters(texts) == ['A', 'あ', 'B']
+
+def test_full_width_across_segments():
+	(stateChanges, texts) = textAnnotations(b'ABCDEF\x82\xa0G')
+	assert stateChanges == [{'lcdText': b'ABCDEF\x82\xa0G'}]
+	assert characters(texts) == ['A', 'B', 'C', 'D', 'E', 'F', 'あ', 'G']
+	assert 'First byte of 2-byte SJIS sequence, see next message for remainder and decode.' in texts
+	assert 'This is the second-half of a full-width SJIS, taking the first half from the previous message.' in texts
+
+def test_half_width_katakana():
+	(stateChanges, texts) = textAnnotations(b'A\xb1B')
+	assert "SJIS half-width katakana - shouldn't be possible" in texts
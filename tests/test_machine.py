@@ -0,0 +1,36 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# sony_md's state machine dispatch tables
+
+from sony_md.machine import *
+
+from decoding import SAMPLERATE, mixedMessages
+
+def test_dispatch_follows_the_rules():
+	for (state, (rules, default)) in StateMachine.stateRules.items():
+		for pulseClass in range(PULSE_CLASS_COUNT):
+			matching = [handler for (ruleClasses, handler) in rules if pulseClass & ruleClasses]
+			assert StateMachine.dispatch[state][pulseClass] is (matching[0] if matching else default)
+
+def test_first_matching_rule_wins():
+	idle = StateMachine.dispatch[STATE_IDLE]
+	assert idle[PULSE_RESET | PULSE_PRESYNC] is StateMachine.handleIdleReset
+	assert idle[PULSE_SYNC | PULSE_SHORT_BIT] is StateMachine.handleIdleDataBit
+	assert idle[0] is StateMachine.handleIdleOther
+
+class PacketCollector(StateMachine):
+	def __init__(self):
+		StateMachine.__init__(self)
+		self.configure(SAMPLERATE)
+		self.packets = []
+
+	def putPacket(self, packet):
+		self.packets.append(packet)
+
+def test_messages_end_in_idle(cleanEdges):
+	machine = PacketCollector()
+	for (samplenum, level) in cleanEdges:
+		machine.handleEdge(level, samplenum)
+	assert machine.state == STATE_IDLE
+	assert [packet[1][2] for packet in machine.packets] == [len(bits) for bits in mixedMessages]
+	assert all(packet[2] for packet in machine.packets)
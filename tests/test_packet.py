@@ -0,0 +1,45 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# sony_md's compact packet format
+
+import pickle
+
+import pytest
+
+from sony_md.host import OUTPUT_PYTHON
+from sony_md.packet import BitBuffer
+
+from decoding import decodePhysical, packets, annotations
+
+@pytest.mark.parametrize('timeout', ('no', 'yes'))
+def test_compact_packets_hold_the_same_values(noisyEdges, timeout):
+	(lists, compact) = (decodePhysical(noisyEdges, {'packetformat': packetformat, 'timeout': timeout})
+		for packetformat in ('lists', 'compact'))
+	assert packets(compact) == packets(lists)
+	assert annotations(compact) == annotations(lists)
+
+def test_compact_packets_are_not_reused(noisyEdges):
+	compact = list(decodePhysical(noisyEdges, {'packetformat': 'compact'}).outputs[OUTPUT_PYTHON])
+	assert len(set(id(data[1][3]) for (startsample, endsample, data) in compact)) == len(compact)
+
+def test_bit_buffer():
+	bits = BitBuffer()
+	bits.append(10, 15, 20, 1)
+	bits.append(20, 25, 30, 0)
+	assert len(bits) == 2
+	assert tuple(bits[0]) == (10, 15, 20, 1)
+	assert tuple(bits[-1]) == (20, 25, 30, 0)
+	assert bits[1][-1] == 0
+	with pytest.raises(IndexError):
+		bits[2]
+
+def test_bit_buffer_pickles_only_its_bits():
+	bits = BitBuffer()
+	for whichBit in range(16):
+		bits.append(whichBit * 10, whichBit * 10 + 5, whichBit * 10 + 10, whichBit & 1)
+	pickled = pickle.dumps(bits)
+	assert len(pickled) < 8 * 3 * 16 + 200
+	restored = pickle.loads(pickled)
+	assert [tuple(row) for row in restored] == [tuple(row) for row in bits]
+	restored.append(1, 2, 3, 1)
+	assert len(restored) == 17
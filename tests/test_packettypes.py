@@ -0,0 +1,56 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# sony_md_decode's packet type registry
+
+import pytest
+
+from sony_md.generator import playerMessage, remoteMessage
+from sony_md_decode.layout import BLOCK_SLOTS
+from sony_md_decode.packettypes import PLAYER_PACKET_TYPES, REMOTE_PACKET_TYPES
+from sony_md_decode.pd import Decoder
+
+from decoding import messageEdges, decodeLayers, annotations
+
+registries = (('player', PLAYER_PACKET_TYPES, Decoder.playerPacketTypes, playerMessage),
+	('remote', REMOTE_PACKET_TYPES, Decoder.remotePacketTypes, remoteMessage))
+
+def typeBlocks(packetTypes):
+	for (typeByte, packetType) in sorted(packetTypes.items()):
+		for blockByte in sorted(packetType.blocks or (0x00,)):
+			yield (typeByte, blockByte, packetType)
+
+@pytest.mark.parametrize('registry', registries, ids=lambda registry: registry[0])
+def test_packet_types_fit_their_block(registry):
+	(name, packetTypes, compiled, makeMessage) = registry
+	for (typeByte, packetType) in packetTypes.items():
+		assert 0 <= typeByte <= 0xFF
+		assert 1 <= packetType.length <= BLOCK_SLOTS
+		assert packetType.commandLength <= packetType.length
+		fields = list(packetType.fields)
+		for block in (packetType.blocks or {}).values():
+			fields += block.fields
+		for field in fields:
+			assert 1 <= field.offset < packetType.length
+			assert field.putter.startswith('put')
+
+@pytest.mark.parametrize('registry', registries, ids=lambda registry: registry[0])
+def test_packet_types_are_compiled_onto_the_decoder(registry):
+	(name, packetTypes, compiled, makeMessage) = registry
+	assert sorted(compiled) == sorted(packetTypes)
+	for (typeByte, packetType) in packetTypes.items():
+		for (putter, field) in compiled[typeByte].fields:
+			assert putter is getattr(Decoder, field.putter)
+		if packetType.handler is not None:
+			assert compiled[typeByte].handler is getattr(Decoder, packetType.handler)
+
+@pytest.mark.parametrize('registry', registries, ids=lambda registry: registry[0])
+def test_every_packet_type_decodes(registry):
+	(name, packetTypes, compiled, makeMessage) = registry
+	typeBlockList = list(typeBlocks(packetTypes))
+	messages = [makeMessage([typeByte, blockByte]) for (typeByte, blockByte, packetType) in typeBlockList]
+	(physical, semantic) = decodeLayers(messageEdges(messages))
+	commands = set(text for (startsample, endsample, (row, texts)) in annotations(semantic) if row == 15 for text in texts)
+	for (typeByte, blockByte, packetType) in typeBlockList:
+		if packetType.command is not None:
+			assert packetType.command in commands
+	assert semantic.decoder.statistics.messages == len(messages)
@@ -0,0 +1,44 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# The packed payload in sony_md's packets
+
+import pickle
+
+import pytest
+
+from sony_md.generator import headerMessage, playerMessage, remoteMessage
+from sony_md.host import OUTPUT_PYTHON
+from sony_md.packet import Payload, MAXIMUM_BIT_COUNT
+
+from decoding import messageEdges, decodePhysical, bitsValue
+
+capabilities = [0xC0, 0x02, 0x0C]
+
+@pytest.mark.parametrize('packetformat', ('lists', 'compact'))
+def test_payload_is_the_message_bits(packetformat):
+	messages = [headerMessage(), playerMessage([0x40, 0x05]), remoteMessage(capabilities)]
+	physical = decodePhysical(messageEdges(messages), {'packetformat': packetformat})
+	packets = list(physical.outputs[OUTPUT_PYTHON])
+	assert [data[3] for (startsample, endsample, data) in packets] == \
+		[Payload(len(bits), bitsValue(bits)) for bits in messages]
+	for (startsample, endsample, data) in packets:
+		assert data[3].value == bitsValue(data[1][3][whichBit][3] for whichBit in range(data[1][2]))
+
+def test_payload_bytes():
+	payload = Payload(32, bitsValue(playerMessage([0x40, 0x05])[:32]))
+	assert payload.data == bytes((0x80, 0x80, 0x40, 0x05))
+	assert payload.remoteData == b''
+
+def test_remote_data_block():
+	bits = remoteMessage(capabilities)
+	assert len(bits) == MAXIMUM_BIT_COUNT
+	payload = Payload(len(bits), bitsValue(bits))
+	assert payload.data[:2] == bytes((0x90, 0x91))
+	assert payload.remoteData[:3] == bytes(capabilities)
+	assert len(payload.remoteData) == 11
+
+def test_payload_pickles_and_compares():
+	payload = Payload(16, 0x8180)
+	assert pickle.loads(pickle.dumps(payload)) == payload
+	assert hash(Payload(16, 0x8180)) == hash(payload)
+	assert Payload(17, 0x8180) != payload
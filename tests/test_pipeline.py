@@ -0,0 +1,38 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Pipelined decoding against decoding in this process
+
+import pytest
+
+from sony_md.capture import Capture, captureEdges
+from sony_md.generator import Generator, captureSamples
+from sony_md.host import Host, OUTPUT_PYTHON
+from sony_md.pipeline import runPipeline
+
+from decoding import SAMPLERATE, writeSession, changes, annotations
+
+@pytest.fixture(scope='module')
+def capture(tmp_path_factory):
+	sampleCount = SAMPLERATE
+	edges = list(Generator(SAMPLERATE, jitterpct=5, truncatepct=5, seed=11).captureEdges(sampleCount, resetEvery=5))
+	path = str(tmp_path_factory.mktemp('pipeline') / 'capture.sr')
+	return Capture.open(writeSession(path, captureSamples(edges, sampleCount)))
+
+def decodeHere(capture, options):
+	physical = Host('sony_md', capture.samplerate, options)
+	semantic = physical.stack(Host('sony_md_decode', capture.samplerate))
+	(level, edges) = captureEdges(capture.levelChunks('D1'))
+	physical.runEdges(edges, level, capture.sampleCount)
+	return (physical.outputs[OUTPUT_PYTHON].count, semantic)
+
+@pytest.mark.parametrize('options', ({}, {'repeats': 'collapse'}, {'packetformat': 'lists', 'timeout': 'yes'}))
+def test_pipeline_decodes_the_same(capture, options):
+	(packetCount, semantic) = decodeHere(capture, options)
+	pipelined = Host('sony_md_decode', capture.samplerate)
+	assert runPipeline(capture, 'D1', options, pipelined, batchPackets=3, queueBatches=2) == packetCount
+	assert changes(pipelined) == changes(semantic)
+	assert annotations(pipelined) == annotations(semantic)
+
+def test_errors_come_back(capture):
+	with pytest.raises(ValueError):
+		runPipeline(capture, 'D7', {}, Host('sony_md_decode', capture.samplerate))
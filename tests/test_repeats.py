@@ -0,0 +1,49 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Collapsing runs of repeated messages
+
+from sony_md.engine import Engine
+
+from decoding import SAMPLERATE, mixedMessages, packetKey, decodeLayers, changes
+
+def decodeBoth(edges, **options):
+	return [Engine(SAMPLERATE, collapseRepeats=collapseRepeats, **options).decodeEdges(edges) for collapseRepeats in (False, True)]
+
+def test_collapse_puts_runs_as_one_packet(cleanEdges):
+	(shown, collapsed) = decodeBoth(cleanEdges)
+	assert len(shown) == len(mixedMessages)
+	assert len(collapsed) < len(shown)
+	assert sum(data[4] if len(data) > 4 else 1 for (startsample, endsample, data) in collapsed) == len(mixedMessages)
+
+def test_a_run_covers_its_messages(cleanEdges):
+	(shown, collapsed) = decodeBoth(cleanEdges)
+	index = 0
+	for (startsample, endsample, data) in collapsed:
+		if len(data) > 4:
+			run = shown[index:(index + data[4])]
+			assert (startsample, endsample) == (run[0][0], run[-1][1])
+			assert [packet[2][3] for packet in run] == [data[3]] * data[4]
+			index += data[4]
+		else:
+			assert packetKey(startsample, endsample, data) == packetKey(*shown[index])
+			index += 1
+	assert index == len(shown)
+
+def test_compact_packets_collapse_the_same(cleanEdges):
+	(shownLists, collapsedLists) = decodeBoth(cleanEdges)
+	(shownCompact, collapsedCompact) = decodeBoth(cleanEdges, compactPackets=True)
+	assert [packetKey(*packet) for packet in collapsedCompact] == [packetKey(*packet) for packet in collapsedLists]
+
+def test_collapse_loses_no_messages_from_a_noisy_capture(noisyEdges):
+	(shown, collapsed) = decodeBoth(noisyEdges, timeout=True)
+	assert sum(data[4] if len(data) > 4 else 1 for (startsample, endsample, data) in collapsed) == len(shown)
+
+def test_collapse_keeps_state_changes(cleanEdges):
+	((shown, shownSemantic), (collapsed, collapsedSemantic)) = [decodeLayers(cleanEdges, {'repeats': repeats}) for repeats in ('show', 'collapse')]
+	assert changes(shownSemantic)[0] == {'lcdText': b'ABCDEFGABCDEFGxy'}
+	assert changes(collapsedSemantic) == changes(shownSemantic)
+
+def test_collapse_keeps_state_changes_with_template_cache_off(cleanEdges):
+	(shown, shownSemantic) = decodeLayers(cleanEdges, {'repeats': 'show'}, {'cachesize': 0})
+	(collapsed, collapsedSemantic) = decodeLayers(cleanEdges, {'repeats': 'collapse'}, {'cachesize': 0})
+	assert changes(collapsedSemantic) == changes(shownSemantic)
@@ -0,0 +1,45 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Splitting a capture against decoding it whole
+
+import pytest
+
+from sony_md.capture import Capture, captureEdges
+from sony_md.generator import Generator, captureSamples
+from sony_md.host import Host
+from sony_md.split import captureSegments, decodeSegments
+
+from decoding import SAMPLERATE, writeSession, packets, packetKey, runBatch
+
+sampleCount = 2 * SAMPLERATE
+
+@pytest.fixture(scope='module')
+def capture(tmp_path_factory):
+	generator = Generator(SAMPLERATE, jitterpct=5, glitchpct=1, truncatepct=10, seed=7)
+	edges = list(generator.captureEdges(sampleCount, resetEvery=5))
+	path = str(tmp_path_factory.mktemp('split') / 'capture.sr')
+	return Capture.open(writeSession(path, captureSamples(edges, sampleCount)))
+
+def wholePackets(capture, options):
+	physical = Host('sony_md', capture.samplerate, options)
+	(level, edges) = captureEdges(capture.levelChunks('D1'))
+	return packets(physical.runEdges(edges, level, capture.sampleCount))
+
+@pytest.mark.parametrize('options', ({}, {'timeout': 'yes'}, {'packetformat': 'compact', 'annotations': 'none'}))
+@pytest.mark.parametrize('segmentSeconds', (0.05, 0.3))
+def test_split_decodes_the_same_as_whole(capture, options, segmentSeconds):
+	segments = captureSegments(capture, 'D1', options, int(segmentSeconds * capture.samplerate))
+	assert len(segments) > 2
+	assert segments[0][0] == 0 and segments[-1][1] == capture.sampleCount
+	assert [packetKey(*packet) for packet in decodeSegments(map, capture, 'D1', options, segments)] == wholePackets(capture, options)
+
+def test_collapse_is_refused(capture):
+	with pytest.raises(ValueError):
+		captureSegments(capture, 'D1', {'repeats': 'collapse'}, capture.samplerate)
+
+def test_split_gives_the_same_results(captures, tmp_path):
+	(exitCode, whole, totals) = runBatch(tmp_path, str(captures), '--workers', '1')
+	(exitCode, split, totals) = runBatch(tmp_path, str(captures), '--workers', '2', '--split', '0.1')
+	for result in split:
+		assert result.pop('segments', 2) > 1
+	assert split == whole
@@ -0,0 +1,73 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# sony_md_decode's state model and the changes it puts
+
+from sony_md.generator import headerMessage, playerMessage, remoteMessage, lcdTextMessages
+from sony_md.host import OUTPUT_PYTHON
+from sony_md_decode.state import PlayerState, LCD_TEXT_SEGMENT
+
+from decoding import messageEdges, decodeLayers, changes
+
+def test_only_changes_are_returned():
+	state = PlayerState()
+	state.queueUpdate('volume', 5)
+	state.queueUpdate('trackNumber', 7)
+	assert state.applyUpdates() == {'volume': 5, 'trackNumber': 7}
+	state.queueUpdate('volume', 5)
+	assert state.applyUpdates() == {}
+	state.queueUpdate('volume', 6)
+	assert state.applyUpdates() == {'volume': 6}
+
+def test_discarded_updates_change_nothing():
+	state = PlayerState()
+	state.queueUpdate('volume', 5)
+	state.discardUpdates()
+	assert state.applyUpdates() == {}
+	assert state.fields == {}
+
+def test_lcd_text_is_applied_once_whole():
+	state = PlayerState()
+	state.queueUpdate(LCD_TEXT_SEGMENT, (b'Track 0', False))
+	assert state.applyUpdates() == {}
+	state.queueUpdate(LCD_TEXT_SEGMENT, (b'1\xff\xff\xff\xff\xff\xff', True))
+	assert state.applyUpdates() == {'lcdText': b'Track 01'}
+	state.queueUpdate(LCD_TEXT_SEGMENT, (b'Track 0', False))
+	state.queueUpdate(LCD_TEXT_SEGMENT, (b'1\xff\xff\xff\xff\xff\xff', True))
+	assert state.applyUpdates() == {}
+
+def decodeChanges(messages):
+	(physical, semantic) = decodeLayers(messageEdges(messages))
+	return changes(semantic)
+
+def badChecksum(bits):
+	return bits[:-1] + [bits[-1] ^ 1]
+
+def test_fields():
+	assert decodeChanges([
+		headerMessage(),
+		playerMessage([0x40, 0x05]),
+		playerMessage([0xA0, 0x00, 0x00, 0x00, 0x07]),
+		remoteMessage([0xC0, 0x01] + list(range(1, 9))),
+		playerMessage([0x40, 0xFF]),
+	]) == [
+		{'volume': 5},
+		{'trackNumberShown': True, 'trackNumber': 7},
+		{'remoteCapabilities1': bytes(range(1, 9))},
+		{'volume': 32},
+	]
+
+def test_only_changes_are_put():
+	assert decodeChanges([playerMessage([0x40, 0x05])] * 3 + [playerMessage([0x40, 0x06]), playerMessage([0x40, 0x05])]) == \
+		[{'volume': 5}, {'volume': 6}, {'volume': 5}]
+
+def test_invalid_checksums_change_nothing():
+	assert decodeChanges([badChecksum(playerMessage([0x40, 0x05])), playerMessage([0x40, 0x06])]) == [{'volume': 6}]
+
+def test_changes_cover_their_message():
+	messages = [headerMessage(), playerMessage([0x40, 0x05])]
+	(physical, semantic) = decodeLayers(messageEdges(messages))
+	(packet,) = [packet for packet in physical.outputs[OUTPUT_PYTHON] if packet[2][1][2] > 16]
+	assert list(semantic.outputs[OUTPUT_PYTHON]) == [(packet[0], packet[1], {'volume': 5})]
+
+def test_lcd_text_is_put_once_whole():
+	assert decodeChanges(lcdTextMessages(b'Track 01: a long title')) == [{'lcdText': b'Track 01: a long title'}]
@@ -0,0 +1,25 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# sony_md_decode's capture statistics
+
+from decoding import textSegment, volume, capabilities, messageEdges, decodeLayers
+
+def totals(semantic):
+	statistics = semantic.decoder.statistics
+	return (statistics.messages, statistics.bitCounts, statistics.playerPacketTypeCounts,
+		statistics.remoteBlockTypeCounts, statistics.checksumsValid, statistics.checksumsInvalid,
+		statistics.errors, statistics.warnings)
+
+def test_counts_messages_and_block_types():
+	(physical, semantic) = decodeLayers(messageEdges([textSegment, volume, capabilities, volume]))
+	statistics = semantic.decoder.statistics
+	assert statistics.messages == 4
+	assert statistics.playerPacketTypeCounts == {0xC8: 1, 0x40: 2}
+	assert statistics.remoteBlockTypeCounts == {0xC0: 1}
+	assert (statistics.checksumsValid, statistics.checksumsInvalid) == (4, 0)
+
+def test_collapsed_repeats_count_the_same_as_shown(cleanEdges):
+	(shown, shownSemantic) = decodeLayers(cleanEdges, {'repeats': 'show'})
+	(collapsed, collapsedSemantic) = decodeLayers(cleanEdges, {'repeats': 'collapse'})
+	assert collapsedSemantic.decoder.statistics.repeatRuns > 0
+	assert totals(collapsedSemantic) == totals(shownSemantic)
@@ -0,0 +1,44 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# sony_md_decode's template cache
+
+import itertools
+
+import pytest
+
+from sony_md.generator import Generator, lcdTextMessages
+from sony_md_decode.templates import TemplateCache, tokenBitData, tokenSample, TOKEN_MESSAGE_START, TOKEN_MESSAGE_END
+
+from decoding import SAMPLERATE, decodeLayers, changes, annotations
+
+generator = Generator(SAMPLERATE, jitterpct=5, glitchpct=1, seed=13)
+messages = list(itertools.islice(generator.realisticMessages(), 300)) + lcdTextMessages(b'ABCDEF\x82\xa0G') * 2
+edges = list(generator.messagesEdges(messages, resetEvery=20))
+
+def test_least_recently_used_goes_first():
+	cache = TemplateCache(2)
+	cache.add('a', 1)
+	cache.add('b', 2)
+	assert cache.get('a') == 1
+	cache.add('c', 3)
+	assert (cache.get('b'), cache.get('a'), cache.get('c')) == (None, 1, 3)
+	assert (cache.hits, cache.misses) == (3, 1)
+
+def test_tokens_name_the_samples():
+	tokens = tokenBitData(16, 0x8180)
+	assert [bit[3] for bit in tokens[3]] == [(0x8180 >> whichBit) & 1 for whichBit in range(16)]
+	bitData = [1000, 2000, 16, [[10*whichBit, 10*whichBit + 5, 10*whichBit + 9, 0] for whichBit in range(16)]]
+	assert tokenSample(bitData, TOKEN_MESSAGE_START) == 1000
+	assert tokenSample(bitData, TOKEN_MESSAGE_END) == 2000
+	for whichBit in range(16):
+		for column in range(3):
+			assert tokenSample(bitData, tokens[3][whichBit][column]) == bitData[3][whichBit][column]
+
+@pytest.mark.parametrize('cachesize', (2, 256))
+def test_cache_gives_the_same_output(cachesize):
+	(physical, uncached) = decodeLayers(edges, decodeOptions={'cachesize': 0})
+	(physical, cached) = decodeLayers(edges, decodeOptions={'cachesize': cachesize})
+	assert cached.decoder.templateCache.hits > 0
+	assert len(cached.decoder.templateCache.templates) <= cachesize
+	assert annotations(cached) == annotations(uncached)
+	assert changes(cached) == changes(uncached)
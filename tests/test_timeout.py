@@ -0,0 +1,36 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# sony_md's 'timeout' option
+
+import pytest
+
+from sony_md.generator import headerMessage, playerMessage
+from sony_md.host import OUTPUT_ANN, OUTPUT_PYTHON
+
+from decoding import SAMPLERATE, messageEdges, decodePhysical, packets
+
+#A header, then a message that stops 40 edges short
+edges = messageEdges([headerMessage(), playerMessage([0x40, 0x05])], resetEvery=0)[:-40]
+sampleCount = edges[-1][0] + SAMPLERATE // 10
+
+def decode(options):
+	return decodePhysical(edges, options, sampleCount=sampleCount)
+
+def test_without_timeout_the_message_waits():
+	packets = list(decode({'timeout': 'no'}).outputs[OUTPUT_PYTHON])
+	assert [data[1][2] for (startsample, endsample, data) in packets] == [16]
+
+@pytest.mark.parametrize('annotations', ('full', 'messages', 'none'))
+def test_timeout_flushes_the_message(annotations):
+	physical = decode({'timeout': 'yes', 'annotations': annotations})
+	packets = list(physical.outputs[OUTPUT_PYTHON])
+	assert [(data[1][2], data[2]) for (startsample, endsample, data) in packets] == [(16, True), (84, False)]
+	assert packets[1][1] == edges[-1][0]
+	if annotations == 'none':
+		assert physical.outputs[OUTPUT_ANN].count == 0
+	else:
+		assert 'Timeout' in [text for (startsample, endsample, (row, texts)) in physical.outputs[OUTPUT_ANN] for text in texts]
+
+def test_packets_do_not_depend_on_annotations():
+	(full, none) = (packets(decode({'timeout': 'yes', 'annotations': annotations})) for annotations in ('full', 'none'))
+	assert none == full
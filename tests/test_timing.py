@@ -0,0 +1,45 @@
+## Copyright (C) 2021 Ryan "Izzy" Bales <izzy84075@gmail.com>
+
+# Pulse classification
+
+import pytest
+
+from sony_md.timing import *
+
+def windowClasses(timing, pulselength):
+	windows = (
+		(PULSE_RESET, timing.resetMinimumCycles, timing.resetMaximumCycles),
+		(PULSE_PRESYNC, timing.presyncMinimumCycles, timing.presyncMaximumCycles),
+		(PULSE_PRESYNC_DELAY, timing.presyncDelayMinimumCycles, timing.presyncDelayMaximumCycles),
+		(PULSE_SYNC, timing.syncMinimumCycles, timing.syncMaximumCycles),
+		(PULSE_SHORT_BIT, timing.shortMessageDataShortCyclesMinimum, timing.shortMessageDataShortCyclesMaximum),
+		(PULSE_LONG_BIT, timing.shortMessageDataLongCyclesMinimum, timing.shortMessageDataLongCyclesMaximum),
+	)
+	return sum(pulseClass for (pulseClass, minimum, maximum) in windows if minimum <= pulselength < maximum)
+
+class SearchOnlyClassifier(PulseClassifier):
+	maximumTableLength = 0
+
+@pytest.mark.parametrize('samplerate', (100000, 250000, 1000000))
+@pytest.mark.parametrize('marginpct', (5, 20, 40))
+def test_classes_are_the_windows(samplerate, marginpct):
+	timing = Timing(samplerate, marginpct)
+	classifier = PulseClassifier(timing)
+	searchOnly = SearchOnlyClassifier(timing)
+	assert classifier.tableLength > 0 and searchOnly.tableLength == 0
+	for pulselength in range(timing.resetMaximumCycles + 10):
+		expected = windowClasses(timing, pulselength)
+		assert classifier.classify(pulselength) == searchOnly.classify(pulselength) == expected
+
+def test_table_is_capped_at_high_samplerates():
+	timing = Timing(24000000)
+	classifier = PulseClassifier(timing)
+	assert classifier.tableLength == classifier.maximumTableLength < timing.resetMaximumCycles
+	assert timing.presyncMaximumCycles < classifier.tableLength
+	for boundary in classifier.boundaries + [classifier.tableLength]:
+		for pulselength in (boundary - 1, boundary, boundary + 1):
+			assert classifier.classify(pulselength) == windowClasses(timing, pulselength)
+
+def test_no_samplerate():
+	with pytest.raises(SamplerateError):
+		Timing(0)